@@ -0,0 +1,185 @@
+"""Headless render benchmark for every dashboard page.
+
+Each page runs in its own Python process, through Streamlit's ``AppTest``,
+against a directory of recorded query results, so the network is never
+involved and every page starts with empty caches. Record the fixtures once,
+then benchmark::
+
+    python -m dashboard.sources fixtures:benchmarks/fixtures
+    python -m benchmarks.pages --output bench.json
+
+Per page it reports the cold run (first render in a fresh process) and the
+warm reruns that follow: wall time and the time spent in loading, transforms
+and figure building (``dashboard.timing``), plus peak RSS and the bytes of
+figure JSON sent to the browser. ``--baseline`` compares against an earlier
+result file and fails if a page got slower than ``--threshold`` allows.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["🏠_Home.py"] + sorted(p.relative_to(ROOT).as_posix() for p in (ROOT / "pages").glob("*.py"))
+FIXTURES = ROOT / "benchmarks" / "fixtures"
+WARM_RUNS = 5
+# Seconds AppTest waits for one run of a page.
+TIMEOUT = 120
+
+
+def _stages(totals, runs=1):
+    return {stage: round(value["seconds"] / runs, 6) for stage, value in sorted(totals.items())}
+
+
+def measure(page, warm_runs=WARM_RUNS):
+    """Render ``page`` once cold and ``warm_runs`` times warm in this process."""
+    from streamlit.testing.v1 import AppTest
+
+    from dashboard import timing
+
+    timing.reset()
+    started = time.perf_counter()
+    app = AppTest.from_file(str(ROOT / page), default_timeout=TIMEOUT).run()
+    cold_seconds = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"{page} raised: {app.exception[0].message}")
+    cold_stages = _stages(timing.totals())
+    charts = app.get("plotly_chart")
+
+    timing.reset()
+    warm = []
+    for _ in range(warm_runs):
+        started = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - started)
+    return {
+        "cold": {"seconds": round(cold_seconds, 6), "stages": cold_stages},
+        "warm": {
+            "seconds": [round(s, 6) for s in warm],
+            "median": round(statistics.median(warm), 6) if warm else None,
+            "stages": _stages(timing.totals(), max(warm_runs, 1)),
+        },
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        "charts": len(charts),
+        "figure_json_bytes": sum(len(chart.proto.spec) for chart in charts),
+    }
+
+
+def run_page(page, fixtures, warm_runs):
+    """Benchmark ``page`` in a fresh interpreter and return its measurements."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+            UNISWAP_L2_SOURCE=f"fixtures:{fixtures}",
+            UNISWAP_L2_SCHEDULER="0",
+            UNISWAP_L2_CACHE_DIR=cache_dir,
+        )
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.pages", "--child", page, "--warm-runs", str(warm_runs)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if result.returncode:
+        raise RuntimeError(f"Benchmarking {page} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions():
+    versions = {"python": platform.python_version()}
+    for package in ("streamlit", "pandas", "plotly"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def compare(results, baseline, threshold):
+    """Print per-page changes against ``baseline``; return the pages that regressed."""
+    regressed = []
+    for page, now in results["pages"].items():
+        before = baseline["pages"].get(page)
+        if before is None:
+            continue
+        print(page, file=sys.stderr)
+        for label, old, new in [
+            ("cold s", before["cold"]["seconds"], now["cold"]["seconds"]),
+            ("warm s", before["warm"]["median"], now["warm"]["median"]),
+            ("peak RSS", before["peak_rss_bytes"], now["peak_rss_bytes"]),
+            ("figure JSON", before["figure_json_bytes"], now["figure_json_bytes"]),
+        ]:
+            if not old:
+                continue
+            change = (new - old) / old
+            spec = ">14,.3f" if isinstance(old, float) else ">14,"
+            print(f"  {label:<12} {old:{spec}} -> {new:{spec}}  {change:+.1%}", file=sys.stderr)
+            if label.endswith(" s") and change > threshold:
+                regressed.append(page)
+    return sorted(set(regressed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rendering the dashboard pages headlessly.")
+    parser.add_argument("pages", nargs="*", help="page scripts relative to the repo root (default: all)")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES, help="directory of recorded query results")
+    parser.add_argument("--warm-runs", type=int, default=WARM_RUNS, help="reruns measured after the cold run")
+    parser.add_argument("--output", type=Path, help="write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fractional slowdown against the baseline that counts as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_intermixed_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.warm_runs)))
+        return 0
+
+    if not args.fixtures.is_dir():
+        parser.error(f"no fixtures at {args.fixtures}; record them with "
+                     f"`python -m dashboard.sources fixtures:{args.fixtures}`")
+    results = {
+        "commit": _commit(),
+        "timestamp": int(time.time()),
+        "versions": _versions(),
+        "fixtures": str(args.fixtures.resolve()),
+        "warm_runs": args.warm_runs,
+        "pages": {},
+    }
+    for page in args.pages or PAGES:
+        results["pages"][page] = run_page(page, args.fixtures.resolve(), args.warm_runs)
+        print(f"{page}: cold {results['pages'][page]['cold']['seconds']:.3f}s, "
+              f"warm {results['pages'][page]['warm']['median']:.3f}s", file=sys.stderr)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.baseline:
+        regressed = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        if regressed:
+            print(f"Slower than the baseline: {', '.join(regressed)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""Shared data-loading helpers for the Uniswap On L2s pages."""
@@ -0,0 +1,209 @@
+"""Weekly chain metrics computed locally from the raw swap store.
+
+Reproduces the Flipside results behind
+
+- ``df22``: ACTIVE_USERS, SWAP_COUNT, TXN_PER_USER
+- ``df23``: AVG_TIME_DIFF_SECONDS, the mean gap between consecutive swaps
+- ``df24``: AVG_GAS_FEE
+- ``df26``: NEW_USERS, wallets swapping on a chain for the first time
+- ``df27``: ACTIVE_POOLS, TOTAL_VOLUME, AVG_VOLUME, MEDIAN_VOLUME
+
+per ``WEEK`` (the Monday a week starts on, as ``date_trunc('week', ...)``)
+and ``CHAIN``, from ``dashboard.swaps``. Everything is computed on integer
+codes: each swap gets one group number (chain × week), sums and counts are
+``bincount``s over it, distinct counts a hashed ``unique`` of (group, label
+code) pairs and medians a partial sort of each group's slice of one
+counting sort by group. Nothing runs per row in Python.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dashboard.swaps import AMOUNT_USD, BLOCK_TIMESTAMP, CHAIN, GAS_USD, POOL, SENDER
+
+COLUMNS = [CHAIN, BLOCK_TIMESTAMP, POOL, SENDER, AMOUNT_USD, GAS_USD]
+
+
+def week_start(timestamps):
+    """Days since the epoch of the Monday starting each timestamp's week."""
+    days = np.asarray(timestamps, dtype="datetime64[D]").astype(np.int64)
+    # 1970-01-01 was a Thursday, three days after a Monday.
+    return days - (days + 3) % 7
+
+
+def _codes(column):
+    """Integer codes for a label column and how many distinct codes there can be."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(np.int64), max(len(column.cat.categories), 1)
+    codes, uniques = pd.factorize(column)
+    return codes.astype(np.int64), max(len(uniques), 1)
+
+
+class WeeklyGroups:
+    """The (chain, week) group of every swap, shared by the metric functions."""
+
+    def __init__(self, swaps):
+        self.swaps = swaps
+        chain = swaps[CHAIN].astype("category")
+        self.chains = chain.cat.categories
+        chain_codes = chain.cat.codes.to_numpy(np.int64)
+        weeks = week_start(swaps[BLOCK_TIMESTAMP])
+        first = weeks.min() if len(weeks) else 0
+        # Every week from the first to the last, so the week index is a
+        # subtraction rather than a sort; weeks without swaps are dropped
+        # when the frame is built.
+        week_codes = (weeks - first) // 7
+        self.weeks = first + 7 * np.arange(week_codes.max() + 1 if len(weeks) else 0)
+        self.size = len(self.chains) * len(self.weeks)
+        self.key = chain_codes * len(self.weeks) + week_codes
+        self.chain_codes = chain_codes
+        self.swap_count = np.bincount(self.key, minlength=self.size)
+
+    def distinct(self, column):
+        """Distinct values of the label ``column`` per group."""
+        codes, n = _codes(self.swaps[column])
+        known = codes >= 0
+        pairs = pd.unique(self.key[known] * n + codes[known])
+        return np.bincount(pairs // n, minlength=self.size)
+
+    def first_seen(self, column, exclude=None):
+        """Values of ``column`` counted only in the group of their first week on each chain.
+
+        Values in ``exclude``, a ``pd.Index`` of values seen before these
+        swaps, aren't counted at all.
+        """
+        column = self.swaps[column].astype("category")
+        codes, n = _codes(column)
+        known = codes >= 0
+        if exclude is not None:
+            # get_indexer reuses the index's hash table across calls.
+            seen = exclude.get_indexer(column.cat.categories) >= 0
+            known &= ~np.append(seen, False)[codes]
+        per_chain = self.chain_codes[known] * n + codes[known]
+        # The key grows with the week within a chain, so the smallest key of
+        # each (chain, value) is its first week.
+        first = pd.Series(self.key[known]).groupby(per_chain, sort=False).min()
+        return np.bincount(first.to_numpy(), minlength=self.size)
+
+    def volume(self, column, median=True):
+        """Per group ``(total, mean, median)`` of ``column``, skipping missing values.
+
+        ``median`` is all NaN unless asked for.
+        """
+        values = self.swaps[column].to_numpy(np.float64)
+        valid = ~np.isnan(values)
+        key, values = self.key[valid], values[valid]
+        counts = np.bincount(key, minlength=self.size)
+        totals = np.bincount(key, weights=values, minlength=self.size)
+        medians = np.full(self.size, np.nan)
+        if median:
+            # A stable sort of small integers is a radix sort in NumPy.
+            small = np.int16 if self.size <= np.iinfo(np.int16).max else np.int32
+            ordered = values[np.argsort(key.astype(small), kind="stable")]
+            ends = np.cumsum(counts)
+            for group in np.flatnonzero(counts):
+                medians[group] = np.median(ordered[ends[group] - counts[group]:ends[group]])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, totals / counts, np.nan)
+        return totals, means, medians
+
+    def span(self):
+        """Per group ``(first, last)`` swap time, in microseconds since the epoch."""
+        times = self.swaps[BLOCK_TIMESTAMP].to_numpy("datetime64[us]").astype(np.int64)
+        first = np.full(self.size, np.iinfo(np.int64).max)
+        last = np.full(self.size, np.iinfo(np.int64).min)
+        np.minimum.at(first, self.key, times)
+        np.maximum.at(last, self.key, times)
+        return first, last
+
+    def frame(self, **columns):
+        """A ``WEEK``, ``CHAIN`` frame with ``columns`` for every group that has swaps."""
+        present = np.flatnonzero(self.swap_count)
+        chain_index, week_index = np.divmod(present, len(self.weeks))
+        frame = pd.DataFrame({
+            "WEEK": pd.to_datetime(self.weeks[week_index], unit="D"),
+            CHAIN: pd.Categorical.from_codes(chain_index, categories=self.chains),
+            **{name: values[present] for name, values in columns.items()},
+        })
+        return frame.sort_values(["WEEK", CHAIN], ignore_index=True)
+
+
+def activity(groups):
+    """``df22``: weekly active users, swaps and swaps per user."""
+    users = groups.distinct(SENDER)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_user = groups.swap_count / users
+    return groups.frame(ACTIVE_USERS=users, SWAP_COUNT=groups.swap_count, TXN_PER_USER=per_user)
+
+
+def swap_gaps(groups):
+    """``df23``: mean seconds between consecutive swaps, i.e. the week's span over its gaps."""
+    first, last = groups.span()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gaps = np.where(groups.swap_count > 1, (last - first) / 1e6 / (groups.swap_count - 1), np.nan)
+    frame = groups.frame(AVG_TIME_DIFF_SECONDS=gaps)
+    return frame.rename(columns={"WEEK": "WEEK_START"})
+
+
+def gas(groups):
+    """``df24``: mean gas fee per swap in USD."""
+    _, mean, _ = groups.volume(GAS_USD, median=False)
+    return groups.frame(AVG_GAS_FEE=mean)
+
+
+def new_users(groups, seen=None):
+    """``df26``: wallets making their first swap on the chain that week (and not in ``seen``)."""
+    return groups.frame(NEW_USERS=groups.first_seen(SENDER, seen))
+
+
+def pools(groups):
+    """``df27``: weekly active pools and swap volume statistics in USD."""
+    total, mean, median = groups.volume(AMOUNT_USD)
+    return groups.frame(
+        ACTIVE_POOLS=groups.distinct(POOL), TOTAL_VOLUME=total, AVG_VOLUME=mean, MEDIAN_VOLUME=median)
+
+
+AGGREGATES = {
+    "df22": activity,
+    "df23": swap_gaps,
+    "df24": gas,
+    "df26": new_users,
+    "df27": pools,
+}
+
+
+def weekly(swaps, names=AGGREGATES):
+    """Compute the named weekly tables (default: all) from one set of swaps."""
+    groups = WeeklyGroups(swaps)
+    return {name: AGGREGATES[name](groups) for name in names}
+
+
+def wide(groups, seen=None):
+    """Every weekly metric as one frame, one row per (``WEEK``, ``CHAIN``)."""
+    frames = [
+        activity(groups),
+        swap_gaps(groups).rename(columns={"WEEK_START": "WEEK"}),
+        gas(groups),
+        new_users(groups, seen),
+        pools(groups),
+    ]
+    # All of them have the same rows in the same order.
+    return pd.concat([frames[0], *(frame.drop(columns=["WEEK", CHAIN]) for frame in frames[1:])], axis=1)
+
+
+TABLE_COLUMNS = {
+    "df22": ["ACTIVE_USERS", "SWAP_COUNT", "TXN_PER_USER"],
+    "df23": ["AVG_TIME_DIFF_SECONDS"],
+    "df24": ["AVG_GAS_FEE"],
+    "df26": ["NEW_USERS"],
+    "df27": ["ACTIVE_POOLS", "TOTAL_VOLUME", "AVG_VOLUME", "MEDIAN_VOLUME"],
+}
+
+
+def split(frame):
+    """The per-query tables of a ``wide`` frame."""
+    tables = {}
+    for name, columns in TABLE_COLUMNS.items():
+        table = frame[["WEEK", CHAIN, *columns]].reset_index(drop=True)
+        tables[name] = table.rename(columns={"WEEK": "WEEK_START"}) if name == "df23" else table
+    return tables
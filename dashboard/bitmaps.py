@@ -0,0 +1,131 @@
+"""Compressed bitmaps of wallet ids, in the layout of Roaring bitmaps.
+
+Ids (``dashboard.wallets``) are split on their high 16 bits into chunks of
+65,536. Each chunk holding any ids is one container: a sorted ``uint16``
+array of the low bits while it has at most ``ARRAY_MAX`` ids, and a
+65,536-bit bitmap (8 KiB) once it has more, so a sparse chunk costs two
+bytes per id and a dense one never more than 8 KiB. Work is per container
+and vectorised within it, so the Python overhead grows with the number of
+chunks (one per 65,536 ids), not with the number of ids.
+"""
+
+import numpy as np
+
+ARRAY_MAX = 4096
+CHUNK = 1 << 16
+
+_ARRAY, _BITMAP = 0, 1
+
+
+def _to_bits(lows):
+    bits = np.zeros(CHUNK, dtype=bool)
+    bits[lows] = True
+    return np.packbits(bits, bitorder="little")
+
+
+def _from_bits(packed):
+    return np.flatnonzero(np.unpackbits(packed, bitorder="little")).astype(np.uint16)
+
+
+def _split(ids):
+    """``(keys, starts, lows)`` of sorted, distinct ``ids``: each key's lows are ``lows[starts[i]:starts[i + 1]]``."""
+    high = ids >> 16
+    keys, starts = np.unique(high, return_index=True)
+    return keys, np.append(starts, len(ids)), (ids & 0xFFFF).astype(np.uint16)
+
+
+class Bitmap:
+    def __init__(self):
+        # Sorted chunk keys and, for each, (kind, values).
+        self.keys = []
+        self.containers = []
+
+    @classmethod
+    def from_ids(cls, ids):
+        bitmap = cls()
+        bitmap.add(ids)
+        return bitmap
+
+    def __len__(self):
+        return sum(len(values) if kind == _ARRAY else int(np.unpackbits(values).sum())
+                   for kind, values in self.containers)
+
+    def add(self, ids):
+        """Add ``ids`` (any order, repeats allowed)."""
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        keys, starts, lows = _split(ids[ids >= 0])
+        for i, key in enumerate(keys):
+            new = lows[starts[i]:starts[i + 1]]
+            position = int(np.searchsorted(self.keys, key))
+            if position == len(self.keys) or self.keys[position] != key:
+                kind, values = _ARRAY, new
+                self.keys.insert(position, int(key))
+                self.containers.insert(position, None)
+            else:
+                kind, values = self.containers[position]
+                if kind == _ARRAY:
+                    values = np.union1d(values, new)
+                else:
+                    bits = np.unpackbits(values, bitorder="little").astype(bool)
+                    bits[new] = True
+                    values = np.packbits(bits, bitorder="little")
+            if kind == _ARRAY and len(values) > ARRAY_MAX:
+                kind, values = _BITMAP, _to_bits(values)
+            self.containers[position] = (kind, values)
+
+    def contains(self, ids):
+        """Whether each of ``ids`` is in the bitmap."""
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.zeros(len(ids), dtype=bool)
+        order = np.argsort(ids, kind="stable")
+        ordered = ids[order]
+        for key, (kind, values) in zip(self.keys, self.containers):
+            lo, hi = np.searchsorted(ordered, [key << 16, (key + 1) << 16])
+            if lo == hi:
+                continue
+            lows = ordered[lo:hi] & 0xFFFF
+            if kind == _ARRAY:
+                at = np.minimum(np.searchsorted(values, lows), len(values) - 1)
+                hit = values[at] == lows
+            else:
+                hit = (values[lows >> 3] >> (lows & 7).astype(np.uint8)) & 1 == 1
+            found[order[lo:hi]] = hit
+        return found
+
+    def difference(self, ids):
+        """The distinct ``ids`` not in the bitmap, sorted."""
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        return ids[~self.contains(ids)]
+
+    def to_ids(self):
+        """Every id in the bitmap, sorted."""
+        parts = [(key << 16) + (values if kind == _ARRAY else _from_bits(values)).astype(np.int64)
+                 for key, (kind, values) in zip(self.keys, self.containers)]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def to_arrays(self):
+        """The bitmap as four arrays, for ``from_arrays`` or saving with others in one ``.npz``."""
+        kinds = np.array([kind for kind, _ in self.containers], dtype=np.uint8)
+        data = [values.view(np.uint8) for _, values in self.containers]
+        sizes = np.array([len(values) for values in data], dtype=np.int64)
+        return {"keys": np.array(self.keys, dtype=np.int64), "kinds": kinds, "sizes": sizes,
+                "data": np.concatenate(data) if data else np.zeros(0, np.uint8)}
+
+    @classmethod
+    def from_arrays(cls, keys, kinds, sizes, data):
+        bitmap = cls()
+        ends = np.cumsum(sizes)
+        for key, kind, end, size in zip(keys, kinds, ends, sizes):
+            values = data[end - size:end]
+            bitmap.keys.append(int(key))
+            bitmap.containers.append((int(kind), values.view(np.uint16) if kind == _ARRAY else values.copy()))
+        return bitmap
+
+    def save(self, path):
+        """Write to ``path`` as one ``.npz`` file."""
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            return cls.from_arrays(saved["keys"], saved["kinds"], saved["sizes"], saved["data"])
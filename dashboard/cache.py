@@ -0,0 +1,145 @@
+"""Process-wide dataset cache with per-query TTLs and stale-while-revalidate.
+
+The first request for a dataset is served from a stored snapshot if there is
+one, otherwise it blocks on a fetch. From then on a request never
+waits on Flipside: once an entry is older than its query's ``ttl`` the cached
+frame is returned as-is and a refresh is queued on a background pool.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from dashboard import metrics
+
+logger = logging.getLogger(__name__)
+
+# Wait this long before retrying a query whose refresh failed.
+RETRY_DELAY = 60
+
+
+@dataclass
+class Entry:
+    frame: pd.DataFrame
+    fetched_at: float
+    checked_at: float
+
+    @property
+    def version(self):
+        return self.frame.attrs.get("version")
+
+
+class DatasetCache:
+    def __init__(self, fetch, derive=None, max_workers=4, read_snapshot=None):
+        # ``fetch(query, previous)`` returns a fresh DataFrame for a registry
+        # Query, or None if the result is unchanged since ``previous``.
+        # ``derive(query, frame)`` adds derived columns to each new version.
+        # ``read_snapshot(query)`` returns a stored ``(frame, fetched_at)`` or
+        # None; the first load of a query tries it before fetching.
+        self._fetch = fetch
+        self._derive = derive
+        self._read_snapshot = read_snapshot
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._query_locks = {}
+        self._refreshing = set()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataset-refresh")
+
+    def get(self, query):
+        """Return the cached frame for ``query``, loading it on first use.
+
+        The copy is shallow: renaming or adding columns doesn't reach the
+        cache, but pages must not write into the frame's values.
+        """
+        entry = self._entries.get(query.id)
+        if entry is None:
+            entry = self._load_first(query)
+        else:
+            metrics.dataset_requests.inc(query=query.name, result="hit")
+        if time.time() - entry.checked_at > query.ttl:
+            self.refresh_async(query)
+        return entry.frame.copy(deep=False)
+
+    def entry(self, query):
+        return self._entries.get(query.id)
+
+    def refresh(self, query):
+        """Fetch ``query`` now and replace its entry if it changed. Returns the entry."""
+        entry = self._entries.get(query.id)
+        frame = self._fetch(query, entry.frame if entry is not None else None)
+        now = time.time()
+        if frame is None and entry is None:
+            raise LookupError(f"{query.name} ({query.id}) was reported unchanged, but nothing is cached for it")
+        if frame is None:
+            # Unchanged: keep the same frame (and version), just restart the clock.
+            entry.checked_at = now
+            return entry
+        entry = Entry(self._add_derived(query, frame), fetched_at=now, checked_at=now)
+        self._entries[query.id] = entry
+        return entry
+
+    def refresh_async(self, query):
+        """Queue a background refresh of ``query`` unless one is already running."""
+        with self._lock:
+            if query.id in self._refreshing:
+                return
+            self._refreshing.add(query.id)
+        self._pool.submit(self._refresh_in_background, query)
+
+    def warm_async(self, query):
+        """Load ``query`` in the background (disk first), refreshing it if expired."""
+        self._pool.submit(self._warm, query)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _refresh_in_background(self, query):
+        try:
+            self.refresh(query)
+        except Exception:
+            logger.warning("Background refresh of %s (%s) failed", query.name, query.id, exc_info=True)
+            entry = self._entries.get(query.id)
+            if entry is not None:
+                entry.checked_at = time.time() - query.ttl + RETRY_DELAY
+        finally:
+            with self._lock:
+                self._refreshing.discard(query.id)
+
+    def _add_derived(self, query, frame):
+        if self._derive is None:
+            return frame
+        # Derive on a copy so the fetched frame persisted to disk stays raw.
+        return self._derive(query, frame.copy())
+
+    def _warm(self, query):
+        try:
+            entry = self._load_first(query)
+        except Exception:
+            logger.warning("Warming %s (%s) failed", query.name, query.id, exc_info=True)
+            return
+        if time.time() - entry.checked_at > query.ttl:
+            self.refresh_async(query)
+
+    def _load_first(self, query):
+        with self._lock:
+            query_lock = self._query_locks.setdefault(query.id, threading.Lock())
+        # Concurrent sessions asking for the same cold dataset share one fetch.
+        with query_lock:
+            entry = self._entries.get(query.id)
+            if entry is not None:
+                metrics.dataset_requests.inc(query=query.name, result="hit")
+                return entry
+            snapshot = self._read_snapshot(query) if self._read_snapshot else None
+            if snapshot is None:
+                metrics.dataset_requests.inc(query=query.name, result="miss")
+                return self.refresh(query)
+            metrics.dataset_requests.inc(query=query.name, result="snapshot")
+            frame, fetched_at = snapshot
+            entry = Entry(self._add_derived(query, frame), fetched_at=fetched_at, checked_at=fetched_at)
+            self._entries[query.id] = entry
+            return entry
@@ -0,0 +1,102 @@
+"""One pooled HTTP session for every Flipside request.
+
+``pd.read_json(url)`` opened a new connection, and paid a new TLS handshake,
+for each query. The shared ``session`` keeps connections to the Flipside host
+alive between requests, asks for gzip/brotli bodies (brotli when the
+``brotli`` package is installed) and applies connect and read timeouts.
+Each request's timing is kept in ``recent_timings``.
+"""
+
+import collections
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+
+# Enough pooled connections for a page's concurrent loads plus the scheduler.
+POOL_SIZE = 16
+
+recent_timings = collections.deque(maxlen=256)
+_sessions_lock = threading.Lock()
+_session = None
+
+
+@dataclass
+class RequestTiming:
+    url: str
+    status: int
+    # Seconds until the response headers arrived.
+    headers_seconds: float
+    # Seconds until the body was fully read.
+    total_seconds: float
+    # Body bytes as sent over the wire (compressed), and after decoding.
+    wire_bytes: int
+    body_bytes: int
+    encoding: str
+
+
+def get_session():
+    """The process-wide ``requests.Session``, created on first use."""
+    global _session
+    if _session is None:
+        with _sessions_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=POOL_SIZE,
+                    max_retries=Retry(total=2, connect=2, read=0, backoff_factor=0.5,
+                                      status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Accept-Encoding"] = ", ".join(_accepted_encodings())
+                _session = session
+    return _session
+
+
+def _accepted_encodings():
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        encodings.insert(0, "br")
+    return encodings
+
+
+def stream(url, headers=None, chunk_size=64 * 1024):
+    """GET ``url`` and return ``(response, chunks)``.
+
+    ``chunks`` yields the decoded body; once it is exhausted the request's
+    ``RequestTiming`` is set as ``response.timing`` and added to
+    ``recent_timings``. The caller must close the response.
+    """
+    started = time.perf_counter()
+    response = get_session().get(url, headers=headers, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    headers_seconds = time.perf_counter() - started
+
+    def chunks():
+        body_bytes = 0
+        for chunk in response.iter_content(chunk_size):
+            body_bytes += len(chunk)
+            yield chunk
+        response.timing = RequestTiming(
+            url=url,
+            status=response.status_code,
+            headers_seconds=headers_seconds,
+            total_seconds=time.perf_counter() - started,
+            wire_bytes=response.raw.tell(),
+            body_bytes=body_bytes,
+            encoding=response.headers.get("Content-Encoding", "identity"),
+        )
+        recent_timings.append(response.timing)
+
+    return response, chunks()
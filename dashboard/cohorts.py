@@ -0,0 +1,156 @@
+"""Weekly wallet cohorts computed from the raw swap store.
+
+A wallet's cohort on a chain is the week of its first swap there. For
+every chain, cohort week and number of weeks since, ``retention`` counts
+the cohort's wallets that swapped on the chain that week. ``overlap``
+counts, for every week and pair of chains, the wallets active on both.
+There are no Flipside queries behind them; they are served only when
+``UNISWAP_L2_SWAPS`` is set (see ``dashboard.sources``). The functions here
+compute them from a frame of swaps; ``dashboard.rollup`` keeps both up to
+date from each chain's weekly sets of active wallets instead, and builds
+the tables with ``retention_table`` and ``overlap_table``.
+
+Like ``dashboard.aggregate`` they work on integer codes: (chain, wallet,
+week) triples are packed into one integer and deduplicated with a hashed
+``unique``. For retention they are sorted, so each wallet's weeks are
+contiguous with its first week leading, and the whole chain × cohort ×
+week-offset matrix is one ``bincount``. For overlaps each (week, wallet)
+gets a bitmask of the chains it was active on; a ``bincount`` of the masks
+per week gives how many wallets were active on exactly each set of chains,
+and the overlap of any two or more chains is a sum over those counts.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dashboard.aggregate import week_start
+from dashboard.swaps import BLOCK_TIMESTAMP, CHAIN, SENDER
+
+COLUMNS = [CHAIN, BLOCK_TIMESTAMP, SENDER]
+
+
+def matrix(swaps):
+    """``(chains, first_week, counts)``: ``counts[c, i, k]`` is how many wallets that
+    first swapped on chain ``c`` in week ``i`` swapped there in week ``i + k``.
+
+    Weeks are numbered from ``first_week``, the Monday (days since the epoch)
+    of the earliest swap.
+    """
+    chain = swaps[CHAIN].astype("category")
+    chains = chain.cat.categories
+    wallets = swaps[SENDER].astype("category")
+    known = wallets.cat.codes.to_numpy() >= 0
+    days = week_start(swaps[BLOCK_TIMESTAMP])[known]
+    if not len(days):
+        return chains, 0, np.zeros((len(chains), 0, 0), dtype=np.int64)
+    first_week = int(days.min())
+    weeks = (days - first_week) // 7
+    n_weeks = int(weeks.max()) + 1
+    n_wallets = len(wallets.cat.categories)
+    wallet = chain.cat.codes.to_numpy(np.int64)[known] * n_wallets + wallets.cat.codes.to_numpy(np.int64)[known]
+    # Every week each (chain, wallet) was active in, once, in (wallet, week) order.
+    active = pd.unique(wallet * n_weeks + weeks)
+    active.sort()
+    wallet, weeks = np.divmod(active, n_weeks)
+    starts = np.flatnonzero(np.r_[True, wallet[1:] != wallet[:-1]])
+    cohort = np.repeat(weeks[starts], np.diff(np.r_[starts, len(wallet)]))
+    index = ((wallet // n_wallets) * n_weeks + cohort) * n_weeks + (weeks - cohort)
+    counts = np.bincount(index, minlength=len(chains) * n_weeks * n_weeks)
+    return chains, first_week, counts.reshape(len(chains), n_weeks, n_weeks)
+
+
+def retention(swaps):
+    """One row per chain, cohort ``WEEK`` and ``WEEKS_SINCE`` up to the latest week.
+
+    ``COHORT_SIZE`` is the cohort's wallets, ``ACTIVE_USERS`` those of them
+    that swapped that week and ``RETENTION`` the share, in percent.
+    """
+    return retention_table(*matrix(swaps))
+
+
+def retention_table(chains, first_week, counts):
+    """The ``retention`` table of a ``matrix``."""
+    sizes = counts[:, :, 0] if counts.size else np.zeros(counts.shape[:2], dtype=np.int64)
+    n_weeks = counts.shape[1]
+    # Offsets a cohort has reached by the latest week.
+    reached = np.arange(n_weeks)[None, :] + np.arange(n_weeks)[:, None] < n_weeks
+    chain, cohort, offset = np.nonzero((sizes > 0)[:, :, None] & reached[None])
+    size = sizes[chain, cohort]
+    active = counts[chain, cohort, offset]
+    return pd.DataFrame({
+        "WEEK": pd.to_datetime(first_week + 7 * cohort, unit="D"),
+        CHAIN: pd.Categorical.from_codes(chain, categories=chains),
+        "WEEKS_SINCE": offset,
+        "COHORT_SIZE": size,
+        "ACTIVE_USERS": active,
+        "RETENTION": 100 * active / np.maximum(size, 1),
+    })
+
+
+def curves(table):
+    """Retention by ``WEEKS_SINCE`` per chain over every cohort that has reached it."""
+    totals = table.groupby([CHAIN, "WEEKS_SINCE"], observed=True)[["ACTIVE_USERS", "COHORT_SIZE"]].sum()
+    totals["RETENTION"] = 100 * totals["ACTIVE_USERS"] / totals["COHORT_SIZE"]
+    return totals.reset_index()
+
+
+def patterns(swaps):
+    """``(chains, first_week, counts)``: ``counts[i, m]`` is how many wallets were
+    active in week ``i`` on exactly the chains in bitmask ``m`` (bit ``c`` for ``chains[c]``).
+    """
+    chain = swaps[CHAIN].astype("category")
+    chains = chain.cat.categories
+    wallets = swaps[SENDER].astype("category")
+    known = wallets.cat.codes.to_numpy() >= 0
+    days = week_start(swaps[BLOCK_TIMESTAMP])[known]
+    n_masks = 1 << len(chains)
+    if not len(days):
+        return chains, 0, np.zeros((0, n_masks), dtype=np.int64)
+    first_week = int(days.min())
+    weeks = (days - first_week) // 7
+    n_weeks = int(weeks.max()) + 1
+    wallet_weeks = weeks * len(wallets.cat.categories) + wallets.cat.codes.to_numpy(np.int64)[known]
+    active = pd.unique(wallet_weeks * len(chains) + chain.cat.codes.to_numpy(np.int64)[known])
+    wallet_weeks, chain_codes = np.divmod(active, len(chains))
+    # Each (wallet, week, chain) is there once, so summing the chain bits ORs them.
+    index, wallet_weeks = pd.factorize(wallet_weeks)
+    masks = np.bincount(index, weights=np.left_shift(1, chain_codes)).astype(np.int64)
+    weeks = wallet_weeks // len(wallets.cat.categories)
+    counts = np.bincount(weeks * n_masks + masks, minlength=n_weeks * n_masks)
+    return chains, first_week, counts.reshape(n_weeks, n_masks)
+
+
+def shared(counts, chain_codes):
+    """Per week, the wallets active on every one of the chains ``chain_codes``."""
+    wanted = int(np.sum(np.left_shift(1, np.asarray(chain_codes, dtype=np.int64))))
+    masks = np.arange(counts.shape[1])
+    return counts[:, (masks & wanted) == wanted].sum(axis=1)
+
+
+def overlap(swaps):
+    """One row per week and ordered pair of chains (each pair both ways round).
+
+    ``SHARED_USERS`` were active on both ``CHAIN`` and ``OTHER_CHAIN`` that
+    week; ``SHARE`` is their percentage of ``CHAIN``'s ``ACTIVE_USERS``.
+    """
+    return overlap_table(*patterns(swaps))
+
+
+def overlap_table(chains, first_week, counts):
+    """The ``overlap`` table of ``patterns``."""
+    n = len(chains)
+    bits = (np.arange(counts.shape[1])[:, None] >> np.arange(n)) & 1
+    users = counts @ bits
+    both = counts @ (bits[:, :, None] & bits[:, None, :]).reshape(len(bits), n * n)
+    week, first, second = np.indices((len(counts), n, n)).reshape(3, -1)
+    keep = (first != second) & (users[week, first] > 0)
+    week, first, second = week[keep], first[keep], second[keep]
+    common = both[week, first * n + second]
+    return pd.DataFrame({
+        "WEEK": pd.to_datetime(first_week + 7 * week, unit="D"),
+        CHAIN: pd.Categorical.from_codes(first, categories=chains),
+        "OTHER_CHAIN": pd.Categorical.from_codes(second, categories=chains),
+        "ACTIVE_USERS": users[week, first],
+        "SHARED_USERS": common,
+        "SHARE": 100 * common / users[week, first],
+    })
@@ -0,0 +1,39 @@
+"""Derived columns computed once per dataset version instead of on every rerun.
+
+Shares, percentages and formatted hover strings used to be recomputed by the
+page scripts on each rerun, i.e. on every widget click, through
+``groupby().transform(lambda ...)``. ``add_derived`` runs when a new version
+of a dataset enters the cache, using vectorised group sums, so reruns only
+read the columns.
+"""
+
+from dashboard.timing import timed_function
+from dashboard.transforms import share_of_total
+
+
+def _df1(frame):
+    frame['PERCENTAGE'] = share_of_total(frame, 'NUM_WALLETS', by='CHAIN')
+
+
+def _df10(frame):
+    frame['volume_usd'] = frame['volume'].map('${:,.0f}'.format)
+
+
+def _df21(frame):
+    frame['PCT_SHARE'] = share_of_total(frame, 'SWAP_VOLUME', by=['CHAIN', 'WEEK'])
+
+
+DERIVED = {
+    'df1': _df1,
+    'df10': _df10,
+    'df21': _df21,
+}
+
+
+@timed_function("transform")
+def add_derived(query, frame):
+    """Add ``query``'s derived columns to ``frame`` in place and return it."""
+    derive = DERIVED.get(query.name)
+    if derive is not None:
+        derive(frame)
+    return frame
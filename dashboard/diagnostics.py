@@ -0,0 +1,102 @@
+"""Hidden diagnostics view of the loader and render metrics.
+
+Not linked from the sidebar: open the Home page with ``?diagnostics`` in the
+URL. It shows, per dataset, when the cached result was last checked and last
+changed and how fetches and cache lookups have gone, per figure builder its
+cache hit rate and build, serialisation and size figures, and the most recent
+HTTP requests. The same
+numbers are exported for Prometheus by ``dashboard.metrics``.
+"""
+
+import dataclasses
+import time
+
+import pandas as pd
+import streamlit as st
+
+from dashboard import client, metrics, registry
+
+
+def _by(summary, index=0):
+    """Re-key a histogram summary on one of its label values."""
+    return {key[index]: value for key, value in summary.items()}
+
+
+def _counts(counter):
+    counts = {}
+    for (name, result), value in counter.values.copy().items():
+        counts.setdefault(name, {})[result] = value
+    return counts
+
+
+def datasets():
+    fetches = _by(metrics.fetch_seconds.summary())
+    sizes = _by(metrics.fetch_bytes.summary())
+    outcomes = _counts(metrics.fetch_results)
+    requests = _counts(metrics.dataset_requests)
+    now = time.time()
+    rows = []
+    for query in registry.QUERIES.values():
+        entry = registry.cache.entry(query)
+        count, total, p50, p95 = fetches.get(query.name, (0, 0.0, None, None))
+        size_count, size_total, _, _ = sizes.get(query.name, (0, 0.0, None, None))
+        rows.append({
+            "query": query.name,
+            "age (min)": round((now - entry.checked_at) / 60, 1) if entry else None,
+            "unchanged for (min)": round((now - entry.fetched_at) / 60, 1) if entry else None,
+            "version": (entry.version or "")[:12] if entry else None,
+            "rows": len(entry.frame) if entry else None,
+            "fetches": count,
+            "unchanged": outcomes.get(query.name, {}).get("unchanged", 0),
+            "errors": outcomes.get(query.name, {}).get("error", 0),
+            "mean fetch (s)": round(total / count, 3) if count else None,
+            "p50 ≤ (s)": p50,
+            "p95 ≤ (s)": p95,
+            "mean KiB": round(size_total / size_count / 1024, 1) if size_count else None,
+            **{f"cache {result}": requests.get(query.name, {}).get(result, 0) for result in ("hit", "snapshot", "miss")},
+        })
+    return pd.DataFrame(rows)
+
+
+def figures():
+    builds = _by(metrics.figure_seconds.summary())
+    serialised = _by(metrics.figure_serialize_seconds.summary())
+    sizes = _by(metrics.figure_bytes.summary())
+    requests = _counts(metrics.figure_requests)
+    rows = []
+    for label in sorted(requests):
+        count, total, _, p95 = builds.get(label, (0, 0.0, None, None))
+        s_count, s_total, _, _ = serialised.get(label, (0, 0.0, None, None))
+        b_count, b_total, _, _ = sizes.get(label, (0, 0.0, None, None))
+        rows.append({
+            "builder": label,
+            "hits": requests[label].get("hit", 0),
+            "misses": requests[label].get("miss", 0),
+            "mean build (s)": round(total / count, 3) if count else None,
+            "p95 build ≤ (s)": p95,
+            "mean serialise (s)": round(s_total / s_count, 3) if s_count else None,
+            "mean JSON KiB": round(b_total / b_count / 1024, 1) if b_count else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def stages():
+    return pd.DataFrame([
+        {"stage": stage, "calls": count, "total (s)": round(total, 3), "p50 ≤ (s)": p50, "p95 ≤ (s)": p95}
+        for (stage,), (count, total, p50, p95) in sorted(metrics.stage_seconds.summary().items())
+    ])
+
+
+def render():
+    st.title("Diagnostics")
+    st.caption(f"Data source: {registry.source!r}. Quantiles are bucket upper bounds.")
+    st.subheader("Datasets")
+    st.dataframe(datasets(), hide_index=True)
+    st.subheader("Figures")
+    st.dataframe(figures(), hide_index=True)
+    st.subheader("Stages")
+    st.dataframe(stages(), hide_index=True)
+    st.subheader("Recent requests")
+    st.dataframe(pd.DataFrame([dataclasses.asdict(t) for t in reversed(client.recent_timings)]), hide_index=True)
+    with st.expander("Prometheus metrics"):
+        st.code(metrics.render(), language="text")
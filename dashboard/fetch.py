@@ -0,0 +1,87 @@
+"""Conditional, streaming downloads of Flipside results.
+
+A fetched frame carries its validators in ``frame.attrs``: the response's
+``ETag`` and ``Last-Modified`` headers, and ``version``, a SHA-256 of the raw
+payload. Passing the previous frame back in lets the server answer 304, and
+when it doesn't, an identical payload is still caught by its hash. Either way
+the result is reported as unchanged before any JSON is parsed, and
+everything keyed on ``version`` downstream stays valid.
+
+Requests go through the pooled session in ``dashboard.client``. Bodies are
+spooled to a temporary file while they are hashed and then parsed from there
+by ``dashboard.ingest``, so the response text is never held in memory as a
+whole.
+"""
+
+import hashlib
+import tempfile
+
+from dashboard import client
+from dashboard.ingest import CHUNK_SIZE, read_records
+from dashboard.schema import apply_schema
+
+# Bodies up to this size stay in memory while spooling.
+SPOOL_MAX = 1024 * 1024
+
+
+def conditional_get(url, etag=None, last_modified=None):
+    """GET ``url``; returns ``(body, version, etag, last_modified, timing)``.
+
+    ``body`` is a rewound file holding the payload and ``version`` its
+    SHA-256, or both are ``None`` when the server answered 304. ``timing``
+    is the request's ``client.RequestTiming``.
+    """
+    headers = {"Accept": "application/json"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    response, chunks = client.stream(url, headers, CHUNK_SIZE)
+    with response:
+        if response.status_code == 304:
+            for _ in chunks:
+                pass
+            return None, None, etag, last_modified, response.timing
+        response.raise_for_status()
+        sha256 = hashlib.sha256()
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+        for chunk in chunks:
+            sha256.update(chunk)
+            body.write(chunk)
+        body.seek(0)
+        headers = response.headers
+        return body, sha256.hexdigest(), headers.get("ETag"), headers.get("Last-Modified"), response.timing
+
+
+def fetch_frame(url, previous=None, schema=None):
+    """Download a JSON records payload as a DataFrame.
+
+    Returns ``None`` when it is unchanged since ``previous``, the frame from
+    the last successful fetch. ``schema`` is applied with ``apply_schema``.
+    The frame's ``attrs["fetch"]`` and ``attrs["ingest"]`` record the
+    request timing and the bytes and rows read.
+    """
+    attrs = previous.attrs if previous is not None else {}
+    body, version, etag, last_modified, timing = conditional_get(
+        url, attrs.get("etag"), attrs.get("last_modified"))
+    if body is None:
+        return None
+    with body:
+        if version == attrs.get("version"):
+            return None
+        frame, stats = read_records(body)
+    if schema:
+        apply_schema(frame, schema)
+    frame.attrs.update(
+        version=version,
+        etag=etag,
+        last_modified=last_modified,
+        ingest={"bytes": stats.bytes_read, "rows": stats.rows, "seconds": stats.seconds},
+        fetch={
+            "seconds": timing.total_seconds,
+            "headers_seconds": timing.headers_seconds,
+            "wire_bytes": timing.wire_bytes,
+            "encoding": timing.encoding,
+        },
+    )
+    return frame
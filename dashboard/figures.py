@@ -0,0 +1,104 @@
+"""Memoised Plotly figures, so a rerun with unchanged data does no Plotly work.
+
+Streamlit reruns a page script on every interaction. Page code wraps its
+figure construction in functions decorated with ``cached_figures`` and passes
+the frames in as arguments. A call is keyed on the function's code plus, for
+each DataFrame argument, its dataset ``version`` and the rows and columns it
+holds (other arguments by value). Built figures are kept in a bounded LRU
+shared by all sessions.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from dashboard import metrics, timing
+
+MAX_FIGURES = 256
+# Serialise one build in this many per builder to measure JSON size and time.
+SERIALIZE_EVERY = 10
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+# {builder label: builds so far}
+_builds = {}
+
+
+def _frame_token(frame):
+    version = frame.attrs.get("version")
+    if version is None:
+        # Not straight from the registry: fall back to hashing the contents.
+        version = int(pd.util.hash_pandas_object(frame, index=True).sum())
+    # A version covers the whole dataset; the index and columns tell apart
+    # the slices and filtered subsets taken from it.
+    index = int(pd.util.hash_pandas_object(frame.index).sum())
+    return ("frame", version, tuple(frame.columns), index)
+
+
+def _token(value):
+    if isinstance(value, pd.DataFrame):
+        return _frame_token(value)
+    return value
+
+
+def _spec(build):
+    code = build.__code__
+    digest = hashlib.sha1(code.co_code + repr(code.co_consts).encode()).hexdigest()
+    return (code.co_filename, build.__qualname__, digest)
+
+
+def _observe_build(label, result, seconds):
+    metrics.figure_seconds.observe(seconds, figure=label)
+    with _lock:
+        builds = _builds[label] = _builds.get(label, 0) + 1
+    # Streamlit serialises every figure on each rerun. Serialising a sample
+    # of builds again (a builder's first, then one in SERIALIZE_EVERY) shows
+    # what that costs without doubling the work of every cache miss.
+    if (builds - 1) % SERIALIZE_EVERY:
+        return
+    figures = result if isinstance(result, (tuple, list)) else (result,)
+    started = time.perf_counter()
+    size = sum(len(figure.to_json()) for figure in figures)
+    metrics.figure_serialize_seconds.observe(time.perf_counter() - started, figure=label)
+    metrics.figure_bytes.observe(size, figure=label)
+
+
+def cached_figures(build):
+    """Memoise ``build``, a function of frames (and plain values) returning figures.
+
+    The figures returned are shared between reruns and sessions; don't modify
+    them after they have been built.
+    """
+    spec = _spec(build)
+    label = f"{os.path.basename(spec[0])}:{spec[1]}"
+
+    @functools.wraps(build)
+    def wrapper(*args):
+        key = (spec, tuple(_token(arg) for arg in args))
+        with _lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                metrics.figure_requests.inc(figure=label, result="hit")
+                return _cache[key]
+        metrics.figure_requests.inc(figure=label, result="miss")
+        started = time.perf_counter()
+        with timing.timed("figures"):
+            result = build(*args)
+        _observe_build(label, result, time.perf_counter() - started)
+        with _lock:
+            _cache[key] = result
+            while len(_cache) > MAX_FIGURES:
+                _cache.popitem(last=False)
+        return result
+
+    return wrapper
+
+
+def clear():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,121 @@
+"""HyperLogLog sketches of distinct wallets, one per (chain, day).
+
+A sketch is ``2 ** P`` one-byte registers (4 KiB at the default ``P = 12``).
+Each wallet address is hashed once (``pd.util.hash_array``, stable across
+runs); the top ``P`` bits pick a register and the register keeps the
+longest run of leading zeros seen in the remaining bits. Sketches merge by
+taking the register-wise maximum, so the sketch of any set of days and
+chains is the maximum over theirs, and an estimate of its distinct count is
+one pass over the registers, with a standard error of about
+``1.04 / sqrt(2 ** P)`` (1.6% at ``P = 12``).
+
+``DailySketches`` holds the sketches of one chain as a ``(days, registers)``
+array that grows as swaps arrive and is persisted with the rollups.
+"""
+
+import numpy as np
+import pandas as pd
+
+P = 12
+
+
+def _bit_length(values):
+    # frexp is exact on 32-bit halves of a uint64.
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def hash_values(values):
+    """64-bit hashes of ``values`` (strings or a categorical's categories)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _index_and_rank(hashes, p):
+    index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - p)) - 1)
+    rank = (64 - p) - _bit_length(rest) + 1
+    return index, rank.astype(np.uint8)
+
+
+def grouped(hashes, groups, size, p=P):
+    """One sketch per group: ``(size, 2 ** p)`` registers of ``hashes`` by ``groups``."""
+    m = 1 << p
+    registers = np.zeros(size * m, dtype=np.uint8)
+    index, rank = _index_and_rank(np.asarray(hashes, dtype=np.uint64), p)
+    np.maximum.at(registers, np.asarray(groups, dtype=np.int64) * m + index, rank)
+    return registers.reshape(size, m)
+
+
+def sketch(values, p=P):
+    """The sketch of a collection of values."""
+    hashes = hash_values(values)
+    return grouped(hashes, np.zeros(len(hashes), dtype=np.int64), 1, p)[0]
+
+
+def merge(registers, axis=0):
+    """Union of sketches stacked along ``axis``."""
+    return np.max(registers, axis=axis) if len(registers) else np.zeros(registers.shape[-1], np.uint8)
+
+
+def estimate(registers):
+    """Estimated distinct count of each sketch along the last axis."""
+    registers = np.asarray(registers)
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    # Small cardinalities: linear counting over the empty registers.
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class DailySketches:
+    """Per-day sketches of one chain, from ``first_day`` (days since the epoch) on."""
+
+    def __init__(self, registers=None, first_day=None, p=P):
+        self.p = p
+        self.registers = registers if registers is not None else np.zeros((0, 1 << p), dtype=np.uint8)
+        self.first_day = first_day
+
+    def add(self, days, values):
+        """Fold in ``values`` seen on ``days`` (arrays of equal length)."""
+        days = np.asarray(days, dtype=np.int64)
+        if not len(days):
+            return
+        low, high = int(days.min()), int(days.max())
+        if self.first_day is None:
+            self.first_day = low
+        if low < self.first_day:
+            pad = np.zeros((self.first_day - low, self.registers.shape[1]), dtype=np.uint8)
+            self.registers = np.concatenate([pad, self.registers])
+            self.first_day = low
+        if high - self.first_day + 1 > len(self.registers):
+            pad = np.zeros((high - self.first_day + 1 - len(self.registers), self.registers.shape[1]), np.uint8)
+            self.registers = np.concatenate([self.registers, pad])
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Hash each distinct address once.
+            codes = values.cat.codes.to_numpy()
+            hashes = hash_values(values.cat.categories)[codes[codes >= 0]]
+            days = days[codes >= 0]
+        else:
+            hashes = hash_values(values)
+        new = grouped(hashes, days - low, high - low + 1, self.p)
+        window = self.registers[low - self.first_day:high - self.first_day + 1]
+        np.maximum(window, new, out=window)
+
+    def union(self, start=None, end=None):
+        """The merged sketch of days ``start`` to ``end`` inclusive (``datetime64[D]`` or day numbers)."""
+        if self.first_day is None:
+            return np.zeros(1 << self.p, dtype=np.uint8)
+        lo = 0 if start is None else max(day_number(start) - self.first_day, 0)
+        hi = len(self.registers) if end is None else max(day_number(end) - self.first_day + 1, 0)
+        return merge(self.registers[lo:hi])
+
+
+def day_number(value):
+    """Days since the epoch of a day number or anything ``np.datetime64`` accepts."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(np.datetime64(value, "D").astype(np.int64))
@@ -0,0 +1,197 @@
+"""Streaming ingestion of Flipside's JSON records arrays.
+
+``pd.read_json`` keeps the whole response text, every parsed row dict and the
+finished frame alive at once. ``read_records`` instead decodes one record at
+a time from fixed-size chunks and folds each batch of rows straight into
+typed NumPy column chunks, so at any point only one chunk of text and one
+batch of Python objects exist next to the columns themselves.
+"""
+
+import codecs
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_string_dtype
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+BATCH_ROWS = 8192
+
+_WHITESPACE = " \t\n\r,"
+
+
+@dataclass
+class IngestStats:
+    bytes_read: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+
+def _is_date_column(name):
+    # The same column-name rule pd.read_json uses for convert_dates, so
+    # frames come out exactly as the pages used to get them.
+    name = name.lower()
+    return (
+        name.endswith(("_at", "_time"))
+        or name.startswith("timestamp")
+        or name in ("modified", "date", "datetime")
+    )
+
+
+def _to_array(values, dtype=None):
+    """One batch of a column: typed if it is all numbers (or all booleans), else objects."""
+    if dtype is not None:
+        return np.asarray(pd.array(values, dtype=dtype))
+    # Filled element by element: np.array would turn equal-length lists (JSON
+    # arrays) into a 2-D array and fail on ragged ones.
+    array = np.fromiter(values, dtype=object, count=len(values))
+    inferred = pd.Series(array, copy=False).infer_objects()
+    if inferred.dtype.kind in "biuf":
+        return inferred.to_numpy()
+    return array
+
+
+def _concatenate(chunks):
+    if len(chunks) == 1:
+        return chunks[0]
+    if len({chunk.dtype for chunk in chunks}) == 1:
+        return np.concatenate(chunks)
+    # Batches typed differently (ints then floats, numbers then only nulls,
+    # a column first seen part way through): infer over the whole column.
+    return np.concatenate([chunk.astype(object) for chunk in chunks])
+
+
+def _coerce(name, column):
+    """Infer ``column``'s dtype the way ``pd.read_json`` does (``dtype=True``).
+
+    Besides the DataFrame constructor's inference, read_json turns numeric
+    strings into numbers, booleans with gaps into floats and integral floats
+    into ints; date-named columns are parsed first.
+    """
+    data = pd.Series(column, copy=False)
+    if data.dtype == object:
+        data = data.infer_objects()
+    if _is_date_column(name) and is_string_dtype(data.dtype):
+        try:
+            return pd.to_datetime(data)
+        except (TypeError, ValueError):
+            pass
+    original = data
+    if is_string_dtype(data.dtype):
+        try:
+            data = data.astype("float64")
+        except (TypeError, ValueError):
+            pass
+    if len(data) and data.dtype in ("float64", "object"):
+        try:
+            ints = original.astype("int64")
+        except (TypeError, ValueError, OverflowError):
+            pass
+        else:
+            if (ints == data).all():
+                data = ints
+    return data
+
+
+class _Columns:
+    """Accumulates rows column by column in typed chunks."""
+
+    def __init__(self, dtypes):
+        self.dtypes = dtypes or {}
+        self.names = []
+        self.chunks = {}
+        self.batch = {}
+        self.batch_rows = 0
+        self.rows = 0
+        # Repeated labels ("Arbitrum", "WETH", ...) share one str object.
+        self.interned = {}
+
+    def append(self, record):
+        for name in record:
+            if name in self.batch:
+                continue
+            self.names.append(name)
+            self.chunks[name] = [np.full(self.rows, None, dtype=object)] if self.rows else []
+            self.batch[name] = [None] * self.batch_rows
+        interned = self.interned
+        for name, values in self.batch.items():
+            value = record.get(name)
+            if type(value) is str:
+                value = interned.setdefault(value, value)
+            values.append(value)
+        self.batch_rows += 1
+        if self.batch_rows >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.batch_rows:
+            return
+        for name, values in self.batch.items():
+            self.chunks[name].append(_to_array(values, self.dtypes.get(name)))
+            values.clear()
+        self.rows += self.batch_rows
+        self.batch_rows = 0
+
+    def frame(self):
+        self.flush()
+        columns = {}
+        for name in self.names:
+            column = _concatenate(self.chunks.pop(name))
+            if name not in self.dtypes:
+                column = _coerce(name, column)
+            columns[name] = column
+        return pd.DataFrame(columns)
+
+
+def read_records(stream, dtypes=None, chunk_size=CHUNK_SIZE):
+    """Parse a JSON array of flat objects from a binary ``stream`` into a DataFrame.
+
+    ``dtypes`` optionally maps column names to dtypes applied batch by batch.
+    Returns ``(frame, IngestStats)``.
+    """
+    started = time.perf_counter()
+    stats = IngestStats()
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    columns = _Columns(dtypes)
+    buf, pos = "", 0
+    opened = done = eof = False
+    while not done:
+        # Skip separators; stop at the closing bracket.
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buf):
+            if not opened:
+                if buf[pos] != "[":
+                    raise ValueError("expected a JSON array of records")
+                opened = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                done = True
+                continue
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                columns.append(record)
+                continue
+        if eof:
+            raise ValueError("unexpected end of JSON records array")
+        chunk = stream.read(chunk_size)
+        stats.bytes_read += len(chunk)
+        eof = not chunk
+        buf = buf[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+    frame = columns.frame()
+    stats.rows = len(frame)
+    stats.seconds = time.perf_counter() - started
+    logger.debug("Ingested %d rows from %d bytes in %.3fs", stats.rows, stats.bytes_read, stats.seconds)
+    return frame, stats
@@ -0,0 +1,31 @@
+"""Run a page's Flipside loaders side by side instead of one after another."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Upper bound on simultaneous Flipside requests from a single page run.
+MAX_WORKERS = 8
+
+
+def load_all(*loaders, max_workers=MAX_WORKERS):
+    """Call every loader on a bounded thread pool and return their frames in order.
+
+    The loaders go through the registry's dataset cache, so warm datasets
+    still come straight from memory; only the cold ones hit the network,
+    and a cold page costs about as much as its slowest query.
+    """
+    if not loaders:
+        return []
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run(loader):
+        # Attach the page's script context so Streamlit calls made while
+        # loading behave as they would on the main script thread.
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return loader()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(loaders))) as pool:
+        return list(pool.map(run, loaders))
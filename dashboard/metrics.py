@@ -0,0 +1,263 @@
+"""Loader and render metrics, aggregated in-process and exported for Prometheus.
+
+Every dataset fetch records its duration, rows and bytes; every dataset and
+figure request records whether the cache answered it; every figure build
+records its build time, and a sample of builds their serialisation time and
+JSON size. Observations go into fixed-bucket histograms and counters keyed by
+label values, so memory stays bounded however long the server runs.
+``render()`` formats everything in the Prometheus text exposition format.
+Set ``UNISWAP_L2_METRICS_PORT`` to serve it at ``/metrics`` on that port
+(``ensure_server``); the hidden diagnostics view (``dashboard.diagnostics``)
+shows the same numbers.
+"""
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES = tuple(1024 * 4 ** i for i in range(10))
+ROWS = tuple(10 ** i for i in range(7))
+
+_metrics = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        with _lock:
+            _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with _lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield self.name + "_total", _labels(self.labelnames, key), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=SECONDS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # {label values: [per-bucket counts (last is +Inf), sum]}
+        self.values = {}
+        with _lock:
+            _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def summary(self):
+        """``{label values: (count, sum, p50, p95)}``, quantiles estimated from the buckets."""
+        with _lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self.values.items()}
+        return {
+            key: (sum(counts), total, self._quantile(counts, 0.5), self._quantile(counts, 0.95))
+            for key, (counts, total) in values.items()
+        }
+
+    def _quantile(self, counts, q):
+        # Upper bound of the bucket the quantile falls into.
+        rank = q * sum(counts)
+        seen = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return math.nan
+
+    def samples(self):
+        with _lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self.values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield self.name + "_bucket", _labels(self.labelnames, key, [("le", _number(bound))]), cumulative
+            yield self.name + "_sum", _labels(self.labelnames, key), total
+            yield self.name + "_count", _labels(self.labelnames, key), cumulative
+
+
+class Gauge:
+    """A value read when metrics are collected, from ``collect() -> {label values: value}``."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), collect=dict):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        with _lock:
+            _metrics.append(self)
+
+    def samples(self):
+        for key, value in sorted(self.collect().items()):
+            yield self.name, _labels(self.labelnames, key), value
+
+
+fetch_seconds = Histogram(
+    "uniswap_l2_fetch_seconds", "Time to load one dataset from its source, parsing included.", ["query"])
+fetch_bytes = Histogram(
+    "uniswap_l2_fetch_bytes", "Decoded payload bytes per dataset fetch.", ["query"], BYTES)
+fetch_rows = Histogram(
+    "uniswap_l2_fetch_rows", "Rows per fetched dataset.", ["query"], ROWS)
+ingest_seconds = Histogram(
+    "uniswap_l2_ingest_seconds", "Time spent parsing a fetched payload.", ["query"])
+fetch_results = Counter(
+    "uniswap_l2_fetch", "Dataset fetches by outcome (changed, unchanged, error).", ["query", "result"])
+dataset_requests = Counter(
+    "uniswap_l2_dataset_requests", "Dataset requests by cache result (hit, snapshot, miss).", ["query", "result"])
+figure_seconds = Histogram(
+    "uniswap_l2_figure_build_seconds", "Time to build a page's Plotly figures.", ["figure"])
+figure_serialize_seconds = Histogram(
+    "uniswap_l2_figure_serialize_seconds", "Time to serialise built figures to JSON, for a sample of builds.",
+    ["figure"])
+figure_bytes = Histogram(
+    "uniswap_l2_figure_json_bytes", "JSON bytes of the figures one builder returns, for a sample of builds.",
+    ["figure"], BYTES)
+figure_requests = Counter(
+    "uniswap_l2_figure_requests", "Figure requests by cache result (hit, miss).", ["figure", "result"])
+stage_seconds = Histogram(
+    "uniswap_l2_stage_seconds", "Wall time per timed stage of a page run (see dashboard.timing).", ["stage"])
+
+
+def _ages(since):
+    """Seconds since each cached entry's ``since`` time (``checked_at`` or ``fetched_at``)."""
+    from dashboard import registry
+
+    now = time.time()
+    ages = {}
+    for query in registry.QUERIES.values():
+        entry = registry.cache.entry(query)
+        if entry is not None:
+            ages[(query.name,)] = now - getattr(entry, since)
+    return ages
+
+
+# An unchanged result is checked again without being refetched, so how stale a
+# dataset is and how long its data has stayed the same are separate figures.
+dataset_age = Gauge(
+    "uniswap_l2_dataset_age_seconds", "Seconds since the cached result of each dataset was last checked.",
+    ["query"], partial(_ages, "checked_at"))
+dataset_unchanged = Gauge(
+    "uniswap_l2_dataset_unchanged_seconds", "Seconds since each dataset's cached result last changed.",
+    ["query"], partial(_ages, "fetched_at"))
+
+
+def observe_fetch(query, frame, seconds):
+    """Record one fetch of ``query`` that took ``seconds``; ``frame`` is None if unchanged."""
+    fetch_seconds.observe(seconds, query=query.name)
+    if frame is None:
+        fetch_results.inc(query=query.name, result="unchanged")
+        return
+    fetch_results.inc(query=query.name, result="changed")
+    fetch_rows.observe(len(frame), query=query.name)
+    ingest = frame.attrs.get("ingest")
+    if ingest:
+        fetch_bytes.observe(ingest["bytes"], query=query.name)
+        ingest_seconds.observe(ingest["seconds"], query=query.name)
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    with _lock:
+        metrics = list(_metrics)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def ensure_server(port=None):
+    """Serve ``/metrics`` on ``port`` (default ``UNISWAP_L2_METRICS_PORT``) once per process.
+
+    Does nothing when no port is configured. Returns the server, if any.
+    """
+    global _server
+    port = port or os.environ.get("UNISWAP_L2_METRICS_PORT")
+    if _server is not None or not port:
+        return _server or None
+    with _server_lock:
+        if _server is None:
+            try:
+                server = ThreadingHTTPServer(("", int(port)), _Handler)
+            except OSError:
+                # E.g. another process on this host already exports metrics
+                # there; don't try again on every page run.
+                logger.warning("Could not serve metrics on port %s", port, exc_info=True)
+                _server = False
+                return None
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            _server = server
+    return _server
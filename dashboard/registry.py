@@ -0,0 +1,124 @@
+"""Every Flipside query the dashboard uses, and the shared cache that loads them.
+
+Pages refer to datasets by their ``dfN`` name. Loading goes through one
+process-wide ``DatasetCache`` keyed on the Flipside query id, so a dataset one
+page has loaded is a cache hit on every other page that uses it. Results come
+from ``source``, Flipside unless ``UNISWAP_L2_SOURCE`` names a local backend
+(see ``dashboard.sources``). Results fetched from Flipside are also written to
+the on-disk store, and a fresh process reads them back from there before going
+to Flipside. Each query's ``ttl`` says how long a
+result counts as fresh; older results are still served while a background
+refresh runs. Derived columns (``dashboard.derived``) are added once per new
+result. ``LOCAL_QUERIES`` have no Flipside query behind them and load only
+when the source computes them from a raw swap store (``has_swaps``).
+"""
+
+import time
+from dataclasses import dataclass
+from functools import partial
+
+from dashboard import metrics, scheduler, sources, store, timing
+from dashboard.cache import DatasetCache
+from dashboard.derived import add_derived
+from dashboard.loaders import load_all
+
+source = sources.from_environment()
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    url: str
+    ttl: int = DAY
+
+    @property
+    def id(self):
+        return self.url.split('/')[-1]
+
+
+# Last-10-day and last-30-day windows go stale within the hour, weekly series
+# a few times a day, and all-time tables once a day.
+QUERIES = {q.name: q for q in [
+    # User Retention & Growth
+    Query("df1", "https://flipsidecrypto.xyz/edit/queries/9eb769df-c80d-40af-81e9-2a9f3d00d95f"),
+    Query("df6", "https://flipsidecrypto.xyz/edit/queries/ddca2c5e-2626-4303-bb77-3b7a44152587"),
+    Query("df16", "https://flipsidecrypto.xyz/edit/queries/510159c8-01fb-4cfb-8945-532f510bc75c"),
+    Query("df17", "https://flipsidecrypto.xyz/edit/queries/87050e70-1b02-4012-973d-6524766ce87b"),
+    Query("df26", "https://flipsidecrypto.xyz/edit/queries/fddcceb6-6ee6-4220-8e6f-7b14cf8db853", ttl=6 * HOUR),
+    # Gas Costs
+    Query("df2", "https://flipsidecrypto.xyz/edit/queries/585330c0-7820-4195-b1a2-faae610a4154"),
+    Query("df3", "https://flipsidecrypto.xyz/edit/queries/37397424-4baf-487f-9437-40ef7db4f41d"),
+    Query("df24", "https://flipsidecrypto.xyz/edit/queries/531ec317-6c5d-4556-b4c7-d8c7daa46143", ttl=6 * HOUR),
+    # Understanding Trading Patterns
+    Query("df4", "https://flipsidecrypto.xyz/edit/queries/d66c80a7-ce8f-419e-ad7d-9319c543f30a", ttl=HOUR),
+    Query("df5", "https://flipsidecrypto.xyz/edit/queries/ada13e9c-7e25-4618-9f24-9e27c6b09c1a", ttl=HOUR),
+    Query("df9", "https://flipsidecrypto.xyz/edit/queries/8e4b199c-1f8e-42be-bbfb-3829be128ede"),
+    Query("df10", "https://flipsidecrypto.xyz/edit/queries/29687135-0e8f-47af-a84b-2b148fee1db9", ttl=HOUR),
+    Query("df21", "https://flipsidecrypto.xyz/edit/queries/c61e84bf-7ef2-49bf-b5fe-4211c3d19777", ttl=6 * HOUR),
+    Query("df23", "https://flipsidecrypto.xyz/edit/queries/c3097631-5447-419e-97b6-577886c02600", ttl=6 * HOUR),
+    # Home
+    Query("df7", "https://flipsidecrypto.xyz/edit/queries/6349f677-143b-4774-94d2-c0704633f365"),
+    Query("df8", "https://flipsidecrypto.xyz/edit/queries/67409c8d-a5dd-4b4d-b611-710ef891281b"),
+    Query("df22", "https://flipsidecrypto.xyz/edit/queries/95beab6d-99e4-4133-ae87-f3f000c46258", ttl=6 * HOUR),
+    Query("df27", "https://flipsidecrypto.xyz/edit/queries/44323a13-da6a-4c55-b15e-c6821afd8ca1", ttl=6 * HOUR),
+    # Token Ecosystem Analysis
+    Query("df11", "https://flipsidecrypto.xyz/edit/queries/6a07e76a-e2d7-4e19-994d-ea8fc9ab5cb3"),
+    Query("df12", "https://flipsidecrypto.xyz/edit/queries/769501ac-dd3a-4ff4-999b-c1636300b2d6"),
+    Query("df13", "https://flipsidecrypto.xyz/edit/queries/28e0cea8-65f2-498d-aa21-de0d531eecbf"),
+    Query("df14", "https://flipsidecrypto.xyz/edit/queries/90b45034-cf89-49d2-bf30-ab8906ec385d"),
+    Query("df15", "https://flipsidecrypto.xyz/edit/queries/e1b3a5e7-8420-4418-aadb-dd6070c0f7bd"),
+    Query("df18", "https://flipsidecrypto.xyz/edit/queries/69c25641-4e12-4e63-9f79-12ebe0542f27"),
+    Query("df25", "https://flipsidecrypto.xyz/edit/queries/9ec57d83-0d07-4b46-a481-43d9070d8122", ttl=6 * HOUR),
+]}
+
+# Computed from the raw swap store only; the id is the name.
+LOCAL_QUERIES = {q.name: q for q in [
+    Query("retention", "retention", ttl=6 * HOUR),
+    Query("overlap", "overlap", ttl=6 * HOUR),
+]}
+
+
+def has_swaps():
+    """Whether ``source`` computes datasets from a raw swap store, so ``LOCAL_QUERIES`` load."""
+    return isinstance(source, sources.AggregateSource)
+
+
+def fetch(query, previous=None):
+    """Load the latest result of ``query`` from ``source``, persisting it if needed.
+
+    Returns ``None`` if the result is unchanged since ``previous``.
+    """
+    started = time.perf_counter()
+    try:
+        frame = source.fetch(query, previous)
+    except Exception:
+        metrics.fetch_results.inc(query=query.name, result="error")
+        raise
+    metrics.observe_fetch(query, frame, time.perf_counter() - started)
+    if frame is not None and source.persists(query):
+        store.write(query.id, frame)
+    return frame
+
+
+def read_snapshot(query):
+    """The newest stored result of ``query``, if the current source keeps any."""
+    return store.read_latest(query.id) if source.persists(query) else None
+
+
+cache = DatasetCache(fetch, add_derived, read_snapshot=read_snapshot)
+
+
+def load(name):
+    """Return the latest result of the registered query ``name`` (e.g. ``"df22"``)."""
+    return cache.get(QUERIES[name] if name in QUERIES else LOCAL_QUERIES[name])
+
+
+def load_datasets(*names):
+    """Load several registered queries concurrently, returning frames in order."""
+    scheduler.ensure_started()
+    metrics.ensure_server()
+    with timing.timed("load"):
+        return load_all(*(partial(load, name) for name in names))
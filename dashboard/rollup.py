@@ -0,0 +1,505 @@
+"""Incremental weekly rollups of the raw swap store.
+
+``WeeklyRollup`` keeps each chain's weekly rows, sketches, rolling volume
+grid and weekly sets of active wallets, and on each ``update`` folds in only
+the part files that arrived since the last one. Its state lives next to the
+swaps, in ``<swaps>/_rollups/``; ``state.json`` in each chain's folder names
+the current files and is replaced last.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dashboard import aggregate, cohorts, hll, quantiles, rolling, swaps, wallets
+from dashboard.bitmaps import Bitmap
+from dashboard.swaps import AMOUNT_USD, BLOCK_TIMESTAMP, CHAIN, SENDER
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_DIR = "_rollups"
+
+
+@dataclass
+class Watermark:
+    last_part: str = ""
+    last_block_time: str = ""
+    open_week: str = ""
+    late_swaps: int = 0
+    files: dict = field(default_factory=dict)
+
+
+def _month_days(month):
+    """The first day and the day after the last of ``month`` (``"YYYY-MM"``), as day numbers."""
+    start = np.datetime64(month, "M")
+    return tuple(int(day) for day in np.array([start, start + 1]).astype("datetime64[D]").astype(np.int64))
+
+
+def _by_month(first_day, arrays, months):
+    """``(month, blocks)`` for each of ``months``: the rows of the per-day ``arrays``, from
+    ``first_day`` on, for every day of the month, zero where they have none.
+    """
+    for month in sorted(months):
+        start, end = _month_days(month)
+        lo, hi = max(start, first_day), min(end, first_day + len(arrays[0]))
+        blocks = []
+        for array in arrays:
+            block = np.zeros((end - start, *array.shape[1:]), dtype=array.dtype)
+            if lo < hi:
+                block[lo - start:hi - start] = array[lo - first_day:hi - first_day]
+            blocks.append(block)
+        yield month, blocks
+
+
+def _from_months(folder, names, load):
+    """Per-day arrays saved by ``_by_month`` as ``names`` (``{month: file}``), read with
+    ``load``, and the day number of their first row. Months without a file are zero.
+    """
+    months = sorted(names)
+    first_day, _ = _month_days(months[0])
+    arrays = None
+    for month in months:
+        start, end = _month_days(month)
+        blocks = load(folder / names[month])
+        if arrays is None:
+            _, last = _month_days(months[-1])
+            arrays = [np.zeros((last - first_day, *block.shape[1:]), dtype=block.dtype) for block in blocks]
+        for array, block in zip(arrays, blocks):
+            array[start - first_day:end - first_day] = block
+    return arrays, first_day
+
+
+def _prefixed(prefix, bitmap):
+    return {prefix + name: values for name, values in bitmap.to_arrays().items()}
+
+
+def _unprefixed(saved, prefix):
+    return Bitmap.from_arrays(**{name[len(prefix):]: saved[name] for name in saved.files if name.startswith(prefix)})
+
+
+def _load_quantiles(path):
+    with np.load(path) as saved:
+        return saved["counts"], saved["totals"]
+
+
+class _ChainRollup:
+    """Rows, open-week swaps, known senders and daily sketches of one chain."""
+
+    def __init__(self, folder, chain, wallet_ids):
+        self.folder = folder
+        self.chain = chain
+        self.wallet_ids = wallet_ids
+        self.watermark = Watermark()
+        self.rows = None
+        self.open = None
+        self.seen = Bitmap()
+        self.sketches = hll.DailySketches()
+        self.quantiles = quantiles.DailyQuantiles()
+        self.hourly = rolling.HourlyVolume()
+        # Months whose sketch files are out of date.
+        self._changed = set()
+        # For each closed week (its Monday, as a day number), the wallets
+        # active that week, those whose first week it was (the cohort), and
+        # ``(cohort weeks, wallets)``: how many of the week's wallets are in
+        # each cohort. Saved once, when the week closes.
+        self.active = {}
+        self.cohorts = {}
+        self.retention = {}
+        self._new_weeks = set()
+        # The open week's distinct wallet ids and their cohort weeks.
+        self._open_active = None
+        state = folder / "state.json"
+        if state.is_file():
+            self.watermark = Watermark(**json.loads(state.read_text()))
+            files = self.watermark.files
+            self.rows = pd.read_parquet(folder / files["rows"])
+            self.open = swaps.read_parts([folder / files["open"]], chain, aggregate.COLUMNS)
+            self.seen = Bitmap.load(folder / files["seen"])
+            if "sketches" in files:
+                (registers,), first_day = _from_months(folder, files["sketches"], lambda path: (np.load(path),))
+                self.sketches = hll.DailySketches(registers, first_day)
+            if "quantiles" in files:
+                (counts, totals), first_day = _from_months(folder, files["quantiles"], _load_quantiles)
+                self.quantiles = quantiles.DailyQuantiles(counts, totals, first_day)
+            with np.load(folder / files["hourly"]) as saved:
+                self.hourly = rolling.HourlyVolume(saved["slabs"], saved["days"])
+            for day, name in files["weeks"].items():
+                week = hll.day_number(day)
+                with np.load(folder / name) as saved:
+                    self.active[week] = _unprefixed(saved, "active_")
+                    self.cohorts[week] = _unprefixed(saved, "cohort_")
+                    self.retention[week] = (saved["retention_cohorts"], saved["retention_wallets"])
+
+    def _cohort_weeks(self, ids):
+        """The cohort week of each of the distinct wallet ``ids``, ``-1`` for wallets in no closed week."""
+        found = np.full(len(ids), -1, dtype=np.int64)
+        pending = np.arange(len(ids))
+        for week in sorted(self.cohorts):
+            if not len(pending):
+                break
+            hit = self.cohorts[week].contains(ids[pending])
+            found[pending[hit]] = week
+            pending = pending[~hit]
+        return found
+
+    def _close_weeks(self, ids, weeks):
+        """Record the wallets of weeks that just closed from their swaps' wallet ``ids`` and ``weeks``."""
+        known = ids >= 0
+        # (week, wallet) pairs, once each, sorted by week and then wallet.
+        pairs = np.unique((weeks[known].astype(np.int64) << 32) | ids[known].astype(np.int64))
+        if not len(pairs):
+            return
+        week_of, id_of = pairs >> 32, pairs & 0xFFFFFFFF
+        distinct, first = np.unique(id_of, return_index=True)
+        cohort = self._cohort_weeks(distinct)
+        # Wallets new to the chain start their cohort in the first week they appear.
+        cohort = np.where(cohort < 0, week_of[first], cohort)[np.searchsorted(distinct, id_of)]
+        bounds = np.flatnonzero(np.r_[True, week_of[1:] != week_of[:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            week = int(week_of[lo])
+            self.active[week] = Bitmap.from_ids(id_of[lo:hi])
+            self.cohorts[week] = Bitmap.from_ids(id_of[lo:hi][cohort[lo:hi] == week])
+            self.retention[week] = np.unique(cohort[lo:hi], return_counts=True)
+            self._new_weeks.add(week)
+
+    def open_active(self):
+        """The open week's distinct wallet ids and, for each, its cohort week."""
+        if self._open_active is None:
+            if self.open is None or self.open.empty:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+            ids = self.wallet_ids.codes(self.open[SENDER].astype("category"))
+            ids = np.unique(ids[ids >= 0]).astype(np.int64)
+            cohort = self._cohort_weeks(ids)
+            cohort[cohort < 0] = hll.day_number(self.watermark.open_week)
+            self._open_active = (ids, cohort)
+        return self._open_active
+
+    def week_ids(self, week):
+        """The distinct ids of the wallets active in ``week``."""
+        if week in self.active:
+            return self.active[week].to_ids()
+        if self.watermark.open_week and week == hll.day_number(self.watermark.open_week):
+            return self.open_active()[0]
+        return np.zeros(0, dtype=np.int64)
+
+    def week_version(self, week):
+        """A token that changes whenever the wallets active in ``week`` can have."""
+        if self.watermark.open_week and week < hll.day_number(self.watermark.open_week):
+            return "closed"
+        return self.watermark.last_part
+
+    def retention_counts(self):
+        """``(weeks, cohort weeks, wallets)``: how many wallets of each cohort were active each week."""
+        parts = [(np.full(len(cohort_weeks), week), cohort_weeks, wallets)
+                 for week, (cohort_weeks, wallets) in self.retention.items()]
+        _, cohort = self.open_active()
+        if len(cohort):
+            cohort_weeks, wallets = np.unique(cohort, return_counts=True)
+            parts.append((np.full(len(cohort_weeks), hll.day_number(self.watermark.open_week)), cohort_weeks, wallets))
+        if not parts:
+            return tuple(np.zeros(0, dtype=np.int64) for _ in range(3))
+        return tuple(np.concatenate(arrays).astype(np.int64) for arrays in zip(*parts))
+
+    def fold(self, swaps_dir):
+        """Fold in this chain's new part files; returns how many swaps were read."""
+        new_parts = [path for path in swaps.parts(swaps_dir, self.chain) if path.name > self.watermark.last_part]
+        if not new_parts:
+            return 0
+        new = swaps.read_parts(new_parts, self.chain, aggregate.COLUMNS)
+        received = len(new)
+        days = new[BLOCK_TIMESTAMP].to_numpy("datetime64[D]").astype(np.int64)
+        self._changed.update(np.unique(days.astype("datetime64[D]").astype("datetime64[M]")).astype(str).tolist())
+        self.sketches.add(days, new[SENDER])
+        self.quantiles.add(days, new[AMOUNT_USD].to_numpy(np.float64))
+        self.hourly.add(new[BLOCK_TIMESTAMP].to_numpy(), new[AMOUNT_USD].to_numpy(np.float64))
+        open_week = np.datetime64(self.watermark.open_week or "NaT", "D")
+        if self.watermark.open_week:
+            late = aggregate.week_start(new[BLOCK_TIMESTAMP]) < open_week.astype(np.int64)
+            if late.any():
+                logger.warning("%s: ignoring %d swaps for closed weeks; rebuild to include them",
+                               self.chain, late.sum())
+                self.watermark.late_swaps += int(late.sum())
+                new = new[~late]
+        batch = new if self.open is None else pd.concat([self.open, new], ignore_index=True)
+        self.watermark.last_part = new_parts[-1].name
+        if batch.empty:
+            # Before the first swaps there are no rows to save; the empty
+            # parts are simply read again next time.
+            if self.rows is not None:
+                self._save(seen_changed=False)
+            return received
+        self._open_active = None
+        for name in (CHAIN, *swaps.LABELS):
+            batch[name] = batch[name].astype("category")
+
+        senders = batch[SENDER].cat.categories
+        sender_ids = self.wallet_ids.intern(senders)
+        seen = senders[self.seen.contains(sender_ids)]
+        rows = aggregate.wide(aggregate.WeeklyGroups(batch), seen).drop(columns=CHAIN)
+        weeks = aggregate.week_start(batch[BLOCK_TIMESTAMP])
+        closing = weeks < weeks.max()
+        seen_changed = bool(closing.any())
+        if seen_changed:
+            codes = batch[SENDER].cat.codes.to_numpy()[closing]
+            self._close_weeks(np.where(codes >= 0, sender_ids[codes], -1), weeks[closing])
+            self.seen.add(sender_ids[codes[codes >= 0]])
+        if self.rows is not None:
+            frozen = self.rows[self.rows["WEEK"] < pd.Timestamp(open_week)]
+            rows = pd.concat([frozen, rows], ignore_index=True)
+        self.rows = rows
+        self.open = batch[~closing].reset_index(drop=True)
+        self.watermark.open_week = str(np.datetime64(int(weeks.max()), "D"))
+        self.watermark.last_block_time = str(batch[BLOCK_TIMESTAMP].max())
+        self._save(seen_changed)
+        return received
+
+    def _save(self, seen_changed):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        stamp = time.time_ns()
+        files = dict(self.watermark.files)
+        files["rows"] = f"rows-{stamp}.parquet"
+        files["open"] = f"open-{stamp}.parquet"
+        self.rows.to_parquet(self.folder / files["rows"], index=False)
+        swaps.compact(self.open.drop(columns=CHAIN)).to_parquet(self.folder / files["open"], index=False)
+        if seen_changed or "seen" not in files:
+            files["seen"] = f"seen-{stamp}.npz"
+            self.seen.save(self.folder / files["seen"])
+        if len(self.sketches.registers):
+            # Only the months with new swaps are written again.
+            files["sketches"] = dict(files.get("sketches", {}))
+            for month, (registers,) in _by_month(self.sketches.first_day, [self.sketches.registers], self._changed):
+                files["sketches"][month] = f"sketches-{month}-{stamp}.npy"
+                np.save(self.folder / files["sketches"][month], registers)
+        if len(self.quantiles.counts):
+            files["quantiles"] = dict(files.get("quantiles", {}))
+            daily = [self.quantiles.counts, self.quantiles.totals]
+            for month, (counts, totals) in _by_month(self.quantiles.first_day, daily, self._changed):
+                files["quantiles"][month] = f"quantiles-{month}-{stamp}.npz"
+                np.savez_compressed(self.folder / files["quantiles"][month], counts=counts, totals=totals)
+        files["hourly"] = f"hourly-{stamp}.npz"
+        np.savez(self.folder / files["hourly"], slabs=self.hourly.slabs, days=self.hourly.days)
+        files["weeks"] = dict(files.get("weeks", {}))
+        for week in sorted(self._new_weeks):
+            day = str(np.datetime64(week, "D"))
+            files["weeks"][day] = f"week-{day}-{stamp}.npz"
+            cohort_weeks, wallets = self.retention[week]
+            np.savez(self.folder / files["weeks"][day], retention_cohorts=cohort_weeks, retention_wallets=wallets,
+                     **_prefixed("active_", self.active[week]), **_prefixed("cohort_", self.cohorts[week]))
+        self.watermark.files = files
+        tmp = self.folder / "state.json.tmp"
+        tmp.write_text(json.dumps(asdict(self.watermark), indent=2))
+        os.replace(tmp, self.folder / "state.json")
+        self._changed.clear()
+        self._new_weeks.clear()
+        names = {name for value in files.values() for name in (value.values() if isinstance(value, dict) else [value])}
+        for path in [*self.folder.glob("*.parquet"), *self.folder.glob("*.np[yz]")]:
+            if path.name not in names:
+                path.unlink(missing_ok=True)
+
+    def table(self):
+        if self.rows is None:
+            return None
+        rows = self.rows.copy()
+        rows.insert(1, CHAIN, self.chain)
+        return rows
+
+
+SUMMARY_COLUMNS = ["UNIQUE_USERS", "VOLUME", "AVG_SWAP_SIZE_USD", "MEDIAN_SWAP_SIZE_USD"]
+
+
+class WeeklyRollup:
+    def __init__(self, swaps_dir):
+        self.swaps_dir = Path(swaps_dir)
+        self.folder = self.swaps_dir / ROLLUP_DIR
+        self.wallet_ids = wallets.WalletIds(self.folder / "wallets")
+        self._chains = {}
+        self._lock = threading.Lock()
+        # Week -> (chains and their week versions, wallets active on each set of chains).
+        self._patterns = {}
+
+    def _chain(self, chain):
+        if chain not in self._chains:
+            self._chains[chain] = _ChainRollup(self.folder / chain, chain, self.wallet_ids)
+        return self._chains[chain]
+
+    def update(self):
+        """Fold new swaps into every chain's rollup; returns ``{chain: swaps read}``."""
+        with self._lock:
+            return {chain: self._chain(chain).fold(self.swaps_dir) for chain in swaps.chains(self.swaps_dir)}
+
+    def watermarks(self):
+        with self._lock:
+            return {chain: self._chain(chain).watermark for chain in swaps.chains(self.swaps_dir)}
+
+    def distinct_users(self, chains=None, start=None, end=None):
+        """Estimated distinct senders on ``chains`` (default: all) from day ``start`` to ``end``.
+
+        Days are inclusive, as anything ``np.datetime64`` accepts; ``None``
+        leaves that end open.
+        """
+        with self._lock:
+            if chains is None:
+                chains = swaps.chains(self.swaps_dir)
+            sketches = [self._chain(chain).sketches.union(start, end) for chain in chains]
+        return float(hll.estimate(hll.merge(np.array(sketches)))) if sketches else 0.0
+
+    def swap_sizes(self, q=(0.5, 0.9, 0.99), chains=None, start=None, end=None):
+        """Estimated ``q`` quantiles of swap size in USD on ``chains`` from day ``start`` to ``end``.
+
+        Within ``quantiles.ACCURACY`` of the exact ones; days as for
+        ``distinct_users``.
+        """
+        with self._lock:
+            if chains is None:
+                chains = swaps.chains(self.swaps_dir)
+            counts = [self._chain(chain).quantiles.union(start, end)[0] for chain in chains]
+        return quantiles.quantile(quantiles.merge(np.array(counts)) if counts else [], q)
+
+    def _summarise(self, chains, start, end):
+        sketches, counts, total = [], [], 0.0
+        for chain in chains:
+            rollup = self._chain(chain)
+            sketches.append(rollup.sketches.union(start, end))
+            chain_counts, chain_total = rollup.quantiles.union(start, end)
+            counts.append(chain_counts)
+            total += chain_total
+        counts = quantiles.merge(np.array(counts))
+        swap_count = counts.sum()
+        return {
+            "UNIQUE_USERS": round(float(hll.estimate(hll.merge(np.array(sketches))))),
+            "VOLUME": total,
+            "AVG_SWAP_SIZE_USD": total / swap_count if swap_count else np.nan,
+            "MEDIAN_SWAP_SIZE_USD": float(quantiles.quantile(counts, 0.5)),
+        }
+
+    def summary(self, by_chain=True, start=None, end=None):
+        """Unique users and swap volume, mean and median size, per chain (``df7``) or overall (``df8``)."""
+        with self._lock:
+            chains = swaps.chains(self.swaps_dir)
+            if by_chain:
+                rows = [{CHAIN: chain, **self._summarise([chain], start, end)} for chain in chains]
+                return pd.DataFrame(rows, columns=[CHAIN, *SUMMARY_COLUMNS])
+            rows = [self._summarise(chains, start, end)] if chains else []
+            return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+    def hourly_volume(self):
+        """``df10``: swap volume by ``day`` of the week and ``hour`` over each chain's last 30 days."""
+        with self._lock:
+            grids = {chain: self._chain(chain).hourly.grid for chain in swaps.chains(self.swaps_dir)}
+        cells = len(rolling.WEEKDAYS) * rolling.HOURS
+        return pd.DataFrame({
+            CHAIN: np.repeat(list(grids), cells),
+            "day": np.tile(np.repeat(rolling.WEEKDAYS, rolling.HOURS), len(grids)),
+            "hour": np.tile(np.arange(rolling.HOURS), len(grids) * len(rolling.WEEKDAYS)),
+            "volume": np.concatenate([grid.ravel() for grid in grids.values()]) if grids else np.zeros(0),
+        })
+
+    def retention(self):
+        """The cohort ``retention`` table (see ``dashboard.cohorts``) from each chain's weekly wallets."""
+        with self._lock:
+            chains = swaps.chains(self.swaps_dir)
+            counts = [self._chain(chain).retention_counts() for chain in chains]
+        active = [(week, cohort) for week, cohort, _ in counts if len(week)]
+        if not active:
+            return cohorts.retention_table(chains, 0, np.zeros((len(chains), 0, 0), dtype=np.int64))
+        first_week = min(int(cohort.min()) for _, cohort in active)
+        n_weeks = (max(int(week.max()) for week, _ in active) - first_week) // 7 + 1
+        matrix = np.zeros((len(chains), n_weeks, n_weeks), dtype=np.int64)
+        for chain, (week, cohort, wallets) in enumerate(counts):
+            matrix[chain, (cohort - first_week) // 7, (week - cohort) // 7] = wallets
+        return cohorts.retention_table(chains, first_week, matrix)
+
+    def _pattern(self, rollups, week):
+        ids = [rollup.week_ids(week) for rollup in rollups]
+        chain = np.repeat(np.arange(len(ids)), [len(week_ids) for week_ids in ids])
+        # Each wallet is there once per chain, so summing the chain bits ORs them.
+        index, _ = pd.factorize(np.concatenate(ids))
+        masks = np.bincount(index, weights=np.left_shift(1, chain)).astype(np.int64)
+        return np.bincount(masks, minlength=1 << len(rollups))
+
+    def overlap(self):
+        """The cross-chain ``overlap`` table (see ``dashboard.cohorts``) from each chain's weekly wallets.
+
+        A week's counts are kept until one of the chains can have new swaps that week.
+        """
+        with self._lock:
+            chains = swaps.chains(self.swaps_dir)
+            rollups = [self._chain(chain) for chain in chains]
+            weeks = {week for rollup in rollups for week in rollup.active}
+            weeks.update(hll.day_number(rollup.watermark.open_week) for rollup in rollups if rollup.watermark.open_week)
+            if not weeks:
+                return cohorts.overlap_table(chains, 0, np.zeros((0, 1 << len(chains)), dtype=np.int64))
+            first_week = min(weeks)
+            counts = np.zeros(((max(weeks) - first_week) // 7 + 1, 1 << len(chains)), dtype=np.int64)
+            for week in weeks:
+                key = (tuple(chains), tuple(rollup.week_version(week) for rollup in rollups))
+                if self._patterns.get(week, (None,))[0] != key:
+                    self._patterns[week] = (key, self._pattern(rollups, week))
+                counts[(week - first_week) // 7] = self._patterns[week][1]
+        return cohorts.overlap_table(chains, first_week, counts)
+
+    def tables(self):
+        """The per-query weekly tables (``df22``, ``df23``, ...) as of the last update."""
+        with self._lock:
+            parts = [self._chain(chain).table() for chain in swaps.chains(self.swaps_dir)]
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return aggregate.weekly(swaps.read_parts([], "", aggregate.COLUMNS))
+        frame = pd.concat(parts, ignore_index=True)
+        frame[CHAIN] = frame[CHAIN].astype("category")
+        frame = frame.sort_values(["WEEK", CHAIN], ignore_index=True)
+        return aggregate.split(frame)
+
+    def rebuild(self):
+        """Drop all rollup state; the next ``update`` folds in all of history."""
+        with self._lock:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self._chains.clear()
+            self._patterns.clear()
+            self.wallet_ids = wallets.WalletIds(self.folder / "wallets")
+
+
+# Tables served from the sketches and rolling grids rather than the weekly rows.
+SUMMARIES = {
+    "df7": partial(WeeklyRollup.summary, by_chain=True),
+    "df8": partial(WeeklyRollup.summary, by_chain=False),
+    "df10": WeeklyRollup.hourly_volume,
+}
+
+# Cohort tables served from the weekly sets of active wallets.
+COHORTS = {
+    "retention": WeeklyRollup.retention,
+    "overlap": WeeklyRollup.overlap,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold new swaps into the weekly rollups.")
+    parser.add_argument("swaps", type=Path, help="raw swap store directory")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every week from scratch")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    rollup = WeeklyRollup(args.swaps)
+    if args.rebuild:
+        rollup.rebuild()
+    started = time.perf_counter()
+    folded = rollup.update()
+    for chain, watermark in rollup.watermarks().items():
+        logger.info("%s: %d new swaps, open week %s, last block %s", chain, folded.get(chain, 0),
+                    watermark.open_week, watermark.last_block_time)
+    logger.info("Updated in %.2fs", time.perf_counter() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""Background refresh of every registered query on a per-query timetable.
+
+Pages start the scheduler on their first run (see ``ensure_started``) and it
+keeps the shared dataset cache warm from then on, so page renders only read
+memory. By default each query is refreshed once per ``ttl``; a TOML file
+named by ``UNISWAP_L2_SCHEDULE`` can override that::
+
+    [intervals]
+    default = 43200   # seconds, for queries not listed below
+    df4 = 900
+    df10 = 1800
+
+Run ``python -m dashboard.scheduler --once`` before starting the server to
+fill the on-disk store, so even the first visitor is served from disk. Point
+``--api-url`` at a local stub of the Flipside endpoint, or ``--source`` at a
+local backend (see ``dashboard.sources``), to exercise it offline.
+"""
+
+import argparse
+import heapq
+import logging
+import os
+import threading
+import time
+import tomllib
+
+logger = logging.getLogger(__name__)
+
+_started = None
+_start_lock = threading.Lock()
+
+
+def load_intervals(queries, path=None):
+    """Map each query name to its refresh interval in seconds."""
+    intervals = {name: query.ttl for name, query in queries.items()}
+    path = path or os.environ.get("UNISWAP_L2_SCHEDULE")
+    if not path:
+        return intervals
+    with open(path, "rb") as f:
+        overrides = tomllib.load(f).get("intervals", {})
+    default = overrides.pop("default", None)
+    if default is not None:
+        intervals = dict.fromkeys(intervals, int(default))
+    for name, seconds in overrides.items():
+        if name in intervals:
+            intervals[name] = int(seconds)
+        else:
+            logger.warning("%s: ignoring interval for unscheduled query %r", path, name)
+    return intervals
+
+
+class Scheduler(threading.Thread):
+    def __init__(self, cache, queries, intervals):
+        super().__init__(name="dataset-scheduler", daemon=True)
+        self.cache = cache
+        self.queries = queries
+        self.intervals = intervals
+        self._stopped = threading.Event()
+        self._due = []
+
+    def run(self):
+        now = time.time()
+        for name, query in self.queries.items():
+            if self.cache.entry(query) is None:
+                # Nothing in memory yet: load from disk or Flipside right away.
+                self.cache.warm_async(query)
+            heapq.heappush(self._due, (now + self.intervals[name], name))
+        while self._due and not self._stopped.is_set():
+            due, name = self._due[0]
+            if self._stopped.wait(max(0.0, due - time.time())):
+                break
+            heapq.heappop(self._due)
+            query = self.queries[name]
+            entry = self.cache.entry(query)
+            # A page request may have refreshed it in the meantime.
+            if entry is not None and entry.checked_at + self.intervals[name] > time.time():
+                due = entry.checked_at + self.intervals[name]
+            else:
+                self.cache.refresh_async(query)
+                due = time.time() + self.intervals[name]
+            heapq.heappush(self._due, (due, name))
+
+    def stop(self):
+        self._stopped.set()
+
+
+def ensure_started():
+    """Start the process-wide scheduler once; later calls are no-ops.
+
+    Set ``UNISWAP_L2_SCHEDULER=0`` to leave refreshes to page requests.
+    """
+    global _started
+    if _started is not None or os.environ.get("UNISWAP_L2_SCHEDULER") == "0":
+        return _started
+    from dashboard import registry
+
+    with _start_lock:
+        if _started is None:
+            _started = Scheduler(registry.cache, registry.QUERIES, load_intervals(registry.QUERIES))
+            _started.start()
+    return _started
+
+
+def warm_all(names=None):
+    """Refresh the given queries (default: all) once, concurrently, and wait."""
+    from dashboard import registry
+    from dashboard.loaders import load_all
+
+    names = names or list(registry.QUERIES)
+    failed = []
+
+    def refresh(name):
+        try:
+            registry.cache.refresh(registry.QUERIES[name])
+        except Exception:
+            logger.exception("Refreshing %s failed", name)
+            failed.append(name)
+
+    load_all(*(lambda name=name: refresh(name) for name in names))
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="queries to refresh (default: all)")
+    parser.add_argument("--once", action="store_true", help="refresh once and exit instead of running the timetable")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--api-url", help="Flipside results endpoint with a {} placeholder for the query id")
+    backend.add_argument("--source", help="data source spec, e.g. fixtures:<dir> (default: UNISWAP_L2_SOURCE)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from dashboard import metrics, registry, sources
+
+    if args.source:
+        registry.source = sources.from_spec(args.source)
+    elif args.api_url:
+        registry.source = sources.FlipsideSource(args.api_url)
+    if args.once:
+        return 1 if warm_all(args.names) else 0
+    metrics.ensure_server()
+    queries = {name: registry.QUERIES[name] for name in args.names or registry.QUERIES}
+    scheduler = Scheduler(registry.cache, queries, load_intervals(queries))
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            scheduler.join(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
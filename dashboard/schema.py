@@ -0,0 +1,87 @@
+"""Compact dtypes for every registered dataset.
+
+Flipside results arrive with pandas' default dtypes: labels such as ``CHAIN``
+or ``TOKEN`` are repeated Python strings, counts are int64 and week columns
+are plain text that Plotly re-parses on every draw. ``SCHEMAS`` declares per
+query which columns are low-cardinality labels (stored as ``category``),
+which are counts (downcast to the smallest integer type that fits) and which
+are dates (parsed once). ``apply_schema`` runs at ingest, right after a
+result is parsed.
+"""
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = "category"
+COUNT = "count"
+DATETIME = "datetime"
+
+SCHEMAS = {
+    "df1": {"CHAIN": CATEGORY, "TRANSACTION_CATEGORY": CATEGORY, "NUM_WALLETS": COUNT},
+    "df2": {"CHAIN": CATEGORY},
+    "df3": {"CHAIN": CATEGORY},
+    "df4": {"DATE": DATETIME},
+    "df5": {"DATE": DATETIME},
+    "df6": {"CHAIN": CATEGORY, "CATEGORY": CATEGORY, "USER_COUNT": COUNT},
+    "df7": {"CHAIN": CATEGORY, "UNIQUE_USERS": COUNT},
+    "df8": {"UNIQUE_USERS": COUNT},
+    "df9": {"CHAIN": CATEGORY, "CATEGORY": CATEGORY, "TXN_COUNT": COUNT},
+    "df10": {"CHAIN": CATEGORY, "day": CATEGORY, "hour": COUNT},
+    "df11": {"CHAIN": CATEGORY, "POOL_NAME": CATEGORY},
+    "df12": {"CHAIN": CATEGORY, "TOKEN": CATEGORY, "UNIQUE_SWAPPERS": COUNT},
+    "df13": {"CHAIN": CATEGORY, "TOKEN": CATEGORY},
+    "df14": {"CHAIN": CATEGORY, "TOKEN": CATEGORY, "UNIQUE_SWAPPERS": COUNT},
+    "df15": {"CHAIN": CATEGORY, "TOKEN": CATEGORY},
+    "df16": {"CHAIN": CATEGORY, "LABEL_SUBTYPE": CATEGORY, "TXN_COUNT": COUNT},
+    "df17": {"CHAIN": CATEGORY, "PROJECT_NAME": CATEGORY, "TXN_COUNT": COUNT},
+    "df18": {"CHAIN": CATEGORY, "NEW_TOKENS_COUNT": COUNT},
+    "df21": {"WEEK": DATETIME, "CHAIN": CATEGORY, "DEX": CATEGORY},
+    "df22": {"WEEK": DATETIME, "CHAIN": CATEGORY, "ACTIVE_USERS": COUNT, "SWAP_COUNT": COUNT},
+    "df23": {"WEEK_START": DATETIME, "CHAIN": CATEGORY},
+    "df24": {"WEEK": DATETIME, "CHAIN": CATEGORY},
+    "df25": {"WEEK_START": DATETIME, "CHAIN": CATEGORY, "NEW_TOKENS_COUNT": COUNT},
+    "df26": {"WEEK": DATETIME, "CHAIN": CATEGORY, "NEW_USERS": COUNT},
+    "df27": {"WEEK": DATETIME, "CHAIN": CATEGORY, "ACTIVE_POOLS": COUNT},
+    "retention": {"WEEK": DATETIME, "CHAIN": CATEGORY, "WEEKS_SINCE": COUNT, "COHORT_SIZE": COUNT,
+                  "ACTIVE_USERS": COUNT},
+    "overlap": {"WEEK": DATETIME, "CHAIN": CATEGORY, "OTHER_CHAIN": CATEGORY, "ACTIVE_USERS": COUNT,
+                "SHARED_USERS": COUNT},
+}
+
+
+def _convert(column, kind):
+    if kind == CATEGORY:
+        return column.astype("category")
+    if kind == COUNT:
+        # Columns with gaps stay float; there is no NaN in an integer dtype.
+        if column.isna().any():
+            return column
+        return pd.to_numeric(column, downcast="integer")
+    if kind == DATETIME:
+        return pd.to_datetime(column)
+    raise ValueError(f"unknown column kind {kind!r}")
+
+
+def apply_schema(frame, schema):
+    """Convert ``frame``'s columns in place as declared in ``schema``.
+
+    Columns the result doesn't have are skipped, so a query whose output
+    changes shape still loads. Memory use before and after (in bytes, strings
+    counted in full) is recorded in ``frame.attrs["memory"]``.
+    """
+    before = int(frame.memory_usage(deep=True).sum())
+    for name, kind in schema.items():
+        if name not in frame.columns:
+            logger.warning("Schema column %s missing from result; leaving it out", name)
+            continue
+        try:
+            frame[name] = _convert(frame[name], kind)
+        except (TypeError, ValueError):
+            logger.warning("Could not convert column %s to %s", name, kind, exc_info=True)
+    after = int(frame.memory_usage(deep=True).sum())
+    frame.attrs["memory"] = {"before": before, "after": after}
+    logger.debug("Schema applied: %d -> %d bytes", before, after)
+    return frame
@@ -0,0 +1,340 @@
+"""Backends the registered queries can be loaded from.
+
+Every backend answers ``fetch(query, previous)`` the same way: a DataFrame
+holding the latest result, with ``attrs["version"]`` set, or ``None`` when it
+is unchanged since ``previous``. Pages and query names don't change between
+backends. The backend is chosen with ``UNISWAP_L2_SOURCE``:
+
+``flipside`` or ``flipside:<url with a {} placeholder>``
+    The Flipside results API (the default).
+``fixtures:<directory>``
+    One ``<query>.parquet`` or ``<query>.json`` (a records array, as Flipside
+    returns it) per query.
+``sqlite:<file>`` or ``duckdb:<file>``
+    One table per query.
+
+Setting ``UNISWAP_L2_SWAPS`` to a raw swap store (``dashboard.swaps``) on
+top of any of these serves the weekly chain metrics (``df22``, ``df23``,
+``df24``, ``df26``, ``df27``), the all-time summaries (``df7``, ``df8``)
+and the 30-day hourly volume grid (``df10``) from incremental local rollups
+(``dashboard.rollup``) instead, and adds the local-only cohort
+``retention`` and cross-chain ``overlap`` tables (``dashboard.cohorts``),
+kept by the same rollups.
+
+A local result is looked up under the query's Flipside id first and its
+``dfN`` name second. ``python -m dashboard.sources fixtures:./fixtures``
+copies every result from Flipside (or ``--from`` another source) into a
+local backend, so the dashboard can then run fully offline or from a mirror.
+"""
+
+import abc
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from dashboard import aggregate, swaps
+from dashboard.fetch import fetch_frame
+from dashboard.ingest import CHUNK_SIZE, read_records
+from dashboard.rollup import COHORTS, SUMMARIES, WeeklyRollup
+from dashboard.schema import SCHEMAS, apply_schema
+
+logger = logging.getLogger(__name__)
+
+FLIPSIDE_API = "https://api.flipsidecrypto.com/api/v2/queries/{}/data/latest"
+
+# Queries ``AggregateSource`` computes from the swap store.
+LOCAL = {*aggregate.AGGREGATES, *SUMMARIES, *COHORTS}
+
+
+class Source(abc.ABC):
+    # Whether results are also kept in the on-disk store (``dashboard.store``).
+    # Local backends are as fast to read as a snapshot, so they aren't.
+    persist = False
+
+    def persists(self, query):
+        return self.persist
+
+    def fetch(self, query, previous=None):
+        """The latest result of ``query`` with its schema applied, or ``None`` if unchanged."""
+        frame = self.read(query, previous)
+        if frame is not None:
+            schema = SCHEMAS.get(query.name)
+            if schema:
+                apply_schema(frame, schema)
+        return frame
+
+    @abc.abstractmethod
+    def read(self, query, previous=None):
+        """The latest result of ``query`` as read from the backend, or ``None`` if unchanged."""
+
+
+class WritableSource(Source):
+    """A source results can also be copied into (see ``main``)."""
+
+    @abc.abstractmethod
+    def write(self, query, frame):
+        """Store ``frame`` as the result of ``query``."""
+
+
+def _unchanged(version, previous):
+    return previous is not None and previous.attrs.get("version") == version
+
+
+class FlipsideSource(Source):
+    persist = True
+
+    def __init__(self, url=FLIPSIDE_API):
+        self.url = url
+
+    def read(self, query, previous=None):
+        return fetch_frame(self.url.format(query.id), previous)
+
+    def __repr__(self):
+        return f"FlipsideSource({self.url!r})"
+
+
+class FixtureSource(WritableSource):
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, query):
+        for stem in (query.id, query.name):
+            for suffix in (".parquet", ".json"):
+                path = self.directory / f"{stem}{suffix}"
+                if path.is_file():
+                    return path
+        raise FileNotFoundError(f"No fixture for {query.name} ({query.id}) in {self.directory}")
+
+    def read(self, query, previous=None):
+        path = self._path(query)
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+            version = sha256.hexdigest()
+            if _unchanged(version, previous):
+                return None
+            f.seek(0)
+            if path.suffix == ".json":
+                frame, _ = read_records(f)
+            else:
+                frame = pd.read_parquet(f)
+        frame.attrs.update(version=version, source=str(path))
+        return frame
+
+    def write(self, query, frame):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{query.id}.parquet"
+        tmp = path.with_suffix(".tmp")
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return path
+
+    def __repr__(self):
+        return f"FixtureSource({str(self.directory)!r})"
+
+
+class _DatabaseSource(WritableSource):
+    """A table per query in a local database file."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    @abc.abstractmethod
+    def connect(self):
+        """A new connection to the database file."""
+
+    @property
+    def connection(self):
+        # Connections aren't shared between the page and refresh threads.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self.connect()
+        return connection
+
+    @abc.abstractmethod
+    def tables(self):
+        """The names of the tables in the database."""
+
+    def _table(self, query):
+        tables = self.tables()
+        for name in (query.id, query.name):
+            if name in tables:
+                return name
+        raise LookupError(f"No table for {query.name} ({query.id}) in {self.path}")
+
+    @abc.abstractmethod
+    def query(self, sql):
+        """The result of ``sql`` as a DataFrame."""
+
+    def read(self, query, previous=None):
+        table = self._table(query)
+        frame = self.query(f'SELECT * FROM "{table}"')
+        version = hashlib.sha256(pd.util.hash_pandas_object(frame, index=False).values.tobytes()).hexdigest()
+        if _unchanged(version, previous):
+            return None
+        frame.attrs.update(version=version, source=f"{self.path}:{table}")
+        return frame
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+
+class SQLiteSource(_DatabaseSource):
+    def connect(self):
+        return sqlite3.connect(self.path)
+
+    def tables(self):
+        rows = self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {name for (name,) in rows}
+
+    def query(self, sql):
+        return pd.read_sql_query(sql, self.connection)
+
+    def write(self, query, frame):
+        frame.to_sql(query.id, self.connection, if_exists="replace", index=False)
+        self.connection.commit()
+
+
+class DuckDBSource(_DatabaseSource):
+    def __init__(self, path):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("The duckdb source needs the duckdb package") from None
+        super().__init__(path)
+        self._duckdb = duckdb
+
+    def connect(self):
+        return self._duckdb.connect(self.path)
+
+    def tables(self):
+        return {name for (name,) in self.connection.execute("SHOW TABLES").fetchall()}
+
+    def query(self, sql):
+        return self.connection.execute(sql).df()
+
+    def write(self, query, frame):
+        self.connection.register("result", frame)
+        try:
+            self.connection.execute(f'CREATE OR REPLACE TABLE "{query.id}" AS SELECT * FROM result')
+        finally:
+            self.connection.unregister("result")
+
+
+class AggregateSource(Source):
+    """Chain metrics rolled up from a raw swap store; ``fallback`` for the rest."""
+
+    def __init__(self, directory, fallback):
+        self.directory = Path(directory)
+        self.fallback = fallback
+        self.rollup = WeeklyRollup(directory)
+        self._lock = threading.Lock()
+        # (store version, {query name: frame}) for the last update.
+        self._computed = (None, {})
+
+    def persists(self, query):
+        return query.name not in LOCAL and self.fallback.persists(query)
+
+    def _local(self, name, version):
+        with self._lock:
+            computed_version, results = self._computed
+            if computed_version != version:
+                # One update of the rollups serves every weekly and summary query.
+                self.rollup.update()
+                results = self.rollup.tables()
+                results.update({name: table(self.rollup) for name, table in SUMMARIES.items()})
+                self._computed = (version, results)
+            if name not in results:
+                # Cohort tables are only built once asked for.
+                results[name] = COHORTS[name](self.rollup)
+            return results[name]
+
+    def read(self, query, previous=None):
+        if query.name not in LOCAL:
+            return self.fallback.read(query, previous)
+        version = swaps.version(self.directory)
+        if _unchanged(version, previous):
+            return None
+        frame = self._local(query.name, version).copy()
+        frame.attrs.update(version=version, source=f"swaps:{self.directory}")
+        return frame
+
+    def __repr__(self):
+        return f"AggregateSource({str(self.directory)!r}, {self.fallback!r})"
+
+
+BACKENDS = {
+    "flipside": FlipsideSource,
+    "fixtures": FixtureSource,
+    "sqlite": SQLiteSource,
+    "duckdb": DuckDBSource,
+}
+
+
+def from_spec(spec):
+    """Build a source from a ``kind[:location]`` string such as ``sqlite:mirror.db``."""
+    kind, _, location = spec.partition(":")
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown data source {kind!r}; expected one of {', '.join(BACKENDS)}")
+    if not location:
+        if kind != "flipside":
+            raise ValueError(f"The {kind} source needs a location, e.g. {kind}:<path>")
+        return FlipsideSource()
+    return BACKENDS[kind](location)
+
+
+def from_environment():
+    """The source named by ``UNISWAP_L2_SOURCE``, defaulting to Flipside.
+
+    ``FLIPSIDE_API_URL`` still overrides the Flipside endpoint, and
+    ``UNISWAP_L2_SWAPS`` adds the locally computed weekly metrics.
+    """
+    spec = os.environ.get("UNISWAP_L2_SOURCE")
+    if spec:
+        source = from_spec(spec)
+    else:
+        source = FlipsideSource(os.environ.get("FLIPSIDE_API_URL", FLIPSIDE_API))
+    swaps_dir = os.environ.get("UNISWAP_L2_SWAPS")
+    if swaps_dir:
+        source = AggregateSource(swaps_dir, source)
+    return source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy query results into a local data source.")
+    parser.add_argument("destination", help="fixtures:<dir>, sqlite:<file> or duckdb:<file>")
+    parser.add_argument("names", nargs="*", help="queries to copy (default: all)")
+    parser.add_argument("--from", dest="origin", help="source to copy from (default: UNISWAP_L2_SOURCE or Flipside)")
+    args = parser.parse_intermixed_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from dashboard.registry import QUERIES
+
+    origin = from_spec(args.origin) if args.origin else from_environment()
+    destination = from_spec(args.destination)
+    if not isinstance(destination, WritableSource):
+        parser.error(f"can't copy into {destination!r}; it is read-only")
+    failed = []
+    for name in args.names or QUERIES:
+        query = QUERIES[name]
+        try:
+            # Copy the raw result; the schema is applied again on every load.
+            destination.write(query, origin.read(query))
+        except Exception:
+            logger.exception("Copying %s failed", name)
+            failed.append(name)
+        else:
+            logger.info("Copied %s (%s)", name, query.id)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,60 @@
+"""On-disk Parquet copies of query results, so a restarted server starts warm.
+
+Each result is written to ``<CACHE_DIR>/<query id>/<fetch time>.parquet``.
+Only the newest few snapshots per query are kept.
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get(
+    "UNISWAP_L2_CACHE_DIR",
+    Path(__file__).resolve().parent.parent / ".cache" / "queries",
+))
+
+# Snapshots kept per query; older ones are deleted after each write.
+KEEP = 3
+
+
+def _snapshots(query_id):
+    """Snapshot paths for ``query_id``, newest first."""
+    folder = CACHE_DIR / query_id
+    if not folder.is_dir():
+        return []
+    return sorted(folder.glob("*.parquet"), key=lambda p: int(p.stem), reverse=True)
+
+
+def write(query_id, frame, fetched_at=None):
+    """Persist ``frame`` as the latest snapshot of ``query_id`` and return its path."""
+    fetched_at = int(fetched_at if fetched_at is not None else time.time())
+    folder = CACHE_DIR / query_id
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"{fetched_at}.parquet"
+    tmp = path.with_suffix(".tmp")
+    try:
+        frame.to_parquet(tmp, index=False)
+    except Exception:
+        # Results Arrow can't type (e.g. mixed-type columns) stay memory-only.
+        logger.warning("Could not persist query %s to %s", query_id, folder, exc_info=True)
+        tmp.unlink(missing_ok=True)
+        return None
+    os.replace(tmp, path)
+    for old in _snapshots(query_id)[KEEP:]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def read_latest(query_id):
+    """Return ``(frame, fetched_at)`` for the newest snapshot, or ``None`` if there is none."""
+    for path in _snapshots(query_id):
+        try:
+            return pd.read_parquet(path), int(path.stem)
+        except Exception:
+            logger.warning("Skipping unreadable snapshot %s", path, exc_info=True)
+    return None
@@ -0,0 +1,134 @@
+"""Local store of raw Uniswap V3 swap events.
+
+Swaps are kept as Parquet files under one directory, partitioned by chain
+(``<directory>/CHAIN=<chain>/<part>.parquet``), with the columns below.
+``append`` adds a batch as new part files; ``read`` loads the store, or
+some chains and columns of it, with the label columns as ``category`` so
+group-bys work on integer codes straight away. ``dashboard.aggregate``
+computes the dashboard's weekly metrics from it.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+CHAIN = "CHAIN"
+BLOCK_TIMESTAMP = "BLOCK_TIMESTAMP"
+POOL = "POOL"
+SENDER = "SENDER"
+AMOUNT_USD = "AMOUNT_USD"
+GAS_USD = "GAS_USD"
+
+COLUMNS = {
+    CHAIN: "category",
+    BLOCK_TIMESTAMP: "datetime64[us]",
+    POOL: "category",
+    SENDER: "category",
+    AMOUNT_USD: "float64",
+    GAS_USD: "float64",
+}
+
+# Read as dictionary-encoded columns, i.e. ``category``.
+LABELS = [POOL, SENDER]
+
+# Given when reading the whole store: a part file with no swaps has no type
+# for its label columns, and would otherwise set them to null for every part.
+_SCHEMA = pa.schema([
+    (BLOCK_TIMESTAMP, pa.timestamp("us")),
+    (POOL, pa.dictionary(pa.int32(), pa.string())),
+    (SENDER, pa.dictionary(pa.int32(), pa.string())),
+    (AMOUNT_USD, pa.float64()),
+    (GAS_USD, pa.float64()),
+    (CHAIN, pa.string()),
+])
+
+
+def _parts(directory):
+    return sorted(Path(directory).glob(f"{CHAIN}=*/*.parquet"))
+
+
+def parts(directory, chain):
+    """Part files of ``chain``, oldest first (names are write times)."""
+    return sorted((Path(directory) / f"{CHAIN}={chain}").glob("*.parquet"))
+
+
+def version(directory):
+    """A token that changes whenever a part file is added, replaced or removed."""
+    digest = hashlib.sha256()
+    for path in _parts(directory):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(directory)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def chains(directory):
+    """The chains with at least one part file."""
+    return sorted({path.parent.name.partition("=")[2] for path in _parts(directory)})
+
+
+def read(directory, columns=None, chains=None):
+    """Load swaps from ``directory``, optionally only some ``columns`` and ``chains``."""
+    if not _parts(directory):
+        return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in COLUMNS.items()
+                             if columns is None or name in columns})
+    filters = [(CHAIN, "in", list(chains))] if chains is not None else None
+    frame = pd.read_parquet(
+        directory,
+        columns=None if columns is None else list(columns),
+        filters=filters,
+        schema=_SCHEMA,
+    )
+    if CHAIN in frame.columns:
+        frame[CHAIN] = frame[CHAIN].astype(str).astype("category")
+    return frame
+
+
+def read_parts(paths, chain, columns=None):
+    """Load the given part files of ``chain``, like ``read`` does for a whole store."""
+    names = [name for name in (columns or COLUMNS) if name != CHAIN]
+    if paths:
+        frame = pd.concat(
+            [pd.read_parquet(path, columns=names, read_dictionary=[n for n in LABELS if n in names])
+             for path in paths],
+            ignore_index=True,
+        )
+        # Part files can have different dictionaries; unify them.
+        for name in LABELS:
+            if name in frame.columns and not isinstance(frame[name].dtype, pd.CategoricalDtype):
+                frame[name] = frame[name].astype("category")
+    else:
+        frame = pd.DataFrame({name: pd.Series(dtype=COLUMNS[name]) for name in names})
+    if columns is None or CHAIN in columns:
+        frame.insert(0, CHAIN, pd.Categorical([chain] * len(frame)))
+    return frame
+
+
+def compact(frame):
+    """``frame`` with unused labels dropped, so Parquet dictionaries hold only what is used."""
+    frame = frame.copy(deep=False)
+    for name in LABELS:
+        if name in frame.columns and isinstance(frame[name].dtype, pd.CategoricalDtype):
+            frame[name] = frame[name].cat.remove_unused_categories()
+    return frame
+
+
+def append(directory, frame):
+    """Add ``frame``'s swaps to the store as one new part file per chain."""
+    missing = set(COLUMNS) - set(frame.columns)
+    if missing:
+        raise ValueError(f"swaps are missing columns: {', '.join(sorted(missing))}")
+    paths = []
+    stamp = time.time_ns()
+    for chain, part in frame.groupby(CHAIN, observed=True, sort=False):
+        folder = Path(directory) / f"{CHAIN}={chain}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{stamp}.parquet"
+        tmp = path.with_suffix(".tmp")
+        compact(part.drop(columns=CHAIN)).to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        paths.append(path)
+    return paths
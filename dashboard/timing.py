@@ -0,0 +1,57 @@
+"""Cumulative wall time per stage of page rendering.
+
+The loaders, transforms and figure builders report into named stages here
+(``load``, ``transform``, ``figures``) so a benchmark can break a page run
+down without a profiler. Stages nest: ``load`` includes the derived columns
+added while a dataset is loaded for the first time. Recording costs two
+``perf_counter`` calls and a lock per timed call.
+"""
+
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from dashboard import metrics
+
+_lock = threading.Lock()
+_seconds = defaultdict(float)
+_calls = defaultdict(int)
+
+
+@contextmanager
+def timed(stage):
+    """Add the wall time of the ``with`` block to ``stage``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _seconds[stage] += elapsed
+            _calls[stage] += 1
+        metrics.stage_seconds.observe(elapsed, stage=stage)
+
+
+def timed_function(stage):
+    """Decorator form of ``timed``."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def totals():
+    """``{stage: {"seconds": ..., "calls": ...}}`` recorded since the last ``reset``."""
+    with _lock:
+        return {stage: {"seconds": _seconds[stage], "calls": _calls[stage]} for stage in _seconds}
+
+
+def reset():
+    with _lock:
+        _seconds.clear()
+        _calls.clear()
@@ -0,0 +1,223 @@
+"""Dense integer ids for wallet addresses.
+
+Wallet addresses are 42-character strings, over 90 bytes each as Python
+objects and slow to hash. ``WalletIds`` gives every address it sees a
+dense ``int32`` id, in the order they arrive, so sets of wallets can be
+kept and compared as integer arrays. The ids are shared by all chains (an
+address is the same wallet on every EVM chain), so per-chain sets can be
+intersected.
+
+The address bytes are kept in id order in ``keys.bin``, which new addresses
+are only ever appended to, and memory-mapped on load. They are found by a
+64-bit hash of each address, a few multiply-xor passes over its bytes, in
+an index of (hash, id) pairs sorted by hash: a batch is hashed, looked up
+with one ``searchsorted`` per index segment and checked against the stored
+bytes without a Python loop. Each intern writes its new addresses' pairs as
+a new segment and merges it into the ones before it while they are at most
+``MERGE_RATIO`` times its size, so there are only a few segments and an
+address is rewritten a few times over the life of the dictionary, not on
+every intern. ``state.json``, giving the number of addresses and naming the
+segments, is replaced last. Several processes can share a folder (the
+dashboard and ``python -m dashboard.rollup``, say): interning holds an
+exclusive ``fcntl`` lock on it and re-reads ``state.json`` under the lock
+before giving out ids, and loading holds a shared one.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads are kept apart.
+    fcntl = None
+
+# Bytes per address: "0x" and 40 hex digits.
+WIDTH = 42
+KEY = np.dtype(f"S{WIDTH}")
+INDEX = np.dtype([("hash", np.uint64), ("id", np.int32)])
+# A new index segment is merged into the one before it while that one has
+# at most this many times its entries.
+MERGE_RATIO = 4
+
+_WORDS = -(-WIDTH // 8)
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _keys(addresses):
+    """``addresses`` as fixed-width byte strings."""
+    addresses = np.asarray(pd.Index(addresses, dtype=object), dtype=object)
+    # One spare byte shows which addresses are too long.
+    wide = addresses.astype(f"S{WIDTH + 1}")
+    if len(wide) and wide.view(np.uint8).reshape(len(wide), WIDTH + 1)[:, WIDTH].any():
+        raise ValueError(f"wallet addresses are at most {WIDTH} characters")
+    return wide.astype(KEY)
+
+
+def _hash(keys):
+    words = np.zeros((len(keys), _WORDS * 8), dtype=np.uint8)
+    words[:, :WIDTH] = keys.view(np.uint8).reshape(len(keys), WIDTH)
+    words = words.view(np.uint64)
+    hashes = np.zeros(len(keys), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for column in range(_WORDS):
+            hashes = (hashes ^ words[:, column]) * _MULTIPLIER
+            hashes ^= hashes >> np.uint64(29)
+    return hashes
+
+
+def _distinct(keys, hashes):
+    """The distinct ``keys`` and their hashes, in order of first appearance."""
+    codes, _ = pd.factorize(hashes)
+    _, first = np.unique(codes, return_index=True)
+    if (keys == keys[first[codes]]).all():
+        return keys[first], hashes[first]
+    # Different addresses with the same hash: fall back to comparing bytes.
+    _, first = np.unique(keys, return_index=True)
+    first.sort()
+    return keys[first], hashes[first]
+
+
+def _index(hashes, ids):
+    """An index segment of ``hashes`` and their ``ids``, sorted by hash."""
+    order = np.argsort(hashes, kind="stable")
+    index = np.empty(len(order), dtype=INDEX)
+    index["hash"], index["id"] = hashes[order], ids[order]
+    return index
+
+
+class WalletIds:
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self._lock = threading.Lock()
+        # The state.json the dictionary was loaded from, and the dictionary:
+        # the keys by id, the index segments and their file names.
+        self._state = None
+        self._arrays = None
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """Hold the folder's file lock, shared or ``exclusive``, across processes."""
+        if fcntl is None:
+            yield
+            return
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with open(self.folder / "lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _open(self, state):
+        if state is None:
+            return np.zeros(0, KEY), [], []
+        count = state["count"]
+        keys = (np.memmap(self.folder / "keys.bin", dtype=KEY, mode="r", shape=(count,))
+                if count else np.zeros(0, KEY))
+        segments = [np.load(self.folder / name, mmap_mode="r") for name in state["segments"]]
+        return keys, segments, list(state["segments"])
+
+    def _read(self):
+        """The dictionary ``state.json`` describes, reloaded if it changed; the caller holds the file lock."""
+        path = self.folder / "state.json"
+        state = path.read_text() if path.is_file() else None
+        if self._arrays is None or state != self._state:
+            self._arrays = self._open(json.loads(state) if state is not None else None)
+            self._state = state
+        return self._arrays
+
+    def _load(self):
+        """The current dictionary, reloaded if another process has changed it."""
+        path = self.folder / "state.json"
+        if self._arrays is not None and (path.read_text() if path.is_file() else None) == self._state:
+            return self._arrays
+        # The segments a replaced state.json named are deleted under the lock.
+        with self._locked(exclusive=False):
+            return self._read()
+
+    def __len__(self):
+        return len(self._load()[0])
+
+    def _find(self, keys, hashes, arrays):
+        stored_keys, segments, _ = arrays
+        ids = np.full(len(keys), -1, dtype=np.int32)
+        # Sorted needles walk the stored hashes in order, which is several
+        # times faster than random probes on a large dictionary.
+        order = np.argsort(hashes)
+        for index in segments:
+            pending = order[ids[order] < 0]
+            if not len(pending):
+                break
+            stored_hashes, stored_ids = index["hash"], index["id"]
+            at = np.searchsorted(stored_hashes, hashes[pending])
+            # Addresses whose hash collides with another's take one more round
+            # per colliding address stored before theirs.
+            while len(pending):
+                inside = at < len(stored_hashes)
+                pending, at = pending[inside], at[inside]
+                same = stored_hashes[at] == hashes[pending]
+                pending, at = pending[same], at[same]
+                match = stored_keys[stored_ids[at]] == keys[pending]
+                ids[pending[match]] = stored_ids[at[match]]
+                pending, at = pending[~match], at[~match] + 1
+        return ids
+
+    def lookup(self, addresses):
+        """The id of each address, ``-1`` for addresses not interned yet."""
+        keys = _keys(addresses)
+        return self._find(keys, _hash(keys), self._load())
+
+    def intern(self, addresses):
+        """The id of each address, giving new addresses the next free ids."""
+        keys = _keys(addresses)
+        hashes = _hash(keys)
+        with self._lock, self._locked(exclusive=True):
+            # Another process may have added addresses since the last load.
+            arrays = self._read()
+            ids = self._find(keys, hashes, arrays)
+            missing = ids < 0
+            if missing.any():
+                new_keys, new_hashes = _distinct(keys[missing], hashes[missing])
+                count = len(arrays[0])
+                new_ids = np.arange(count, count + len(new_keys), dtype=np.int32)
+                self._save(arrays, new_keys, _index(new_hashes, new_ids))
+                ids[missing] = self._find(keys[missing], hashes[missing], self._read())
+        return ids
+
+    def codes(self, column):
+        """Ids for a ``category`` column of addresses, interning each category once."""
+        ids = self.intern(column.cat.categories)
+        codes = column.cat.codes.to_numpy()
+        return np.where(codes >= 0, ids[codes], -1).astype(np.int32)
+
+    def addresses(self, ids):
+        """The addresses of ``ids``."""
+        return self._load()[0][np.asarray(ids)].astype(str)
+
+    def _save(self, arrays, new_keys, segment):
+        keys, segments, names = arrays
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with open(self.folder / "keys.bin", "ab") as file:
+            # Anything past the saved keys is from an intern that did not finish.
+            file.truncate(len(keys) * WIDTH)
+            file.write(new_keys.tobytes())
+        segments, names = [*segments, segment], [*names, None]
+        while len(segments) > 1 and len(segments[-2]) <= MERGE_RATIO * len(segments[-1]):
+            merged = np.concatenate(segments[-2:])
+            segments[-2:] = [merged[np.argsort(merged["hash"], kind="stable")]]
+            names[-2:] = [None]
+        stamp = time.time_ns()
+        for i, name in enumerate(names):
+            if name is None:
+                names[i] = f"index-{stamp}-{i}.npy"
+                np.save(self.folder / names[i], segments[i])
+        tmp = self.folder / "state.json.tmp"
+        tmp.write_text(json.dumps({"count": len(keys) + len(new_keys), "segments": names}))
+        os.replace(tmp, self.folder / "state.json")
+        for path in self.folder.glob("*.npy"):
+            if path.name not in names:
+                path.unlink(missing_ok=True)
@@ -5,6 +5,10 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from millify import millify
 from streamlit_extras.colored_header import colored_header
+from dashboard import cohorts
+from dashboard.figures import cached_figures
+from dashboard.registry import QUERIES, has_swaps, load_datasets
+from dashboard.transforms import CHAINS, partition
 
 # st.cache_data.clear()
 
@@ -47,164 +51,202 @@ st.info("This page dissects user retention rates and growth patterns across Unis
 
 ############################# cache datasets ########################################
 
-url1 = "https://flipsidecrypto.xyz/edit/queries/9eb769df-c80d-40af-81e9-2a9f3d00d95f"
-@st.cache_data
-def load_df1():
-    df1 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url1.split('/')[-1]}/data/latest")
-    return df1
-
-url6 = "https://flipsidecrypto.xyz/edit/queries/ddca2c5e-2626-4303-bb77-3b7a44152587"
-@st.cache_data
-def load_df6():
-    df6 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url6.split('/')[-1]}/data/latest")
-    return df6
-
-url16 = "https://flipsidecrypto.xyz/edit/queries/510159c8-01fb-4cfb-8945-532f510bc75c"
-@st.cache_data
-def load_df16():
-    df16 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url16.split('/')[-1]}/data/latest")
-    return df16
-
-url17 = "https://flipsidecrypto.xyz/edit/queries/87050e70-1b02-4012-973d-6524766ce87b"
-@st.cache_data
-def load_df17():
-    df17 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url17.split('/')[-1]}/data/latest")
-    return df17
-
-url26 = "https://flipsidecrypto.xyz/edit/queries/fddcceb6-6ee6-4220-8e6f-7b14cf8db853"
-@st.cache_data
-def load_df26():
-    df26 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url26.split('/')[-1]}/data/latest")
-    return df26
+url1 = QUERIES["df1"].url
+url6 = QUERIES["df6"].url
+url16 = QUERIES["df16"].url
+url17 = QUERIES["df17"].url
+url26 = QUERIES["df26"].url
+url22 = QUERIES["df22"].url
 
 ############################### load datasets ###########################################
 
-df1 = load_df1()
-df6 = load_df6()
-df16 = load_df16()
-df17 = load_df17()
-df26 = load_df26()
+df1, df6, df16, df17, df26, df22 = load_datasets("df1", "df6", "df16", "df17", "df26", "df22")
 
 ################################   charts   ##############################################
 
 
 ###############################___________________DF1_____________________#############################
 
-df1['PERCENTAGE'] = df1.groupby('CHAIN')['NUM_WALLETS'].transform(lambda x: x / x.sum() * 100)
+@cached_figures
+def df1_figures(df1):
+    df1_fig1 = px.bar(df1, x='CHAIN', y='PERCENTAGE', color='TRANSACTION_CATEGORY',
+                 labels={'PERCENTAGE': 'Percentage of Total Wallets'},
+                 custom_data=['NUM_WALLETS'], 
+                 title='Repeating Uniswap Users')
 
-df1_fig1 = px.bar(df1, x='CHAIN', y='PERCENTAGE', color='TRANSACTION_CATEGORY',
-             labels={'PERCENTAGE': 'Percentage of Total Wallets'},
-             custom_data=['NUM_WALLETS'], 
-             title='Repeating Uniswap Users')
+    df1_fig1.update_layout(xaxis_title='Chain',
+                      yaxis_title='Percentage')
+    df1_fig1.update_traces(hovertemplate='%{y:.2f}%<br>Number of Wallets: %{customdata[0]:,.0f}')
+    df1_fig1.update_layout(hovermode="x unified")
+    df1_fig1.update_layout(legend_title="User Category")
+    return df1_fig1
 
-df1_fig1.update_layout(xaxis_title='Chain',
-                  yaxis_title='Percentage')
-df1_fig1.update_traces(hovertemplate='%{y:.2f}%<br>Number of Wallets: %{customdata[0]:,.0f}')
-df1_fig1.update_layout(hovermode="x unified")
-df1_fig1.update_layout(legend_title="User Category")
+df1_fig1 = df1_figures(df1)
 
 ###############################___________________DF6_____________________#############################
 
-df_retail = df6[df6['CATEGORY'] == 'Retail User']
-df_whale = df6[df6['CATEGORY'] == 'Whale']
-
-# Bar chart for Retail Users count
-df6_fig1 = px.bar(df_retail, x='CHAIN', y='USER_COUNT', color='CHAIN',
-                    title='Retail Users Count',
-                    labels={'USER_COUNT': 'User Count'})
-df6_fig1.update_layout(hovermode="x unified")
-
-# Bar chart for Whales count
-df6_fig2 = px.bar(df_whale, x='CHAIN', y='USER_COUNT', color='CHAIN',
-                   title='Whales Count [Logarithmic Scale]',
-                   log_y=True,
-                   labels={'USER_COUNT': 'User Count'})
-df6_fig2.update_layout(hovermode="x unified")
-
-# Bar chart for Retail Users txn per user
-df6_fig3 = px.bar(df_retail, x='CHAIN', y='TXN_PER_USER', color='CHAIN',
-                    title='Transactions per Retail User',
-                    labels={'TXN_PER_USER': 'Transactions per User'})
-df6_fig3.update_layout(hovermode="x unified")
-
-# Bar chart for Whales txn per user
-df6_fig4 = px.bar(df_whale, x='CHAIN', y='TXN_PER_USER', color='CHAIN',
-                   title='Transactions per Whale',
-                   labels={'TXN_PER_USER': 'Transactions per User'})
-df6_fig4.update_layout(hovermode="x unified")
-
-# Bar chart for Retail Users avg swap size
-df6_fig5 = px.bar(df_retail, x='CHAIN', y='AVG_SWAP_SIZE', color='CHAIN',
-                    title='Retail Users Average Swap Amount ($)',
-                    labels={'AVG_SWAP_SIZE': 'Average Swap Amount'})
-df6_fig5.update_layout(
-    xaxis_title="CHAIN", yaxis_title="AVG_SWAP_AMOUNT")
-df6_fig5.update_layout(hovermode="x unified")
-
-# Bar chart for Whales avg swap size
-df6_fig6 = px.bar(df_whale, x='CHAIN', y='AVG_SWAP_SIZE', color='CHAIN',
-                   title='Whales Average Swap Amount ($)',
-                   labels={'AVG_SWAP_SIZE': 'Average Swap Amount'})
-df6_fig6.update_layout(
-    xaxis_title="CHAIN", yaxis_title="AVG_SWAP_AMOUNT")
-df6_fig6.update_layout(hovermode="x unified")
+@cached_figures
+def df6_figures(df6):
+    df_retail = df6[df6['CATEGORY'] == 'Retail User']
+    df_whale = df6[df6['CATEGORY'] == 'Whale']
+
+    # Bar chart for Retail Users count
+    df6_fig1 = px.bar(df_retail, x='CHAIN', y='USER_COUNT', color='CHAIN',
+                        title='Retail Users Count',
+                        labels={'USER_COUNT': 'User Count'})
+    df6_fig1.update_layout(hovermode="x unified")
+
+    # Bar chart for Whales count
+    df6_fig2 = px.bar(df_whale, x='CHAIN', y='USER_COUNT', color='CHAIN',
+                       title='Whales Count [Logarithmic Scale]',
+                       log_y=True,
+                       labels={'USER_COUNT': 'User Count'})
+    df6_fig2.update_layout(hovermode="x unified")
+
+    # Bar chart for Retail Users txn per user
+    df6_fig3 = px.bar(df_retail, x='CHAIN', y='TXN_PER_USER', color='CHAIN',
+                        title='Transactions per Retail User',
+                        labels={'TXN_PER_USER': 'Transactions per User'})
+    df6_fig3.update_layout(hovermode="x unified")
+
+    # Bar chart for Whales txn per user
+    df6_fig4 = px.bar(df_whale, x='CHAIN', y='TXN_PER_USER', color='CHAIN',
+                       title='Transactions per Whale',
+                       labels={'TXN_PER_USER': 'Transactions per User'})
+    df6_fig4.update_layout(hovermode="x unified")
+
+    # Bar chart for Retail Users avg swap size
+    df6_fig5 = px.bar(df_retail, x='CHAIN', y='AVG_SWAP_SIZE', color='CHAIN',
+                        title='Retail Users Average Swap Amount ($)',
+                        labels={'AVG_SWAP_SIZE': 'Average Swap Amount'})
+    df6_fig5.update_layout(
+        xaxis_title="CHAIN", yaxis_title="AVG_SWAP_AMOUNT")
+    df6_fig5.update_layout(hovermode="x unified")
+
+    # Bar chart for Whales avg swap size
+    df6_fig6 = px.bar(df_whale, x='CHAIN', y='AVG_SWAP_SIZE', color='CHAIN',
+                       title='Whales Average Swap Amount ($)',
+                       labels={'AVG_SWAP_SIZE': 'Average Swap Amount'})
+    df6_fig6.update_layout(
+        xaxis_title="CHAIN", yaxis_title="AVG_SWAP_AMOUNT")
+    df6_fig6.update_layout(hovermode="x unified")
+    return df6_fig1, df6_fig2, df6_fig3, df6_fig4, df6_fig5, df6_fig6
+
+df6_fig1, df6_fig2, df6_fig3, df6_fig4, df6_fig5, df6_fig6 = df6_figures(df6)
 
 ###############################___________________DF16_____________________#############################
 
-df16_fig1 = px.histogram(df16,
-                   x="CHAIN",
-                   y="TXN_COUNT",
-                   color="LABEL_SUBTYPE",
-                   title="Top 5 Contract Types Used By Uniswap Users per Chain [Logarithmic Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Dark24)
-df16_fig1.update_layout(
-    xaxis_title="CHAIN",
-    yaxis_title="TXN_COUNT",
-    legend_title="Contract Type")
-
-df16_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df16_figures(df16):
+    df16_fig1 = px.histogram(df16,
+                       x="CHAIN",
+                       y="TXN_COUNT",
+                       color="LABEL_SUBTYPE",
+                       title="Top 5 Contract Types Used By Uniswap Users per Chain [Logarithmic Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Dark24)
+    df16_fig1.update_layout(
+        xaxis_title="CHAIN",
+        yaxis_title="TXN_COUNT",
+        legend_title="Contract Type")
+
+    df16_fig1.update_layout(hovermode="x unified")
+    return df16_fig1
+
+df16_fig1 = df16_figures(df16)
 
 ###############################___________________DF17_____________________#############################
 
-df17_fig1 = px.histogram(df17,
-                   x="CHAIN",
-                   y="TXN_COUNT",
-                   color="PROJECT_NAME",
-                   title="Top 5 Projects Used By Uniswap Users per Chain [Logarithmic Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Dark24)
-df17_fig1.update_layout(
-    xaxis_title="CHAIN",
-    yaxis_title="TXN_COUNT",
-    legend_title="Project Name")
-df17_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df17_figures(df17):
+    df17_fig1 = px.histogram(df17,
+                       x="CHAIN",
+                       y="TXN_COUNT",
+                       color="PROJECT_NAME",
+                       title="Top 5 Projects Used By Uniswap Users per Chain [Logarithmic Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Dark24)
+    df17_fig1.update_layout(
+        xaxis_title="CHAIN",
+        yaxis_title="TXN_COUNT",
+        legend_title="Project Name")
+    df17_fig1.update_layout(hovermode="x unified")
+    return df17_fig1
+
+df17_fig1 = df17_figures(df17)
 
 ##########################___________________DF26_____________________######################
-df26_fig1 = px.line(df26,
-              x="WEEK",
-              y="NEW_USERS",
-              color="CHAIN",
-              title="Weekly New Users On Uniswap")
-df26_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df26_figures(df26):
+    df26_fig1 = px.line(df26,
+                  x="WEEK",
+                  y="NEW_USERS",
+                  color="CHAIN",
+                  title="Weekly New Users On Uniswap")
+    df26_fig1.update_layout(hovermode="x unified")
+    return df26_fig1
+
+df26_fig1 = df26_figures(df26)
 
 ############################################ ADDED ############################################
 
-url22 = "https://flipsidecrypto.xyz/edit/queries/95beab6d-99e4-4133-ae87-f3f000c46258"
-@st.cache_data
-def load_df22():
-    df22 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url22.split('/')[-1]}/data/latest")
-    return df22
-
-df22 = load_df22()
-
-df22_fig3 = px.line(df22,
-              x="WEEK",
-              y="TXN_PER_USER",
-              color="CHAIN",
-              title="Weekly Uniswap Transactions per User")
-df22_fig3.update_layout(hovermode="x unified")
-
+@cached_figures
+def df22_figures(df22):
+    df22_fig3 = px.line(df22,
+                  x="WEEK",
+                  y="TXN_PER_USER",
+                  color="CHAIN",
+                  title="Weekly Uniswap Transactions per User")
+    df22_fig3.update_layout(hovermode="x unified")
+    return df22_fig3
+
+df22_fig3 = df22_figures(df22)
+
+##########################___________________RETENTION_____________________######################
+# Cohort retention and cross-chain overlap are computed from the local swap store (UNISWAP_L2_SWAPS) only.
+
+@cached_figures
+def retention_figures(retention):
+    retention_curves = cohorts.curves(retention)
+    retention_fig1 = px.line(retention_curves,
+                  x="WEEKS_SINCE",
+                  y="RETENTION",
+                  color="CHAIN",
+                  custom_data=['ACTIVE_USERS', 'COHORT_SIZE'],
+                  labels={'WEEKS_SINCE': 'Weeks Since First Swap', 'RETENTION': 'Retention (%)'},
+                  title="Weekly Retention by Chain, All Cohorts")
+    retention_fig1.update_traces(hovertemplate='%{y:.2f}%<br>%{customdata[0]:,.0f} of %{customdata[1]:,.0f} wallets')
+    retention_fig1.update_layout(hovermode="x unified")
+    return retention_fig1
+
+@cached_figures
+def retention_heatmap(retention_chain, chain):
+    grid = retention_chain.pivot(index='WEEK', columns='WEEKS_SINCE', values='RETENTION')
+    retention_fig2 = px.imshow(grid.iloc[:, 1:],
+                  labels={'x': 'Weeks Since First Swap', 'y': 'Cohort (First Swap Week)', 'color': 'Retention (%)'},
+                  color_continuous_scale='Blues',
+                  aspect='auto',
+                  title=f"Weekly Cohort Retention on {chain}")
+    return retention_fig2
+
+@cached_figures
+def overlap_figure(overlap_chain, chain):
+    overlap_fig = px.line(overlap_chain,
+                  x="WEEK",
+                  y="SHARE",
+                  color="OTHER_CHAIN",
+                  custom_data=['SHARED_USERS', 'ACTIVE_USERS'],
+                  labels={'SHARE': f'Share of {chain} Users (%)', 'OTHER_CHAIN': 'Also Active On'},
+                  title=f"Weekly {chain} Users Also Swapping on Other Chains")
+    overlap_fig.update_traces(hovertemplate='%{y:.2f}%<br>%{customdata[0]:,.0f} of %{customdata[1]:,.0f} wallets')
+    overlap_fig.update_layout(hovermode="x unified")
+    return overlap_fig
+
+if has_swaps():
+    retention, overlap = load_datasets("retention", "overlap")
+    retention_fig1 = retention_figures(retention)
+    retention_chains = partition(retention)
+    overlap_chains = partition(overlap)
 
 #################################################### LAYOUT ##############################################
 
@@ -219,6 +261,19 @@ with col_1b:
     st.plotly_chart(df1_fig1, theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url1}")
 
+if has_swaps():
+    st.plotly_chart(retention_fig1, theme="streamlit", use_container_width=True)
+    retention_chain = st.radio("Chain", CHAINS, horizontal=True, key="retention_chain")
+    # The heatmap starts at week 1, so a chain needs swaps in two weeks before there is one.
+    if (retention_chains[retention_chain]['WEEKS_SINCE'] > 0).any():
+        st.plotly_chart(retention_heatmap(retention_chains[retention_chain], retention_chain),
+                        theme="streamlit", use_container_width=True)
+    else:
+        st.info(f"Not enough swaps on {retention_chain} yet for a cohort retention heatmap.", icon="ℹ️")
+    overlap_chain = st.radio("Chain", CHAINS, horizontal=True, key="overlap_chain")
+    st.plotly_chart(overlap_figure(overlap_chains[overlap_chain], overlap_chain),
+                    theme="streamlit", use_container_width=True)
+
 st.info("Users with an average swap amount of less than 100,000 USD are classified as 'Retail Users', while those with 100,000 USD or more are 'Whales'.", icon="ℹ️")
 
 col_2a, col_2b = st.columns(2)
@@ -5,6 +5,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from millify import millify
 from streamlit_extras.colored_header import colored_header
+from dashboard.figures import cached_figures
+from dashboard.registry import QUERIES, load_datasets
+from dashboard.transforms import partition
 
 # st.cache_data.clear()
 
@@ -48,50 +51,16 @@ st.info("This page delves into user trading patterns on Uniswap across Layer 2s,
 
 ############################# cache datasets ########################################
 
-url4 = "https://flipsidecrypto.xyz/edit/queries/d66c80a7-ce8f-419e-ad7d-9319c543f30a"
-@st.cache_data
-def load_df4():
-    df4 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url4.split('/')[-1]}/data/latest")
-    return df4
-
-url5 = "https://flipsidecrypto.xyz/edit/queries/ada13e9c-7e25-4618-9f24-9e27c6b09c1a"
-@st.cache_data
-def load_df5():
-    df5 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url5.split('/')[-1]}/data/latest")
-    return df5
-
-url10 = "https://flipsidecrypto.xyz/edit/queries/29687135-0e8f-47af-a84b-2b148fee1db9"
-@st.cache_data
-def load_df10():
-    df10 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url10.split('/')[-1]}/data/latest")
-    return df10
-
-url9 = "https://flipsidecrypto.xyz/edit/queries/8e4b199c-1f8e-42be-bbfb-3829be128ede"
-@st.cache_data
-def load_df9():
-    df9 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url9.split('/')[-1]}/data/latest")
-    return df9
-
-url21 = "https://flipsidecrypto.xyz/edit/queries/c61e84bf-7ef2-49bf-b5fe-4211c3d19777"
-@st.cache_data
-def load_df21():
-    df21 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url21.split('/')[-1]}/data/latest")
-    return df21
-
-url23 = "https://flipsidecrypto.xyz/edit/queries/c3097631-5447-419e-97b6-577886c02600"
-@st.cache_data
-def load_df23():
-    df23 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url23.split('/')[-1]}/data/latest")
-    return df23
+url4 = QUERIES["df4"].url
+url5 = QUERIES["df5"].url
+url10 = QUERIES["df10"].url
+url9 = QUERIES["df9"].url
+url21 = QUERIES["df21"].url
+url23 = QUERIES["df23"].url
 
 ############################### load datasets ###########################################
 
-df4 = load_df4()
-df5 = load_df5()
-df10 = load_df10()
-df9 = load_df9()
-df21 = load_df21()
-df23 = load_df23()
+df4, df5, df10, df9, df21, df23 = load_datasets("df4", "df5", "df10", "df9", "df21", "df23")
 
 ################################   charts   ##############################################
 
@@ -121,97 +90,16 @@ rename_dict = {
 }
 df5.rename(columns=rename_dict, inplace=True)
 
-##########################___________________DF10_____________________######################
-
-df10_1 = df10[df10['CHAIN'] == 'Arbitrum']
-df10_1['volume_usd'] = df10_1['volume'].map('${:,.0f}'.format)
-
-df10_fig1 = px.scatter(df10_1,
-                 x="hour",
-                 y="day",
-                 size="volume",
-                 size_max=20,
-                 color="volume",
-                 hover_data={'volume':False,
-                             'day':True,
-                             'hour':True,
-                             'volume_usd':True
-                            },
-                 title="Volume Distribution on Uniswap for Arbitrum by Hour and Weekday [30D]")
-
-
-df10_2 = df10[df10['CHAIN'] == 'Avalanche']
-df10_2['volume_usd'] = df10_2['volume'].map('${:,.0f}'.format)
-
-df10_fig2 = px.scatter(df10_2,
-                 x="hour",
-                 y="day",
-                 size="volume",
-                 size_max=20,
-                 color="volume",
-                 hover_data={'volume':False,
-                             'day':True,
-                             'hour':True,
-                             'volume_usd':True
-                            },
-                 title="Volume Distribution on Uniswap for Avalanche by Hour and Weekday [30D]")
-
+# The per-chain charts below are built on demand, only for the chart group
+# the reader has selected. Each dataset is split by chain in a single pass,
+# once per version; derived columns such as volume_usd and PCT_SHARE come
+# precomputed with the dataset.
 
-df10_3 = df10[df10['CHAIN'] == 'Base']
-df10_3['volume_usd'] = df10_3['volume'].map('${:,.0f}'.format)
-
-df10_fig3 = px.scatter(df10_3,
-                 x="hour",
-                 y="day",
-                 size="volume",
-                 size_max=20,
-                 color="volume",
-                 hover_data={'volume':False,
-                             'day':True,
-                             'hour':True,
-                             'volume_usd':True
-                            },
-                 title="Volume Distribution on Uniswap for Base by Hour and Weekday [30D]")
-
-
-df10_4 = df10[df10['CHAIN'] == 'BSC']
-df10_4['volume_usd'] = df10_4['volume'].map('${:,.0f}'.format)
-
-df10_fig4 = px.scatter(df10_4,
-                 x="hour",
-                 y="day",
-                 size="volume",
-                 size_max=20,
-                 color="volume",
-                 hover_data={'volume':False,
-                             'day':True,
-                             'hour':True,
-                             'volume_usd':True
-                            },
-                 title="Volume Distribution on Uniswap for BSC by Hour and Weekday [30D]")
-
-
-df10_5 = df10[df10['CHAIN'] == 'Optimism']
-df10_5['volume_usd'] = df10_5['volume'].map('${:,.0f}'.format)
-
-df10_fig5 = px.scatter(df10_5,
-                 x="hour",
-                 y="day",
-                 size="volume",
-                 size_max=20,
-                 color="volume",
-                 hover_data={'volume':False,
-                             'day':True,
-                             'hour':True,
-                             'volume_usd':True
-                            },
-                 title="Volume Distribution on Uniswap for Optimism by Hour and Weekday [30D]")
-
-
-df10_6 = df10[df10['CHAIN'] == 'Polygon']
-df10_6['volume_usd'] = df10_6['volume'].map('${:,.0f}'.format)
+##########################___________________DF10_____________________######################
 
-df10_fig6 = px.scatter(df10_6,
+@cached_figures
+def df10_figure(df10_chain, chain):
+    return px.scatter(df10_chain,
                  x="hour",
                  y="day",
                  size="volume",
@@ -222,141 +110,59 @@ df10_fig6 = px.scatter(df10_6,
                              'hour':True,
                              'volume_usd':True
                             },
-                 title="Volume Distribution on Uniswap for Polygon by Hour and Weekday [30D]")
+                 title=f"Volume Distribution on Uniswap for {chain} by Hour and Weekday [30D]")
 
 ##########################___________________DF9_____________________######################
 
-df9_1 = df9[df9['CHAIN'] == 'Arbitrum']
-df9_fig1 = px.bar(df9_1,
-               x='CATEGORY',
-               y='TXN_COUNT',
-               log_y=True,
-               title='Swap $ Distribution by Txn Count on Arb [Log]',)
-#               labels={'USER_COUNT': 'User Count'})
-df9_fig1.update_layout(hovermode="x unified")
-
-df9_2 = df9[df9['CHAIN'] == 'Avalanche']
-df9_fig2 = px.bar(df9_2,
-               x='CATEGORY',
-               y='TXN_COUNT',
-               log_y=True,
-               title='Swap $ Distribution by Txn Count on Ava [Log]',)
-#               labels={'USER_COUNT': 'User Count'})
-df9_fig2.update_layout(hovermode="x unified")
-
-df9_3 = df9[df9['CHAIN'] == 'Base']
-df9_fig3 = px.bar(df9_3,
-               x='CATEGORY',
-               y='TXN_COUNT',
-               log_y=True,
-               title='Swap $ Distribution by Txn Count on Base [Log]',)
-#               labels={'USER_COUNT': 'User Count'})
-df9_fig3.update_layout(hovermode="x unified")
-
-df9_4 = df9[df9['CHAIN'] == 'BSC']
-df9_fig4 = px.bar(df9_4,
-               x='CATEGORY',
-               y='TXN_COUNT',
-               log_y=True,
-               title='Swap $ Distribution by Txn Count on BSC [Log]',)
-#               labels={'USER_COUNT': 'User Count'})
-df9_fig4.update_layout(hovermode="x unified")
-
-df9_5 = df9[df9['CHAIN'] == 'Optimism']
-df9_fig5 = px.bar(df9_5,
-               x='CATEGORY',
-               y='TXN_COUNT',
-               log_y=True,
-               title='Swap $ Distribution by Txn Count on Optim [Log]',)
-#               labels={'USER_COUNT': 'User Count'})
-df9_fig5.update_layout(hovermode="x unified")
-
-df9_6 = df9[df9['CHAIN'] == 'Polygon']
-df9_fig6 = px.bar(df9_6,
-               x='CATEGORY',
-               y='TXN_COUNT',
-               log_y=True,
-               title='Swap $ Distribution by Txn Count on Poly [Log]',)
-#               labels={'USER_COUNT': 'User Count'})
-df9_fig6.update_layout(hovermode="x unified")
-
-##########################___________________DF21_____________________######################
-
-df21_1 = df21[df21['CHAIN'] == 'Arbitrum']
-df21_1['PCT_SHARE'] = df21_1.groupby('WEEK')['SWAP_VOLUME'].transform(lambda x: x / x.sum() * 100)
-
-df21_fig1 = px.area(df21_1,
-              x="WEEK",
-              y="PCT_SHARE",
-              color="DEX",
-              title="Market Share of DEXs on Arbitrum by USD Swap Volume")
-df21_fig1.update_layout(hovermode="x unified")
-
-
-df21_2 = df21[df21['CHAIN'] == 'Avalanche']
-df21_2['PCT_SHARE'] = df21_2.groupby('WEEK')['SWAP_VOLUME'].transform(lambda x: x / x.sum() * 100)
-
-df21_fig2 = px.area(df21_2,
-              x="WEEK",
-              y="PCT_SHARE",
-              color="DEX",
-              title="Market Share of DEXs on Avalanche by USD Swap Volume")
-df21_fig2.update_layout(hovermode="x unified")
-
-
-df21_3 = df21[df21['CHAIN'] == 'Base']
-df21_3['PCT_SHARE'] = df21_3.groupby('WEEK')['SWAP_VOLUME'].transform(lambda x: x / x.sum() * 100)
-
-df21_fig3 = px.area(df21_3,
-              x="WEEK",
-              y="PCT_SHARE",
-              color="DEX",
-              title="Market Share of DEXs on Base by USD Swap Volume")
-df21_fig3.update_layout(hovermode="x unified")
-
-df21_4 = df21[df21['CHAIN'] == 'BSC']
-df21_4['PCT_SHARE'] = df21_4.groupby('WEEK')['SWAP_VOLUME'].transform(lambda x: x / x.sum() * 100)
-
-df21_fig4 = px.area(df21_4,
-              x="WEEK",
-              y="PCT_SHARE",
-              color="DEX",
-              title="Market Share of DEXs on BSC by USD Swap Volume")
-df21_fig4.update_layout(hovermode="x unified")
-
-
-df21_5 = df21[df21['CHAIN'] == 'Optimism']
-df21_5['PCT_SHARE'] = df21_5.groupby('WEEK')['SWAP_VOLUME'].transform(lambda x: x / x.sum() * 100)
+df9_short_names = {
+    'Arbitrum': 'Arb',
+    'Avalanche': 'Ava',
+    'Base': 'Base',
+    'BSC': 'BSC',
+    'Optimism': 'Optim',
+    'Polygon': 'Poly'
+}
 
-df21_fig5 = px.area(df21_5,
-              x="WEEK",
-              y="PCT_SHARE",
-              color="DEX",
-              title="Market Share of DEXs on Optimism by USD Swap Volume")
-df21_fig5.update_layout(hovermode="x unified")
+@cached_figures
+def df9_figure(df9_chain, chain):
+    df9_fig = px.bar(df9_chain,
+                   x='CATEGORY',
+                   y='TXN_COUNT',
+                   log_y=True,
+                   title=f'Swap $ Distribution by Txn Count on {df9_short_names[chain]} [Log]',)
+    df9_fig.update_layout(hovermode="x unified")
+    return df9_fig
 
+##########################___________________DF21_____________________######################
 
-df21_6 = df21[df21['CHAIN'] == 'Polygon']
-df21_6['PCT_SHARE'] = df21_6.groupby('WEEK')['SWAP_VOLUME'].transform(lambda x: x / x.sum() * 100)
+df21_chains = partition(df21)
 
-df21_fig6 = px.area(df21_6,
-              x="WEEK",
-              y="PCT_SHARE",
-              color="DEX",
-              title="Market Share of DEXs on Polygon by USD Swap Volume")
-df21_fig6.update_layout(hovermode="x unified")
+@cached_figures
+def df21_figure(df21_chain, chain):
+    df21_fig = px.area(df21_chain,
+                  x="WEEK",
+                  y="PCT_SHARE",
+                  color="DEX",
+                  title=f"Market Share of DEXs on {chain} by USD Swap Volume")
+    df21_fig.update_layout(hovermode="x unified")
+    return df21_fig
 
 ##########################___________________DF23_____________________######################
 
-df23_fig1 = px.line(df23,
-              x="WEEK_START",
-              y="AVG_TIME_DIFF_SECONDS",
-              color="CHAIN",
-              title="Weekly Average Time Difference (in seconds) Between Swaps On Uniswap",
-              labels={'WEEK_START': 'WEEK'})
-df23_fig1.update_layout(hovermode="x unified")
-df23_fig1.update_layout(
-    xaxis_title="WEEK")    
+@cached_figures
+def df23_figures(df23):
+    df23_fig1 = px.line(df23,
+                  x="WEEK_START",
+                  y="AVG_TIME_DIFF_SECONDS",
+                  color="CHAIN",
+                  title="Weekly Average Time Difference (in seconds) Between Swaps On Uniswap",
+                  labels={'WEEK_START': 'WEEK'})
+    df23_fig1.update_layout(hovermode="x unified")
+    df23_fig1.update_layout(
+        xaxis_title="WEEK")    
+    return df23_fig1
+
+df23_fig1 = df23_figures(df23)
 
 #################################################### LAYOUT ##############################################
 
@@ -385,54 +191,58 @@ with col_1b:
     insight_1 = '<p style="font-family:sans-serif; color:#4d372c; font-size: 16px;">Uniswap users on Avalanche exhibit a distinctive trading behavior characterized by less frequent transactions in quick succession, notably reflected in the platform\'s high time difference (in seconds) between swaps per week. It\'s worth considering that this pattern may stem from the relatively recent integration of Uniswap on Avalanche. A parallel can be drawn to Arbitrum\'s early phase on Uniswap, where similar intervals were observed, suggesting that the trading dynamics could evolve over time as Uniswap becomes more established on Avalanche.</p>'
     st.markdown(insight_1, unsafe_allow_html=True)
 
-tab3, tab4 = st.tabs(["Swap Volume Distribution on Uniswap by Hour and Weekday [30D]", "User Distribution by Transaction Count [All Time]"])
+tab_hour_weekday = "Swap Volume Distribution on Uniswap by Hour and Weekday [30D]"
+tab_txn_count = "User Distribution by Transaction Count [All Time]"
+chart_group = st.radio("Chart group", [tab_hour_weekday, tab_txn_count], horizontal=True, label_visibility="collapsed")
 
-with tab3:
+if chart_group == tab_hour_weekday:
+    df10_chains = partition(df10)
     col_4a, col_4b = st.columns(2)
     with col_4a:
-        st.plotly_chart(df10_fig1, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df10_figure(df10_chains['Arbitrum'], 'Arbitrum'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url10}")
     with col_4b:
-        st.plotly_chart(df10_fig2, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df10_figure(df10_chains['Avalanche'], 'Avalanche'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url10}")
 
     col_5a, col_5b, = st.columns(2)
     with col_5a:
-        st.plotly_chart(df10_fig3, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df10_figure(df10_chains['Base'], 'Base'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url10}")
     with col_5b:
-        st.plotly_chart(df10_fig4, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df10_figure(df10_chains['BSC'], 'BSC'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url10}")
 
     col_6a, col_6b, = st.columns(2)
     with col_6a:
-        st.plotly_chart(df10_fig5, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df10_figure(df10_chains['Optimism'], 'Optimism'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url10}")
     with col_6b:
-        st.plotly_chart(df10_fig6, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df10_figure(df10_chains['Polygon'], 'Polygon'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url10}")
 
-with tab4:
+else:
+    df9_chains = partition(df9)
     col_2a, col_2b, col_2c = st.columns(3)
     with col_2a:
-        st.plotly_chart(df9_fig1, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df9_figure(df9_chains['Arbitrum'], 'Arbitrum'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url9}")
     with col_2b:
-        st.plotly_chart(df9_fig2, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df9_figure(df9_chains['Avalanche'], 'Avalanche'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url9}")
     with col_2c:
-        st.plotly_chart(df9_fig3, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df9_figure(df9_chains['Base'], 'Base'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url9}")
 
     col_3a, col_3b, col_3c = st.columns(3)
     with col_3a:
-        st.plotly_chart(df9_fig4, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df9_figure(df9_chains['BSC'], 'BSC'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url9}")
     with col_3b:
-        st.plotly_chart(df9_fig5, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df9_figure(df9_chains['Optimism'], 'Optimism'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url9}")
     with col_3c:
-        st.plotly_chart(df9_fig6, theme="streamlit", use_container_width=True)
+        st.plotly_chart(df9_figure(df9_chains['Polygon'], 'Polygon'), theme="streamlit", use_container_width=True)
         st.link_button("View SQL", f"{url9}")
 
 colored_header(
@@ -452,26 +262,26 @@ colored_header(
 
 col_7a, col_7b = st.columns(2)
 with col_7a:
-    st.plotly_chart(df21_fig1, theme="streamlit", use_container_width=True)
+    st.plotly_chart(df21_figure(df21_chains['Arbitrum'], 'Arbitrum'), theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url21}")
 with col_7b:
-    st.plotly_chart(df21_fig2, theme="streamlit", use_container_width=True)
+    st.plotly_chart(df21_figure(df21_chains['Avalanche'], 'Avalanche'), theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url21}")
 
 col_8a, col_8b = st.columns(2)
 with col_8a:
-    st.plotly_chart(df21_fig3, theme="streamlit", use_container_width=True)
+    st.plotly_chart(df21_figure(df21_chains['Base'], 'Base'), theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url21}")
 with col_8b:
-    st.plotly_chart(df21_fig4, theme="streamlit", use_container_width=True)
+    st.plotly_chart(df21_figure(df21_chains['BSC'], 'BSC'), theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url21}")
 
 col_9a, col_9b = st.columns(2)
 with col_9a:
-    st.plotly_chart(df21_fig5, theme="streamlit", use_container_width=True)
+    st.plotly_chart(df21_figure(df21_chains['Optimism'], 'Optimism'), theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url21}")
 with col_9b:
-    st.plotly_chart(df21_fig6, theme="streamlit", use_container_width=True)
+    st.plotly_chart(df21_figure(df21_chains['Polygon'], 'Polygon'), theme="streamlit", use_container_width=True)
     st.link_button("View SQL", f"{url21}")
 
 colored_header(
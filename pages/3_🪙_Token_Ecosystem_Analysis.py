@@ -5,6 +5,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from millify import millify
 from streamlit_extras.colored_header import colored_header
+from dashboard.figures import cached_figures
+from dashboard.registry import QUERIES, load_datasets
 
 # st.cache_data.clear()
 
@@ -48,151 +50,146 @@ st.warning('Listed tokens include tokens with [warnings](https://support.uniswap
 
 ############################# cache datasets ########################################
 
-url11 = "https://flipsidecrypto.xyz/edit/queries/6a07e76a-e2d7-4e19-994d-ea8fc9ab5cb3"
-@st.cache_data
-def load_df11():
-    df11 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url11.split('/')[-1]}/data/latest")
-    return df11
-
-url12 = "https://flipsidecrypto.xyz/edit/queries/769501ac-dd3a-4ff4-999b-c1636300b2d6"
-@st.cache_data
-def load_df12():
-    df12 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url12.split('/')[-1]}/data/latest")
-    return df12
-
-url13 = "https://flipsidecrypto.xyz/edit/queries/28e0cea8-65f2-498d-aa21-de0d531eecbf"
-@st.cache_data
-def load_df13():
-    df13 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url13.split('/')[-1]}/data/latest")
-    return df13
-
-url14 = "https://flipsidecrypto.xyz/edit/queries/90b45034-cf89-49d2-bf30-ab8906ec385d"
-@st.cache_data
-def load_df14():
-    df14 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url14.split('/')[-1]}/data/latest")
-    return df14
-
-url15 = "https://flipsidecrypto.xyz/edit/queries/e1b3a5e7-8420-4418-aadb-dd6070c0f7bd"
-@st.cache_data
-def load_df15():
-    df15 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url15.split('/')[-1]}/data/latest")
-    return df15
-
-url18 = "https://flipsidecrypto.xyz/edit/queries/69c25641-4e12-4e63-9f79-12ebe0542f27"
-@st.cache_data
-def load_df18():
-    df18 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url18.split('/')[-1]}/data/latest")
-    return df18
-
-url25 = "https://flipsidecrypto.xyz/edit/queries/9ec57d83-0d07-4b46-a481-43d9070d8122"
-@st.cache_data
-def load_df25():
-    df25 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url25.split('/')[-1]}/data/latest")
-    return df25
+url11 = QUERIES["df11"].url
+url12 = QUERIES["df12"].url
+url13 = QUERIES["df13"].url
+url14 = QUERIES["df14"].url
+url15 = QUERIES["df15"].url
+url18 = QUERIES["df18"].url
+url25 = QUERIES["df25"].url
 
 ############################### load datasets ###########################################
 
-df11 = load_df11()
-df12 = load_df12()
-df13 = load_df13()
-df14 = load_df14()
-df15 = load_df15()
-df18 = load_df18()
-df25 = load_df25()
+df11, df12, df13, df14, df15, df18, df25 = load_datasets("df11", "df12", "df13", "df14", "df15", "df18", "df25")
 
 ################################   charts   ##############################################
 
 ##########################___________________DF11_____________________######################
 
-df11_fig1 = px.histogram(df11,
-                   x="CHAIN",
-                   y="SWAP_VOLUME_USD",
-                   color="POOL_NAME",
-                   title="Top 5 Pools Per Chain By Swap Volume USD [Log Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Dark24)
-df11_fig1.update_layout(
-    yaxis_title="SWAP VOLUME USD")
-df11_fig1.update_layout(hovermode="x unified")
-
+@cached_figures
+def df11_figures(df11):
+    df11_fig1 = px.histogram(df11,
+                       x="CHAIN",
+                       y="SWAP_VOLUME_USD",
+                       color="POOL_NAME",
+                       title="Top 5 Pools Per Chain By Swap Volume USD [Log Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Dark24)
+    df11_fig1.update_layout(
+        yaxis_title="SWAP VOLUME USD")
+    df11_fig1.update_layout(hovermode="x unified")
+    return df11_fig1
+
+df11_fig1 = df11_figures(df11)
 
 ##########################___________________DF12_____________________######################
 
-df12_fig1 = px.histogram(df12,
-                   x="CHAIN",
-                   y="UNIQUE_SWAPPERS",
-                   color="TOKEN",
-                   title="Top 5 Tokens Swapped From Per Chain By Unique Swappers [Log Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Dark24)
-df12_fig1.update_layout(
-    yaxis_title="UNIQUE SWAPPERS")
-df12_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df12_figures(df12):
+    df12_fig1 = px.histogram(df12,
+                       x="CHAIN",
+                       y="UNIQUE_SWAPPERS",
+                       color="TOKEN",
+                       title="Top 5 Tokens Swapped From Per Chain By Unique Swappers [Log Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Dark24)
+    df12_fig1.update_layout(
+        yaxis_title="UNIQUE SWAPPERS")
+    df12_fig1.update_layout(hovermode="x unified")
+    return df12_fig1
+
+df12_fig1 = df12_figures(df12)
 
 ##########################___________________DF13_____________________######################
 
-df13_fig1 = px.histogram(df13,
-                   x="CHAIN",
-                   y="VOLUME_USD",
-                   color="TOKEN",
-                   title="Top 5 Tokens Swapped From Per Chain By USD Volume [Log Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Light24)
-df13_fig1.update_layout(
-    yaxis_title="SWAP VOLUME USD")
-df13_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df13_figures(df13):
+    df13_fig1 = px.histogram(df13,
+                       x="CHAIN",
+                       y="VOLUME_USD",
+                       color="TOKEN",
+                       title="Top 5 Tokens Swapped From Per Chain By USD Volume [Log Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Light24)
+    df13_fig1.update_layout(
+        yaxis_title="SWAP VOLUME USD")
+    df13_fig1.update_layout(hovermode="x unified")
+    return df13_fig1
+
+df13_fig1 = df13_figures(df13)
 
 ##########################___________________DF14_____________________######################
 
-df14_fig1 = px.histogram(df14,
-                   x="CHAIN",
-                   y="UNIQUE_SWAPPERS",
-                   color="TOKEN",
-                   title="Top 5 Tokens Swapped To Per Chain By Unique Swappers [Log Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Dark24)
-df14_fig1.update_layout(
-    yaxis_title="UNIQUE SWAPPERS")
-df14_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df14_figures(df14):
+    df14_fig1 = px.histogram(df14,
+                       x="CHAIN",
+                       y="UNIQUE_SWAPPERS",
+                       color="TOKEN",
+                       title="Top 5 Tokens Swapped To Per Chain By Unique Swappers [Log Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Dark24)
+    df14_fig1.update_layout(
+        yaxis_title="UNIQUE SWAPPERS")
+    df14_fig1.update_layout(hovermode="x unified")
+    return df14_fig1
+
+df14_fig1 = df14_figures(df14)
 
 ##########################___________________DF15_____________________######################
 
-df15_fig1 = px.histogram(df15,
-                   x="CHAIN",
-                   y="VOLUME_USD",
-                   color="TOKEN",
-                   title="Top 5 Tokens Swapped To Per Chain By USD Volume [Log Scale]",
-                   log_y=True,
-                   color_discrete_sequence=px.colors.qualitative.Light24)
+@cached_figures
+def df15_figures(df15):
+    df15_fig1 = px.histogram(df15,
+                       x="CHAIN",
+                       y="VOLUME_USD",
+                       color="TOKEN",
+                       title="Top 5 Tokens Swapped To Per Chain By USD Volume [Log Scale]",
+                       log_y=True,
+                       color_discrete_sequence=px.colors.qualitative.Light24)
+
+    df15_fig1.update_layout(
+        yaxis_title="SWAP VOLUME USD")
+    df15_fig1.update_layout(hovermode="x unified")
+    return df15_fig1
 
-df15_fig1.update_layout(
-    yaxis_title="SWAP VOLUME USD")
-df15_fig1.update_layout(hovermode="x unified")
+df15_fig1 = df15_figures(df15)
 
 ##########################___________________DF18_____________________######################
 
-df18_fig1 = px.histogram(df18,
-                   x="CHAIN",
-                   y="NEW_TOKENS_COUNT",
-                   color="CHAIN",
-                   title="Tokens Listed per Chain",
-                   color_discrete_sequence=px.colors.qualitative.Dark24)
+@cached_figures
+def df18_figures(df18):
+    df18_fig1 = px.histogram(df18,
+                       x="CHAIN",
+                       y="NEW_TOKENS_COUNT",
+                       color="CHAIN",
+                       title="Tokens Listed per Chain",
+                       color_discrete_sequence=px.colors.qualitative.Dark24)
+
+    df18_fig1.update_layout(hovermode="x unified")
+    df18_fig1.update_layout(
+        yaxis_title="TOKENS LISTED")
+    df18_fig1.update_layout(hovermode="x unified")
+    return df18_fig1
 
-df18_fig1.update_layout(hovermode="x unified")
-df18_fig1.update_layout(
-    yaxis_title="TOKENS LISTED")
-df18_fig1.update_layout(hovermode="x unified")
+df18_fig1 = df18_figures(df18)
 
 ##########################___________________DF25_____________________######################
 
-df25_fig1 = px.line(df25,
-              x="WEEK_START",
-              y="NEW_TOKENS_COUNT",
-              color="CHAIN",
-              title="New Tokens Listed Weekly On Uniswap by Chain")
-df25_fig1.update_layout(
-    yaxis_title="TOKENS LISTED")
-df25_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df25_figures(df25):
+    df25_fig1 = px.line(df25,
+                  x="WEEK_START",
+                  y="NEW_TOKENS_COUNT",
+                  color="CHAIN",
+                  title="New Tokens Listed Weekly On Uniswap by Chain")
+    df25_fig1.update_layout(
+        yaxis_title="TOKENS LISTED")
+    df25_fig1.update_layout(hovermode="x unified")
+    return df25_fig1
+
+df25_fig1 = df25_figures(df25)
+
 #################################################### LAYOUT ##############################################
 
 st.plotly_chart(df25_fig1, theme="streamlit", use_container_width=True)
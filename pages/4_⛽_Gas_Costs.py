@@ -5,6 +5,8 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from millify import millify
 from streamlit_extras.colored_header import colored_header
+from dashboard.figures import cached_figures
+from dashboard.registry import QUERIES, load_datasets
 
 # st.cache_data.clear()
 
@@ -42,51 +44,48 @@ div[data-testid="metric-container"] > label[data-testid="stMetricLabel"] > div {
 """
             , unsafe_allow_html=True)
 
-url2 = "https://flipsidecrypto.xyz/edit/queries/585330c0-7820-4195-b1a2-faae610a4154"
-@st.cache_data
-def load_df2():
-    df2 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url2.split('/')[-1]}/data/latest")
-    return df2
+url2 = QUERIES["df2"].url
+url3 = QUERIES["df3"].url
+url24 = QUERIES["df24"].url
 
-df2 = load_df2()
+df2, df3, df24 = load_datasets("df2", "df3", "df24")
 
-df2_fig1 = px.bar(df2, x='CHAIN', y='AVG_GAS_COST', color='CHAIN')
+@cached_figures
+def df2_figures(df2):
+    df2_fig1 = px.bar(df2, x='CHAIN', y='AVG_GAS_COST', color='CHAIN')
 
-df2_fig1.update_layout(title='Average Gas Cost (USD) on Uniswap',
-                  xaxis_title='Chain',
-                  yaxis_title='Average Gas Cost (USD)',
-                  hovermode="x unified")
+    df2_fig1.update_layout(title='Average Gas Cost (USD) on Uniswap',
+                      xaxis_title='Chain',
+                      yaxis_title='Average Gas Cost (USD)',
+                      hovermode="x unified")
+    return df2_fig1
 
-url3 = "https://flipsidecrypto.xyz/edit/queries/37397424-4baf-487f-9437-40ef7db4f41d"
-@st.cache_data
-def load_df3():
-    df3 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url3.split('/')[-1]}/data/latest")
-    return df3
+df2_fig1 = df2_figures(df2)
 
-df3 = load_df3()
+@cached_figures
+def df3_figures(df3):
+    df3_fig1 = px.bar(df3, x='CHAIN', y='COST_PER_DOLLAR', color='CHAIN')
+    df3_fig1.update_layout(title='Average Gas Cost (USD) of Swapping $1 on Uniswap',
+                      xaxis_title='Chain',
+                      yaxis_title='Average Gas Cost (USD)',
+                      hovermode="x unified")
+    return df3_fig1
 
-df3_fig1 = px.bar(df3, x='CHAIN', y='COST_PER_DOLLAR', color='CHAIN')
-df3_fig1.update_layout(title='Average Gas Cost (USD) of Swapping $1 on Uniswap',
-                  xaxis_title='Chain',
-                  yaxis_title='Average Gas Cost (USD)',
-                  hovermode="x unified")
-
-url24 = "https://flipsidecrypto.xyz/edit/queries/531ec317-6c5d-4556-b4c7-d8c7daa46143"
-@st.cache_data
-def load_df24():
-    df24 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url24.split('/')[-1]}/data/latest")
-    return df24
-
-df24 = load_df24()
+df3_fig1 = df3_figures(df3)
 
 ###############################___________________DF24_____________________#############################
 
-df24_fig1 = px.line(df24,
-              x="WEEK",
-              y="AVG_GAS_FEE",
-              color="CHAIN",
-              title="Weekly Average Gas Fee (USD) On Uniswap")
-df24_fig1.update_layout(hovermode="x unified")
+@cached_figures
+def df24_figures(df24):
+    df24_fig1 = px.line(df24,
+                  x="WEEK",
+                  y="AVG_GAS_FEE",
+                  color="CHAIN",
+                  title="Weekly Average Gas Fee (USD) On Uniswap")
+    df24_fig1.update_layout(hovermode="x unified")
+    return df24_fig1
+
+df24_fig1 = df24_figures(df24)
 
 st.markdown(f'<h1 style="color:#434346;font-size:60px;text-align:center;">{"Gas Costs"}</h1>', unsafe_allow_html=True)
 st.info("This page examines gas cost fluctuations within Uniswap, delving into variations in gas fees across different L2s.", icon="ℹ️")
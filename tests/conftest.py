@@ -0,0 +1,120 @@
+"""Synthetic swaps for the tests of the local engines."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import rollup, swaps
+from dashboard.swaps import AMOUNT_USD, BLOCK_TIMESTAMP, CHAIN, GAS_USD, POOL, SENDER
+
+CHAINS = ["arbitrum", "base", "optimism"]
+
+
+@pytest.fixture
+def make_swaps():
+    """``make_swaps(start, days, n)``: ``n`` random swaps over ``days`` days from ``start``.
+
+    Senders are drawn from ``wallets`` addresses with a long tail, as real
+    ones are, and about 1% of amounts are missing.
+    """
+    rng = np.random.default_rng(0)
+
+    def make(start, days, n, wallets=2000, chains=CHAINS):
+        times = np.datetime64(start, "s") + rng.integers(0, days * 86400, n).astype("timedelta64[s]")
+        amounts = rng.lognormal(4, 2, n)
+        amounts[rng.random(n) < 0.01] = np.nan
+        return pd.DataFrame({
+            CHAIN: rng.choice(chains, n),
+            BLOCK_TIMESTAMP: np.sort(times).astype("datetime64[us]"),
+            POOL: rng.choice([f"0x{pool:040x}" for pool in range(30)], n),
+            SENDER: [f"0x{wallet:040x}" for wallet in rng.zipf(1.3, n) % wallets],
+            AMOUNT_USD: amounts,
+            GAS_USD: rng.random(n),
+        })
+
+    return make
+
+
+def append_empty(directory, chain):
+    """Add a part file with no swaps for ``chain``."""
+    folder = directory / f"{CHAIN}={chain}"
+    folder.mkdir(parents=True, exist_ok=True)
+    empty = pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in swaps.COLUMNS.items()})
+    swaps.compact(empty.drop(columns=CHAIN)).to_parquet(folder / f"{time.time_ns()}.parquet", index=False)
+
+
+@pytest.fixture
+def fold_batches(tmp_path, make_swaps):
+    """``fold_batches(n)``: fold ``n`` batches of swaps into a rollup, one at a time.
+
+    After each batch it yields ``(rollup, stored, folded)``: the rollup, every
+    swap in the store, and the swaps the weekly tables hold (all but the late
+    ones). The first batch is on one chain only, the third adds an empty
+    part file and the fifth swaps for a week that has closed; every other
+    batch is folded by a rollup reopened from disk.
+    """
+    store, reference = tmp_path / "store", tmp_path / "reference"
+    start = np.datetime64("2024-01-03")
+
+    def fold(n=8):
+        state = None
+        for batch in range(n):
+            new = make_swaps(start + 9 * batch, 9, 3_000, chains=CHAINS[:1] if batch == 0 else CHAINS)
+            swaps.append(store, new)
+            swaps.append(reference, new)
+            if batch == 2:
+                append_empty(store, CHAINS[1])
+            if batch == 4:
+                swaps.append(store, make_swaps(start, 1, 20, chains=CHAINS[:1]))
+            if state is None or batch % 2:
+                state = rollup.WeeklyRollup(store)
+            state.update()
+            yield state, swaps.read(store), swaps.read(reference)
+
+    return fold
+
+
+class StubServer(ThreadingHTTPServer):
+    """Answers each GET with the next of ``responses[path]``; the last one repeats.
+
+    A response is ``(status, headers, body)``, or ``(status, headers, body,
+    delay)`` to wait ``delay`` seconds before sending it.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.responses = {}
+        self.requests = []
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        queue = self.server.responses[self.path]
+        status, headers, body, *delay = queue.pop(0) if len(queue) > 1 else queue[0]
+        if delay:
+            time.sleep(delay[0])
+        self.send_response(status)
+        for name, value in {"Content-Length": str(len(body)), **headers}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
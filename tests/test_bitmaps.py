@@ -0,0 +1,33 @@
+"""``dashboard.bitmaps`` against plain sorted arrays of the same ids."""
+
+import numpy as np
+
+from dashboard.bitmaps import _ARRAY, _BITMAP, CHUNK, Bitmap
+
+
+def test_matches_sorted_ids_after_every_batch(tmp_path):
+    rng = np.random.default_rng(0)
+    bitmap, added = Bitmap(), np.zeros(0, dtype=np.int64)
+    for batch in range(12):
+        # A dense chunk, that turns into a bitmap container, and sparse ones.
+        ids = np.concatenate([rng.integers(0, CHUNK, 1_000), rng.integers(0, 10 * CHUNK, 200)])
+        bitmap.add(ids)
+        added = np.union1d(added, ids)
+        probes = rng.integers(-5, 11 * CHUNK, 5_000)
+        assert (bitmap.to_ids() == added).all()
+        assert len(bitmap) == len(added)
+        assert (bitmap.contains(probes) == np.isin(probes, added)).all()
+        assert (bitmap.difference(probes) == np.setdiff1d(probes, added)).all()
+    assert {kind for kind, _ in bitmap.containers} == {_ARRAY, _BITMAP}
+
+    bitmap.save(tmp_path / "bitmap.npz")
+    assert (Bitmap.load(tmp_path / "bitmap.npz").to_ids() == added).all()
+    assert (Bitmap.from_arrays(**bitmap.to_arrays()).to_ids() == added).all()
+
+
+def test_empty():
+    bitmap = Bitmap()
+    assert len(bitmap) == 0
+    assert len(bitmap.to_ids()) == 0
+    assert not bitmap.contains([0, 1]).any()
+    assert (Bitmap.from_arrays(**bitmap.to_arrays()).to_ids() == []).all()
@@ -0,0 +1,92 @@
+"""``dashboard.cache.DatasetCache`` with a stand-in for the fetch."""
+
+import threading
+
+import pandas as pd
+import pytest
+
+from dashboard.cache import DatasetCache
+from dashboard.registry import Query
+
+QUERY = Query("df0", "https://example.com/queries/q0", ttl=60)
+
+
+def frame(version):
+    result = pd.DataFrame({"VALUE": [version]})
+    result.attrs["version"] = version
+    return result
+
+
+def test_refresh_of_an_uncached_unchanged_result_raises():
+    cache = DatasetCache(lambda query, previous: None)
+    with pytest.raises(LookupError, match="nothing is cached"):
+        cache.refresh(QUERY)
+    assert cache.entry(QUERY) is None
+
+
+class SlowSource:
+    """Returns ``frame(version)`` for the current ``version``, each fetch waiting for ``release``."""
+
+    def __init__(self):
+        self.version = 1
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+
+    def __call__(self, query, previous):
+        self.calls += 1
+        self.release.wait(5)
+        if previous is not None and previous.attrs["version"] == self.version:
+            return None
+        return frame(self.version)
+
+
+def expire(cache):
+    cache.entry(QUERY).checked_at -= QUERY.ttl + 1
+
+
+def wait_for_refresh(cache):
+    # The pool has one worker, so this runs once the queued refresh is done.
+    cache._pool.submit(lambda: None).result(5)
+
+
+def test_serves_the_stale_frame_while_refreshing_then_replaces_it():
+    source = SlowSource()
+    cache = DatasetCache(source, max_workers=1)
+    assert cache.get(QUERY)["VALUE"].tolist() == [1]
+
+    expire(cache)
+    source.version = 2
+    source.release.clear()
+    # Answered from the cache straight away, though the refresh is stuck.
+    assert cache.get(QUERY)["VALUE"].tolist() == [1]
+    assert cache.get(QUERY)["VALUE"].tolist() == [1]
+    source.release.set()
+    wait_for_refresh(cache)
+    assert source.calls == 2
+    assert cache.get(QUERY)["VALUE"].tolist() == [2]
+    assert cache.entry(QUERY).version == 2
+
+
+def test_unchanged_refresh_keeps_the_entry():
+    source = SlowSource()
+    cache = DatasetCache(source, max_workers=1)
+    cache.get(QUERY)
+    entry = cache.entry(QUERY)
+    fetched_at = entry.fetched_at
+    expire(cache)
+    expired = entry.checked_at
+    cache.get(QUERY)
+    wait_for_refresh(cache)
+    assert cache.entry(QUERY) is entry
+    assert entry.fetched_at == fetched_at
+    assert entry.checked_at > expired
+
+
+def test_first_load_comes_from_the_snapshot():
+    source = SlowSource()
+    cache = DatasetCache(source, max_workers=1, read_snapshot=lambda query: (frame(7), 1_000))
+    assert cache.get(QUERY)["VALUE"].tolist() == [7]
+    # The snapshot is long expired, so it is refreshed in the background.
+    wait_for_refresh(cache)
+    assert cache.get(QUERY)["VALUE"].tolist() == [1]
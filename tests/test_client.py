@@ -0,0 +1,68 @@
+"""``dashboard.client``'s pooled session against a local server."""
+
+import pytest
+import requests
+
+from dashboard import client
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(client, "_session", None)
+    # No backoff between retries; the retry counts are what's under test.
+    monkeypatch.setattr(client.Retry, "get_backoff_time", lambda retry: 0)
+    yield
+    client._session.close()
+
+
+def get(server, path):
+    response, chunks = client.stream(server.url(path))
+    with response:
+        return response, b"".join(chunks)
+
+
+@pytest.mark.parametrize("status", [502, 503, 504])
+def test_retries_gateway_errors(http_server, status):
+    http_server.responses["/q"] = [(status, {}, b"busy"), (status, {}, b"busy"), (200, {}, b"[]")]
+    response, body = get(http_server, "/q")
+    assert response.status_code == 200
+    assert body == b"[]"
+    assert len(http_server.requests) == 3
+
+
+def test_gives_up_after_two_retries(http_server):
+    http_server.responses["/q"] = [(502, {}, b"down")]
+    with pytest.raises(requests.exceptions.RetryError):
+        get(http_server, "/q")
+    assert len(http_server.requests) == 3
+
+
+def test_does_not_retry_other_errors(http_server):
+    http_server.responses["/q"] = [(500, {}, b"broken"), (200, {}, b"[]")]
+    response, body = get(http_server, "/q")
+    assert response.status_code == 500
+    assert len(http_server.requests) == 1
+
+
+def test_read_timeout_is_not_retried(http_server, monkeypatch):
+    # A query that stalls past the timeout would only stall again; the caller
+    # falls back to its cached result instead.
+    monkeypatch.setattr(client, "READ_TIMEOUT", 0.2)
+    http_server.responses["/q"] = [(200, {}, b"[]", 1), (200, {}, b"[]")]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        get(http_server, "/q")
+    assert len(http_server.requests) == 1
+
+
+def test_records_timing_and_asks_for_compression(http_server):
+    http_server.responses["/q"] = [(200, {}, b'[{"A": 1}]')]
+    response, body = get(http_server, "/q")
+    timing = client.recent_timings[-1]
+    assert timing is response.timing
+    assert timing.url == http_server.url("/q")
+    assert timing.status == 200
+    assert timing.body_bytes == len(body) == 10
+    assert 0 <= timing.headers_seconds <= timing.total_seconds
+    assert timing.encoding == "identity"
+    assert "gzip" in http_server.requests[0][1]["Accept-Encoding"]
+
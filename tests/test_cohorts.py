@@ -0,0 +1,81 @@
+"""``dashboard.cohorts`` against plain pandas, and the rollups' tables against ``dashboard.cohorts``."""
+
+import pandas as pd
+
+from dashboard import cohorts, swaps
+from dashboard.swaps import BLOCK_TIMESTAMP, CHAIN, SENDER
+
+
+def weekly_wallets(frame):
+    """The distinct (``CHAIN``, ``SENDER``, ``WEEK``) of ``frame``'s swaps."""
+    frame = frame.astype({CHAIN: str, SENDER: str})
+    times = frame[BLOCK_TIMESTAMP]
+    frame["WEEK"] = times.dt.normalize() - pd.to_timedelta(times.dt.weekday, unit="D")
+    return frame[[CHAIN, SENDER, "WEEK"]].drop_duplicates()
+
+
+def reference_retention(frame):
+    active = weekly_wallets(frame)
+    active["COHORT"] = active.groupby([CHAIN, SENDER])["WEEK"].transform("min")
+    active["WEEKS_SINCE"] = (active["WEEK"] - active["COHORT"]).dt.days // 7
+    sizes = active[active["WEEKS_SINCE"] == 0].groupby([CHAIN, "COHORT"]).size().rename("COHORT_SIZE")
+    counts = active.groupby([CHAIN, "COHORT", "WEEKS_SINCE"]).size().rename("ACTIVE_USERS")
+    # Every offset each cohort has reached by the latest week, swaps or not.
+    reached = (active["WEEK"].max() - sizes.index.get_level_values("COHORT")).days // 7
+    rows = sizes.reset_index().loc[lambda table: table.index.repeat(reached + 1)]
+    rows["WEEKS_SINCE"] = rows.groupby([CHAIN, "COHORT"]).cumcount()
+    table = rows.join(counts, on=[CHAIN, "COHORT", "WEEKS_SINCE"]).fillna({"ACTIVE_USERS": 0})
+    table["RETENTION"] = 100 * table["ACTIVE_USERS"] / table["COHORT_SIZE"]
+    return table.rename(columns={"COHORT": "WEEK"})
+
+
+def ordered(table, keys):
+    return table.astype({CHAIN: str}).sort_values(keys, ignore_index=True)[sorted(table.columns)]
+
+
+def test_retention_matches_pandas(tmp_path, make_swaps):
+    swaps.append(tmp_path, make_swaps("2024-01-03", 60, 20_000))
+    frame = swaps.read(tmp_path, cohorts.COLUMNS)
+    keys = [CHAIN, "WEEK", "WEEKS_SINCE"]
+    pd.testing.assert_frame_equal(ordered(cohorts.retention(frame), keys),
+                                  ordered(reference_retention(frame), keys),
+                                  check_dtype=False, check_index_type=False)
+
+
+def test_rollup_retention_matches_full_recompute(fold_batches):
+    for state, _, folded in fold_batches():
+        pd.testing.assert_frame_equal(state.retention(), cohorts.retention(folded),
+                                      check_dtype=False, check_categorical=False)
+
+
+def reference_overlap(frame):
+    active = weekly_wallets(frame)
+    wallets = active.groupby(["WEEK", CHAIN])[SENDER].agg(set)
+    rows = []
+    for (week, chain), senders in wallets.items():
+        for other, other_senders in wallets[week].items():
+            if other != chain:
+                common = len(senders & other_senders)
+                rows.append({"WEEK": week, CHAIN: chain, "OTHER_CHAIN": other, "ACTIVE_USERS": len(senders),
+                             "SHARED_USERS": common, "SHARE": 100 * common / len(senders)})
+    return pd.DataFrame(rows)
+
+
+def test_overlap_matches_sets(tmp_path, make_swaps):
+    swaps.append(tmp_path, make_swaps("2024-01-03", 60, 20_000))
+    frame = swaps.read(tmp_path, cohorts.COLUMNS)
+    keys = ["WEEK", CHAIN, "OTHER_CHAIN"]
+    got = cohorts.overlap(frame).astype({"OTHER_CHAIN": str})
+    pd.testing.assert_frame_equal(ordered(got, keys), ordered(reference_overlap(frame), keys),
+                                  check_dtype=False, check_index_type=False)
+
+    chains, _, counts = cohorts.patterns(frame)
+    wallets = weekly_wallets(frame).groupby(["WEEK", CHAIN])[SENDER].agg(set).unstack(CHAIN)
+    on_all = [len(set.intersection(*row)) for row in wallets[list(chains)].itertuples(index=False)]
+    assert cohorts.shared(counts, range(len(chains))).tolist() == on_all
+
+
+def test_rollup_overlap_matches_full_recompute(fold_batches):
+    for state, _, folded in fold_batches():
+        pd.testing.assert_frame_equal(state.overlap(), cohorts.overlap(folded),
+                                      check_dtype=False, check_categorical=False)
@@ -0,0 +1,62 @@
+"""``dashboard.derived`` columns against the math the pages used to do."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import derived, registry, schema
+from dashboard.transforms import CHAINS
+
+
+def prepare(name, frame):
+    return derived.add_derived(registry.QUERIES[name], schema.apply_schema(frame, schema.SCHEMAS[name]))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+def test_df1_percentage_of_each_chains_wallets(rng):
+    frame = pd.DataFrame({
+        "CHAIN": rng.choice(CHAINS, 60),
+        "TRANSACTION_CATEGORY": rng.choice(["1 swap", "2-5 swaps", "6+ swaps"], 60),
+        "NUM_WALLETS": rng.integers(1, 10_000, 60),
+    })
+    old = frame.copy()
+    old["PERCENTAGE"] = old.groupby("CHAIN")["NUM_WALLETS"].transform(lambda x: x / x.sum() * 100)
+    frame = prepare("df1", frame)
+    np.testing.assert_allclose(frame["PERCENTAGE"], old["PERCENTAGE"])
+    np.testing.assert_allclose(frame.groupby("CHAIN", observed=True)["PERCENTAGE"].sum(), 100)
+
+
+def test_df10_formatted_volume():
+    frame = pd.DataFrame({
+        "CHAIN": ["Base", "Base", "Optimism"],
+        "day": ["Mon", "Tue", "Mon"],
+        "hour": [0, 13, 23],
+        "volume": [0.4, 1234567.5, 999.9],
+    })
+    old = [f"${volume:,.0f}" for volume in frame["volume"]]
+    assert list(prepare("df10", frame)["volume_usd"]) == old == ["$0", "$1,234,568", "$1,000"]
+
+
+def test_df21_share_of_each_weeks_volume_per_chain(rng):
+    weeks = pd.date_range("2024-01-01", periods=8, freq="W-MON").strftime("%Y-%m-%d")
+    frame = pd.DataFrame({
+        "WEEK": rng.choice(weeks, 200),
+        "CHAIN": rng.choice(CHAINS, 200),
+        "DEX": rng.choice(["uniswap", "sushiswap", "curve", "balancer"], 200),
+        "SWAP_VOLUME": rng.uniform(0, 1e7, 200),
+    })
+    old = pd.concat(
+        part.assign(PCT_SHARE=part.groupby("WEEK")["SWAP_VOLUME"].transform(lambda x: x / x.sum() * 100))
+        for _, part in frame.groupby("CHAIN")
+    ).sort_index()
+    frame = prepare("df21", frame)
+    np.testing.assert_allclose(frame["PCT_SHARE"], old["PCT_SHARE"])
+
+
+def test_other_datasets_are_left_alone():
+    frame = pd.DataFrame({"CHAIN": ["Base"], "UNIQUE_USERS": [3]})
+    assert list(derived.add_derived(registry.QUERIES["df7"], frame.copy()).columns) == ["CHAIN", "UNIQUE_USERS"]
@@ -0,0 +1,45 @@
+"""``dashboard.fetch`` revalidation against a local stub server."""
+
+import hashlib
+import json
+
+from dashboard.fetch import fetch_frame
+from dashboard.schema import SCHEMAS
+
+ROWS = [{"CHAIN": "Base", "AVG_GAS_USD": 0.02}, {"CHAIN": "Optimism", "AVG_GAS_USD": 0.05}]
+BODY = json.dumps(ROWS).encode()
+
+
+def test_not_modified_is_unchanged(http_server):
+    http_server.responses["/q"] = [
+        (200, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, BODY),
+        (304, {"ETag": '"v1"'}, b""),
+    ]
+    frame = fetch_frame(http_server.url("/q"), schema=SCHEMAS["df2"])
+    assert frame.to_dict("records") == ROWS
+    assert frame["CHAIN"].dtype == "category"
+    assert frame.attrs["version"] == hashlib.sha256(BODY).hexdigest()
+    assert frame.attrs["etag"] == '"v1"'
+    assert frame.attrs["ingest"]["rows"] == 2
+
+    assert fetch_frame(http_server.url("/q"), frame) is None
+    _, headers = http_server.requests[-1]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_same_payload_without_validators_is_unchanged(http_server):
+    http_server.responses["/q"] = [(200, {}, BODY)]
+    frame = fetch_frame(http_server.url("/q"))
+    assert "If-None-Match" not in http_server.requests[-1][1]
+    assert fetch_frame(http_server.url("/q"), frame) is None
+
+
+def test_changed_payload_is_a_new_frame(http_server):
+    changed = json.dumps(ROWS[:1]).encode()
+    http_server.responses["/q"] = [(200, {"ETag": '"v1"'}, BODY), (200, {"ETag": '"v2"'}, changed)]
+    frame = fetch_frame(http_server.url("/q"))
+    new = fetch_frame(http_server.url("/q"), frame)
+    assert new.to_dict("records") == ROWS[:1]
+    assert new.attrs["version"] == hashlib.sha256(changed).hexdigest()
+    assert new.attrs["etag"] == '"v2"'
@@ -0,0 +1,88 @@
+"""``dashboard.figures`` memoisation: hits, misses and eviction."""
+
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from dashboard import figures
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    figures.clear()
+    yield
+    figures.clear()
+
+
+def dataset(version, values=(1, 2, 3)):
+    frame = pd.DataFrame({"CHAIN": ["Base", "Optimism", "Base"], "VALUE": list(values)})
+    frame.attrs["version"] = version
+    return frame
+
+
+@pytest.fixture
+def builds():
+    calls = []
+
+    @figures.cached_figures
+    def bar(frame, title):
+        calls.append((frame.attrs.get("version"), title))
+        return go.Figure(go.Bar(x=frame["CHAIN"], y=frame["VALUE"]), layout={"title": title})
+
+    bar.calls = calls
+    return bar
+
+
+def test_same_version_is_a_hit(builds):
+    first = builds(dataset("v1"), "Volume")
+    assert builds(dataset("v1"), "Volume") is first
+    assert builds.calls == [("v1", "Volume")]
+
+
+def test_keyed_on_version_not_contents(builds):
+    builds(dataset("v1"), "Volume")
+    # The version stands for the contents, which aren't hashed again.
+    builds(dataset("v1", (7, 8, 9)), "Volume")
+    builds(dataset("v2"), "Volume")
+    assert builds.calls == [("v1", "Volume"), ("v2", "Volume")]
+
+
+def test_slices_and_plain_arguments_are_part_of_the_key(builds):
+    frame = dataset("v1")
+    builds(frame, "Volume")
+    builds(frame[frame["CHAIN"] == "Base"], "Volume")
+    builds(frame[["VALUE", "CHAIN"]], "Volume")
+    builds(frame, "Swaps")
+    assert len(builds.calls) == 4
+
+
+def test_frames_without_a_version_are_keyed_on_contents(builds):
+    frame = dataset("v1")
+    frame.attrs.clear()
+    builds(frame, "Volume")
+    builds(frame.copy(), "Volume")
+    builds(frame.assign(VALUE=[4, 5, 6]), "Volume")
+    assert builds.calls == [(None, "Volume"), (None, "Volume")]
+
+
+def test_evicts_the_least_recently_used(builds, monkeypatch):
+    monkeypatch.setattr(figures, "MAX_FIGURES", 2)
+    builds(dataset("v1"), "Volume")
+    builds(dataset("v2"), "Volume")
+    builds(dataset("v1"), "Volume")
+    builds(dataset("v3"), "Volume")
+    assert len(figures._cache) == 2
+    builds(dataset("v1"), "Volume")
+    builds(dataset("v2"), "Volume")
+    assert [version for version, _ in builds.calls] == ["v1", "v2", "v3", "v2"]
+
+
+def test_counts_hits_and_misses(builds):
+    label = "test_figures.py:builds.<locals>.bar"
+    before = dict(figures.metrics.figure_requests.values)
+    builds(dataset("v1"), "Volume")
+    builds(dataset("v1"), "Volume")
+    builds(dataset("v1"), "Volume")
+    counts = figures.metrics.figure_requests.values
+    assert counts[(label, "miss")] - before.get((label, "miss"), 0) == 1
+    assert counts[(label, "hit")] - before.get((label, "hit"), 0) == 2
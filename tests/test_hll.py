@@ -0,0 +1,53 @@
+"""``dashboard.hll`` estimates within their error bounds, and merges as unions."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import hll, rollup, swaps
+from dashboard.swaps import BLOCK_TIMESTAMP, CHAIN, SENDER
+
+# Three standard errors.
+BOUND = 3 * 1.04 / np.sqrt(1 << hll.P)
+
+
+def addresses(start, n):
+    return [f"0x{wallet:040x}" for wallet in range(start, start + n)]
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 30_000, 200_000])
+def test_estimate_within_bound(n):
+    estimate = float(hll.estimate(hll.sketch(addresses(0, n))))
+    assert abs(estimate - n) <= BOUND * n
+
+
+def test_merge_is_the_sketch_of_the_union():
+    first, second = hll.sketch(addresses(0, 50_000)), hll.sketch(addresses(30_000, 50_000))
+    merged = hll.merge(np.array([first, second]))
+    assert (merged == hll.sketch(addresses(0, 80_000))).all()
+    assert abs(float(hll.estimate(merged)) - 80_000) <= BOUND * 80_000
+
+
+def test_rollup_distinct_users_within_bound(fold_batches):
+    for state, stored, _ in fold_batches():
+        days = stored[BLOCK_TIMESTAMP].dt.floor("D")
+        for chains, first, last in [(None, None, None), (["base"], "2024-01-10", "2024-01-25"),
+                                    (["arbitrum", "optimism"], "2024-02-01", None)]:
+            rows = pd.Series(True, index=stored.index)
+            if chains is not None:
+                rows &= stored[CHAIN].isin(chains)
+            if first is not None:
+                rows &= days >= pd.Timestamp(first)
+            if last is not None:
+                rows &= days <= pd.Timestamp(last)
+            exact = stored.loc[rows, SENDER].nunique()
+            assert abs(state.distinct_users(chains, first, last) - exact) <= BOUND * exact
+
+
+def test_all_chains_after_asking_for_one(tmp_path, make_swaps):
+    swaps.append(tmp_path, make_swaps("2024-01-03", 10, 5_000, wallets=50_000))
+    rollup.WeeklyRollup(tmp_path).update()
+    everywhere = rollup.WeeklyRollup(tmp_path).distinct_users()
+    state = rollup.WeeklyRollup(tmp_path)
+    assert state.distinct_users(["base"]) < everywhere
+    assert state.distinct_users() == everywhere
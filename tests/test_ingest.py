@@ -0,0 +1,132 @@
+"""``dashboard.ingest.read_records`` against ``pd.read_json``."""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import ingest
+
+
+def read(records, chunk_size=ingest.CHUNK_SIZE, **kwargs):
+    body = json.dumps(records, ensure_ascii=False).encode() if not isinstance(records, bytes) else records
+    frame, stats = ingest.read_records(io.BytesIO(body), chunk_size=chunk_size, **kwargs)
+    assert stats.bytes_read == len(body)
+    assert stats.rows == len(frame)
+    return frame
+
+
+def expected(records):
+    return pd.read_json(io.StringIO(json.dumps(records)))
+
+
+@pytest.fixture
+def response():
+    """A result shaped like Flipside's: labels, counts, amounts, dates and gaps."""
+    rng = np.random.default_rng(3)
+    n = 500
+    chains = ["Arbitrum", "Avalanche", "Base", "BSC", "Optimism", "Polygon"]
+    records = []
+    for i in range(n):
+        record = {
+            "DATE": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} 00:00:00.000",
+            "WEEK": f"2024-01-{1 + i % 28:02d}T00:00:00.000Z",
+            "CHAIN": chains[i % 6],
+            "TOKEN": "WETH" if i % 3 else "USDC.e",
+            "SWAP_COUNT": int(rng.integers(0, 10**6)),
+            "SWAP_VOLUME": float(rng.lognormal(10, 3)),
+            "AVG_GAS_USD": None if i % 50 == 0 else float(rng.random()),
+            "IS_STABLE": bool(i % 2),
+        }
+        records.append(record)
+    return records
+
+
+@pytest.fixture(params=[1, 3, ingest.BATCH_ROWS])
+def batch_rows(request, monkeypatch):
+    monkeypatch.setattr(ingest, "BATCH_ROWS", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_matches_read_json(response, batch_rows, chunk_size):
+    pd.testing.assert_frame_equal(read(response, chunk_size), expected(response))
+
+
+def test_multibyte_characters_split_across_reads(batch_rows):
+    records = [{"TOKEN": "Ⓜ️ü€", "LABEL": "日本"}, {"TOKEN": "🦄", "LABEL": "plain"}]
+    body = json.dumps(records, ensure_ascii=False).encode()
+    for chunk_size in (1, 2, 3, 5):
+        frame = read(body, chunk_size)
+        assert frame.to_dict("records") == records
+
+
+@pytest.mark.parametrize("values", [
+    [1, 2, 3],
+    [1, None, 3],
+    [1.5, 2, None],
+    [1, 2.0],
+    [True, False],
+    [True, None, False],
+    [True, 2],
+    ["1", 2],
+    ["1", "2"],
+    ["1.5", "2"],
+    ["007", "008"],
+    ["1", None],
+    ["a", None],
+    ["0x1f", "0x2a"],
+    ["a", True],
+    [None, None],
+    [2**63, 1],
+], ids=repr)
+def test_coerces_like_read_json(values, batch_rows):
+    records = [{"C": value} for value in values]
+    pd.testing.assert_frame_equal(read(records), expected(records))
+
+
+def test_columns_typed_differently_per_batch(monkeypatch):
+    monkeypatch.setattr(ingest, "BATCH_ROWS", 2)
+    records = [{"C": value} for value in [1, 2, 3.5, 4, None, None, "5", 6]]
+    pd.testing.assert_frame_equal(read(records), expected(records))
+
+
+def test_missing_keys(batch_rows):
+    records = [
+        {"CHAIN": "Base", "SWAPS": 1},
+        {"CHAIN": "Optimism"},
+        {"CHAIN": "Base", "SWAPS": 3, "POOLS": 2},
+        {"SWAPS": 4, "POOLS": None},
+    ]
+    frame = read(records)
+    assert list(frame.columns) == ["CHAIN", "SWAPS", "POOLS"]
+    pd.testing.assert_frame_equal(frame, expected(records))
+
+
+def test_nested_values(batch_rows):
+    records = [
+        {"CHAIN": "Base", "PATH": ["WETH", "USDC"], "META": {"fee": 500}},
+        {"CHAIN": "Base", "PATH": ["USDC", "DAI"], "META": {"fee": 100}},
+        {"CHAIN": "Optimism", "PATH": ["OP"], "META": None},
+    ]
+    frame = read(records)
+    assert frame["PATH"].tolist() == [["WETH", "USDC"], ["USDC", "DAI"], ["OP"]]
+    assert frame["META"].tolist()[:2] == [{"fee": 500}, {"fee": 100}]
+    pd.testing.assert_frame_equal(frame, expected(records))
+
+
+def test_dtypes_are_applied_as_given():
+    frame = read([{"N": 1}, {"N": 2}], dtypes={"N": "int32"})
+    assert frame["N"].dtype == np.int32
+
+
+def test_empty_array():
+    assert read([]).empty
+
+
+@pytest.mark.parametrize("body", [b'{"CHAIN": "Base"}', b'[{"CHAIN": "Base"}', b'[{"CHAIN": "Ba'])
+def test_malformed(body):
+    with pytest.raises(ValueError):
+        ingest.read_records(io.BytesIO(body), chunk_size=4)
@@ -0,0 +1,115 @@
+"""``dashboard.metrics`` names, labels and the Prometheus text format."""
+
+import math
+
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from dashboard import figures, metrics
+from dashboard.registry import QUERIES
+
+NAMES = {
+    "uniswap_l2_fetch_seconds": "histogram",
+    "uniswap_l2_fetch_bytes": "histogram",
+    "uniswap_l2_fetch_rows": "histogram",
+    "uniswap_l2_ingest_seconds": "histogram",
+    "uniswap_l2_fetch": "counter",
+    "uniswap_l2_dataset_requests": "counter",
+    "uniswap_l2_figure_build_seconds": "histogram",
+    "uniswap_l2_figure_serialize_seconds": "histogram",
+    "uniswap_l2_figure_json_bytes": "histogram",
+    "uniswap_l2_figure_requests": "counter",
+    "uniswap_l2_stage_seconds": "histogram",
+    "uniswap_l2_dataset_age_seconds": "gauge",
+    "uniswap_l2_dataset_unchanged_seconds": "gauge",
+}
+
+
+@pytest.fixture
+def registered():
+    """Metrics created in a test are unregistered after it."""
+    before = list(metrics._metrics)
+    yield
+    metrics._metrics[:] = before
+
+
+def samples(text):
+    """``{name{labels}: value}`` for the sample lines of ``text``."""
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_every_metric_is_declared():
+    text = metrics.render()
+    for name, kind in NAMES.items():
+        assert f"# TYPE {name} {kind}\n" in text
+        assert f"# HELP {name} " in text
+
+
+def test_counter(registered):
+    counter = metrics.Counter("test_requests", "Requests.", ["query", "result"])
+    counter.inc(query="df1", result="hit")
+    counter.inc(2, query="df1", result="hit")
+    counter.inc(query='say "hi"\n', result="miss")
+    values = samples(metrics.render())
+    assert values['test_requests_total{query="df1",result="hit"}'] == "3"
+    assert values['test_requests_total{query="say \\"hi\\"\\n",result="miss"}'] == "1"
+
+
+def test_histogram(registered):
+    histogram = metrics.Histogram("test_seconds", "Seconds.", ["stage"], buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage="load")
+    values = samples(metrics.render())
+    assert values['test_seconds_bucket{stage="load",le="0.1"}'] == "2"
+    assert values['test_seconds_bucket{stage="load",le="1"}'] == "3"
+    assert values['test_seconds_bucket{stage="load",le="+Inf"}'] == "4"
+    assert values['test_seconds_count{stage="load"}'] == "4"
+    assert float(values['test_seconds_sum{stage="load"}']) == pytest.approx(3.65)
+    count, total, p50, p95 = histogram.summary()[("load",)]
+    assert (count, p50, p95) == (4, 0.1, math.inf)
+
+
+def test_gauge(registered):
+    metrics.Gauge("test_age_seconds", "Age.", ["query"], lambda: {("df1",): 12.5})
+    assert samples(metrics.render())['test_age_seconds{query="df1"}'] == "12.5"
+
+
+def test_observe_fetch():
+    query = QUERIES["df7"]
+    before = samples(metrics.render())
+    frame = pd.DataFrame({"CHAIN": ["Base", "Optimism"]})
+    frame.attrs["ingest"] = {"bytes": 2048, "seconds": 0.01}
+    metrics.observe_fetch(query, frame, 0.2)
+    metrics.observe_fetch(query, None, 0.1)
+    after = samples(metrics.render())
+
+    def delta(sample):
+        return float(after[sample]) - float(before.get(sample, 0))
+
+    assert delta('uniswap_l2_fetch_total{query="df7",result="changed"}') == 1
+    assert delta('uniswap_l2_fetch_total{query="df7",result="unchanged"}') == 1
+    assert delta('uniswap_l2_fetch_seconds_count{query="df7"}') == 2
+    assert delta('uniswap_l2_fetch_rows_sum{query="df7"}') == 2
+    assert delta('uniswap_l2_fetch_bytes_sum{query="df7"}') == 2048
+    assert delta('uniswap_l2_ingest_seconds_count{query="df7"}') == 1
+
+
+def test_figure_builds_are_serialised_on_a_sample(monkeypatch):
+    monkeypatch.setattr(figures, "SERIALIZE_EVERY", 3)
+    figures.clear()
+
+    @figures.cached_figures
+    def bar(frame):
+        return go.Figure(go.Bar(x=frame["CHAIN"], y=frame["VALUE"]))
+
+    label = "test_metrics.py:test_figure_builds_are_serialised_on_a_sample.<locals>.bar"
+    for version in range(7):
+        frame = pd.DataFrame({"CHAIN": ["Base"], "VALUE": [version]})
+        frame.attrs["version"] = version
+        bar(frame)
+    figures.clear()
+    assert metrics.figure_seconds.summary()[(label,)][0] == 7
+    # The first build, then every third.
+    assert metrics.figure_serialize_seconds.summary()[(label,)][0] == 3
+    assert metrics.figure_bytes.summary()[(label,)][0] == 3
@@ -0,0 +1,53 @@
+"""``dashboard.quantiles`` sketches within ``ACCURACY`` of the exact quantiles."""
+
+import numpy as np
+import pytest
+
+from dashboard import quantiles, rollup, swaps
+from dashboard.swaps import AMOUNT_USD, CHAIN
+
+Q = [0, 0.01, 0.25, 0.5, 0.9, 0.99, 1]
+
+
+def assert_within_accuracy(got, exact):
+    # A little slack for rounding in the bucket boundaries.
+    assert np.all(np.abs(got - exact) <= quantiles.ACCURACY * 1.000001 * np.abs(exact))
+
+
+@pytest.mark.parametrize("n", [1, 2, 101, 50_000])
+def test_quantiles_within_accuracy(n):
+    amounts = np.random.default_rng(n).lognormal(4, 3, n)
+    assert_within_accuracy(quantiles.quantile(quantiles.sketch(amounts), Q), np.quantile(amounts, Q))
+
+
+def test_median_of_an_even_count_is_the_midpoint():
+    assert_within_accuracy(quantiles.quantile(quantiles.sketch([10.0, 20.0]), 0.5), 15.0)
+    assert_within_accuracy(quantiles.quantile(quantiles.sketch([1.0, 2.0, 3.0, 400.0]), 0.5), 2.5)
+
+
+def test_empty_sketch_is_nan():
+    assert np.isnan(quantiles.quantile(quantiles.sketch([np.nan]), 0.5))
+
+
+def test_rollup_swap_sizes_within_accuracy(fold_batches):
+    for state, stored, _ in fold_batches():
+        amounts = stored[AMOUNT_USD].to_numpy()
+        assert_within_accuracy(state.swap_sizes(Q), np.nanquantile(amounts, Q))
+        on_base = (stored[CHAIN] == "base").to_numpy()
+        if on_base.any():
+            assert_within_accuracy(state.swap_sizes(Q, chains=["base"]), np.nanquantile(amounts[on_base], Q))
+
+        summary = state.summary(by_chain=True).set_index(CHAIN)
+        exact = stored.groupby(stored[CHAIN].astype(str))[AMOUNT_USD].agg(["sum", "mean", "median"])
+        assert np.allclose(summary["VOLUME"], exact["sum"])
+        assert np.allclose(summary["AVG_SWAP_SIZE_USD"], exact["mean"])
+        assert_within_accuracy(summary["MEDIAN_SWAP_SIZE_USD"].to_numpy(), exact["median"].to_numpy())
+
+
+def test_all_chains_after_asking_for_one(tmp_path, make_swaps):
+    swaps.append(tmp_path, make_swaps("2024-01-03", 10, 5_000))
+    rollup.WeeklyRollup(tmp_path).update()
+    everywhere = rollup.WeeklyRollup(tmp_path).swap_sizes(Q)
+    state = rollup.WeeklyRollup(tmp_path)
+    assert not np.array_equal(state.swap_sizes(Q, chains=["base"]), everywhere)
+    assert np.array_equal(state.swap_sizes(Q), everywhere)
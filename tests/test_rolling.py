@@ -0,0 +1,53 @@
+"""``dashboard.rolling`` against summing the window's swaps again from scratch."""
+
+import numpy as np
+import pandas as pd
+
+from dashboard import rolling
+from dashboard.swaps import AMOUNT_USD, BLOCK_TIMESTAMP, CHAIN
+
+
+def rescan(times, amounts, latest):
+    """The weekday × hour grid of the swaps in the window ending on day ``latest``."""
+    hours = np.asarray(times, dtype="datetime64[h]").astype(np.int64)
+    days = hours // rolling.HOURS
+    keep = (days > latest - rolling.WINDOW_DAYS) & ~np.isnan(amounts)
+    grid = np.zeros((len(rolling.WEEKDAYS), rolling.HOURS))
+    np.add.at(grid, (rolling.weekday(days[keep]), hours[keep] % rolling.HOURS), amounts[keep])
+    return grid
+
+
+def test_matches_rescan_after_every_batch(make_swaps):
+    volume = rolling.HourlyVolume()
+    start = np.datetime64("2024-01-03")
+    batches = []
+    for batch in range(20):
+        # Batches of four days, two of them overlapping the one before.
+        batches.append(make_swaps(start + 2 * batch, 4, 2_000))
+        volume.add(batches[-1][BLOCK_TIMESTAMP].to_numpy(), batches[-1][AMOUNT_USD].to_numpy())
+        frame = pd.concat(batches)
+        expected = rescan(frame[BLOCK_TIMESTAMP].to_numpy(), frame[AMOUNT_USD].to_numpy(), volume.latest)
+        assert np.allclose(volume.grid, expected)
+        assert (volume.grid[expected == 0] == 0).all()
+        # And rebuilt from the saved slabs.
+        assert np.allclose(rolling.HourlyVolume(volume.slabs.copy(), volume.days.copy()).grid, expected)
+
+
+def test_dropped_days_leave_no_residue():
+    volume = rolling.HourlyVolume()
+    monday = np.datetime64("2024-01-01T00", "h")
+    # 0.1 + 0.7 - 0.7 - 0.1 is slightly below zero in floating point.
+    volume.add([monday, monday + np.timedelta64(7 * 24, "h")], [0.1, 0.7])
+    volume.add([monday + np.timedelta64(60 * 24, "h")], [1.0])
+    assert volume.grid[0, 0] == 0
+    assert (volume.grid >= 0).all()
+
+
+def test_rollup_grid_matches_rescan(fold_batches):
+    for state, stored, _ in fold_batches():
+        for chain, cells in state.hourly_volume().groupby(CHAIN):
+            on_chain = stored[stored[CHAIN] == chain]
+            times = on_chain[BLOCK_TIMESTAMP].to_numpy()
+            latest = int(times.max().astype("datetime64[D]").astype(np.int64))
+            expected = rescan(times, on_chain[AMOUNT_USD].to_numpy(), latest)
+            assert np.allclose(cells["volume"].to_numpy().reshape(expected.shape), expected)
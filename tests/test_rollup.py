@@ -0,0 +1,35 @@
+"""``dashboard.rollup`` against a full recompute from the store after every batch."""
+
+import pandas as pd
+
+from dashboard import aggregate, rollup, swaps
+from tests.conftest import CHAINS, append_empty
+
+
+def assert_tables_equal(got, expected):
+    assert got.keys() == expected.keys()
+    for name in expected:
+        pd.testing.assert_frame_equal(got[name], expected[name], check_dtype=False, check_categorical=False)
+
+
+def test_updates_match_full_recompute(fold_batches):
+    for batch, (state, stored, folded) in enumerate(fold_batches()):
+        assert_tables_equal(state.tables(), aggregate.weekly(folded))
+        late = sum(watermark.late_swaps for watermark in state.watermarks().values())
+        assert late == (20 if batch >= 4 else 0)
+
+    # A rebuild takes the late swaps in too.
+    state.rebuild()
+    state.update()
+    assert_tables_equal(state.tables(), aggregate.weekly(stored))
+
+
+def test_empty_first_fold(tmp_path, make_swaps):
+    append_empty(tmp_path, CHAINS[0])
+    state = rollup.WeeklyRollup(tmp_path)
+    assert state.update() == {CHAINS[0]: 0}
+    assert not (state.folder / CHAINS[0] / "state.json").exists()
+
+    swaps.append(tmp_path, make_swaps("2024-01-03", 9, 1_000))
+    state.update()
+    assert_tables_equal(state.tables(), aggregate.weekly(swaps.read(tmp_path)))
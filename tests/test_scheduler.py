@@ -0,0 +1,113 @@
+"""``python -m dashboard.scheduler --once`` against a local stub of the Flipside API."""
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dashboard import registry, scheduler, store
+
+RESULTS = {
+    "df2": [{"CHAIN": "arbitrum", "AVG_GAS_USD": 0.12}, {"CHAIN": "optimism", "AVG_GAS_USD": 0.08}],
+    "df9": [{"CHAIN": "base", "CATEGORY": "dex", "TXN_COUNT": 42}],
+}
+
+
+class StubAPI(ThreadingHTTPServer):
+    """Serves ``RESULTS`` by query id with ETags, and ``fail`` as that many 503s or, for -1, 500s."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.bodies = {registry.QUERIES[name].id: json.dumps(rows).encode() for name, rows in RESULTS.items()}
+        self.fail = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/{{}}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query_id = self.path.strip("/")
+        self.server.requests.append((query_id, self.headers.get("If-None-Match")))
+        failures = self.server.fail.get(query_id, 0)
+        if failures:
+            self.server.fail[query_id] = failures - 1 if failures > 0 else failures
+            self.send_response(503 if failures > 0 else 500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = self.server.bodies[query_id]
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(registry, "source", registry.source)
+    registry.cache.clear()
+    server = StubAPI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    registry.cache.clear()
+
+
+def ids(*names):
+    return [registry.QUERIES[name].id for name in names]
+
+
+def test_once_fetches_then_revalidates_with_etags(api):
+    assert scheduler.main(["--once", "--api-url", api.url, "df2", "df9"]) == 0
+    first = {name: registry.cache.entry(registry.QUERIES[name]) for name in RESULTS}
+    assert first["df2"].frame["AVG_GAS_USD"].tolist() == [0.12, 0.08]
+    assert first["df9"].frame["TXN_COUNT"].tolist() == [42]
+    assert sorted(api.requests) == sorted((query_id, None) for query_id in ids("df2", "df9"))
+    assert len(list(store.CACHE_DIR.glob("*/*.parquet"))) == 2
+    fetched_at = {name: entry.fetched_at for name, entry in first.items()}
+
+    api.requests.clear()
+    assert scheduler.warm_all(["df2", "df9"]) == []
+    assert all(etag is not None for _, etag in api.requests)
+    for name, entry in first.items():
+        # Answered 304: the same entry, checked again but not refetched.
+        assert registry.cache.entry(registry.QUERIES[name]) is entry
+        assert entry.fetched_at == fetched_at[name]
+
+
+def test_retries_unavailable_and_reports_failures(api):
+    flaky, broken = ids("df2", "df9")
+    api.fail = {flaky: 1, broken: -1}
+    assert scheduler.main(["--once", "--api-url", api.url, "df2", "df9"]) == 1
+    assert [query_id for query_id, _ in api.requests].count(flaky) == 2
+    assert registry.cache.entry(registry.QUERIES["df2"]) is not None
+    assert registry.cache.entry(registry.QUERIES["df9"]) is None
+
+    api.fail = {}
+    assert scheduler.warm_all(["df9"]) == []
+    assert registry.cache.entry(registry.QUERIES["df9"]) is not None
+
+
+def test_api_url_and_source_are_exclusive(api, capsys):
+    with pytest.raises(SystemExit):
+        scheduler.main(["--once", "--api-url", api.url, "--source", "fixtures:."])
+    assert "not allowed with argument" in capsys.readouterr().err
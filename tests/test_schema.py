@@ -0,0 +1,75 @@
+"""``dashboard.schema`` dtypes for the registered datasets."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import schema
+
+
+def result():
+    return pd.DataFrame({
+        "WEEK": ["2024-01-01", "2024-01-08", "2024-01-15"],
+        "CHAIN": ["Base", "Optimism", "Base"],
+        "ACTIVE_USERS": [12, 70_000, 3],
+        "SWAP_COUNT": [5.0, np.nan, 7.0],
+    })
+
+
+def test_converts_each_kind():
+    frame = schema.apply_schema(result(), schema.SCHEMAS["df22"])
+    assert isinstance(frame["CHAIN"].dtype, pd.CategoricalDtype)
+    assert list(frame["CHAIN"]) == ["Base", "Optimism", "Base"]
+    assert frame["ACTIVE_USERS"].dtype == np.int32
+    assert frame["WEEK"].dtype.kind == "M"
+    assert frame["WEEK"].iloc[1] == pd.Timestamp("2024-01-08")
+
+
+@pytest.mark.parametrize("values, dtype", [
+    ([1, 100], np.int8),
+    ([1, 200], np.int16),
+    ([-40_000, 1], np.int32),
+    ([1, 2**40], np.int64),
+])
+def test_counts_downcast_to_the_smallest_integer_that_fits(values, dtype):
+    frame = pd.DataFrame({"CHAIN": ["Base", "Base"], "UNIQUE_USERS": values})
+    frame = schema.apply_schema(frame, schema.SCHEMAS["df7"])
+    assert frame["UNIQUE_USERS"].dtype == dtype
+    assert list(frame["UNIQUE_USERS"]) == values
+
+
+def test_counts_with_gaps_stay_float():
+    frame = schema.apply_schema(result(), schema.SCHEMAS["df22"])
+    assert frame["SWAP_COUNT"].dtype == np.float64
+    assert frame["SWAP_COUNT"].isna().tolist() == [False, True, False]
+
+
+def test_missing_columns_are_skipped():
+    frame = result().drop(columns=["ACTIVE_USERS"])
+    frame = schema.apply_schema(frame, schema.SCHEMAS["df22"])
+    assert list(frame.columns) == ["WEEK", "CHAIN", "SWAP_COUNT"]
+    assert isinstance(frame["CHAIN"].dtype, pd.CategoricalDtype)
+
+
+def test_unconvertible_columns_are_left_alone():
+    frame = result()
+    frame["WEEK"] = ["2024-01-01", "not a week", "2024-01-15"]
+    frame = schema.apply_schema(frame, schema.SCHEMAS["df22"])
+    assert list(frame["WEEK"]) == ["2024-01-01", "not a week", "2024-01-15"]
+    assert isinstance(frame["CHAIN"].dtype, pd.CategoricalDtype)
+
+
+def test_records_memory_before_and_after():
+    labels = pd.DataFrame({"CHAIN": ["Optimism", "Arbitrum"] * 5_000, "UNIQUE_USERS": range(10_000)})
+    before = int(labels.memory_usage(deep=True).sum())
+    frame = schema.apply_schema(labels, schema.SCHEMAS["df7"])
+    memory = frame.attrs["memory"]
+    assert memory["before"] == before
+    assert memory["after"] == int(frame.memory_usage(deep=True).sum())
+    assert memory["after"] < memory["before"]
+
+
+def test_every_schema_uses_known_kinds():
+    kinds = {schema.CATEGORY, schema.COUNT, schema.DATETIME}
+    for columns in schema.SCHEMAS.values():
+        assert set(columns.values()) <= kinds
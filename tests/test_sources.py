@@ -0,0 +1,120 @@
+"""``dashboard.sources`` backends and the copy command."""
+
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import sources, swaps
+from dashboard.registry import QUERIES
+
+
+def result():
+    return pd.DataFrame({"CHAIN": ["Base", "Optimism"], "UNIQUE_USERS": [12, 7]})
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    directory = tmp_path / "fixtures"
+    directory.mkdir()
+    (directory / "df7.json").write_text(json.dumps(result().to_dict("records")))
+    result().to_parquet(directory / f"{QUERIES['df1'].id}.parquet", index=False)
+    return directory
+
+
+def test_from_spec(tmp_path):
+    assert isinstance(sources.from_spec("flipside"), sources.FlipsideSource)
+    assert sources.from_spec("flipside:http://mirror/{}").url == "http://mirror/{}"
+    fixtures = sources.from_spec(f"fixtures:{tmp_path}")
+    assert isinstance(fixtures, sources.FixtureSource) and fixtures.directory == tmp_path
+    database = sources.from_spec(f"sqlite:{tmp_path / 'mirror.db'}")
+    assert isinstance(database, sources.SQLiteSource) and database.path == str(tmp_path / "mirror.db")
+    with pytest.raises(ValueError, match="Unknown data source"):
+        sources.from_spec("postgres:db")
+    with pytest.raises(ValueError, match="needs a location"):
+        sources.from_spec("sqlite")
+
+
+def test_from_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("UNISWAP_L2_SWAPS", raising=False)
+    monkeypatch.delenv("UNISWAP_L2_SOURCE", raising=False)
+    monkeypatch.setenv("FLIPSIDE_API_URL", "http://mirror/{}")
+    assert sources.from_environment().url == "http://mirror/{}"
+    monkeypatch.setenv("UNISWAP_L2_SOURCE", f"fixtures:{tmp_path}")
+    monkeypatch.setenv("UNISWAP_L2_SWAPS", str(tmp_path / "swaps"))
+    source = sources.from_environment()
+    assert isinstance(source, sources.AggregateSource)
+    assert isinstance(source.fallback, sources.FixtureSource)
+
+
+def test_fixtures_by_name_or_id(fixtures):
+    source = sources.FixtureSource(fixtures)
+    for name in ("df7", "df1"):
+        frame = source.read(QUERIES[name])
+        pd.testing.assert_frame_equal(frame, result())
+        assert frame.attrs["source"].startswith(str(fixtures))
+        assert source.read(QUERIES[name], frame) is None
+    with pytest.raises(FileNotFoundError):
+        source.read(QUERIES["df8"])
+
+
+def test_fetch_applies_the_schema(fixtures):
+    frame = sources.FixtureSource(fixtures).fetch(QUERIES["df7"])
+    assert isinstance(frame["CHAIN"].dtype, pd.CategoricalDtype)
+    assert frame["UNIQUE_USERS"].dtype == np.int8
+
+
+def test_sqlite_round_trip(tmp_path):
+    source = sources.SQLiteSource(tmp_path / "mirror.db")
+    query = QUERIES["df7"]
+    with pytest.raises(LookupError):
+        source.read(query)
+    source.write(query, result())
+    frame = source.read(query)
+    pd.testing.assert_frame_equal(frame, result())
+    assert source.read(query, frame) is None
+    source.write(query, result().assign(UNIQUE_USERS=[13, 7]))
+    assert list(source.read(query, frame)["UNIQUE_USERS"]) == [13, 7]
+
+
+def test_aggregate_serves_local_queries_and_falls_back(tmp_path, fixtures, make_swaps):
+    store = tmp_path / "swaps"
+    swaps.append(store, make_swaps("2024-01-01", 21, 2_000))
+    source = sources.AggregateSource(store, sources.FixtureSource(fixtures))
+    weekly = source.read(QUERIES["df22"])
+    assert weekly.attrs["source"] == f"swaps:{store}"
+    assert len(weekly) and weekly["SWAP_COUNT"].sum() == 2_000
+    assert source.read(QUERIES["df22"], weekly) is None
+    assert source.read(QUERIES["df1"]).attrs["source"] == str(fixtures / f"{QUERIES['df1'].id}.parquet")
+    assert not source.persists(QUERIES["df22"])
+    swaps.append(store, make_swaps("2024-01-22", 7, 500))
+    assert source.read(QUERIES["df22"], weekly)["SWAP_COUNT"].sum() == 2_500
+
+
+def test_only_writable_sources_have_write():
+    assert not hasattr(sources.FlipsideSource(), "write")
+    assert issubclass(sources.FixtureSource, sources.WritableSource)
+    assert issubclass(sources.SQLiteSource, sources.WritableSource)
+
+
+def test_copy(tmp_path, fixtures):
+    database = tmp_path / "mirror.db"
+    assert sources.main([f"sqlite:{database}", "df7", "df1", "--from", f"fixtures:{fixtures}"]) == 0
+    with sqlite3.connect(database) as connection:
+        tables = {name for (name,) in connection.execute("SELECT name FROM sqlite_master")}
+    assert tables == {QUERIES["df7"].id, QUERIES["df1"].id}
+    pd.testing.assert_frame_equal(sources.SQLiteSource(database).read(QUERIES["df7"]), result())
+
+
+def test_copy_reports_failures(tmp_path, fixtures):
+    assert sources.main([f"fixtures:{tmp_path / 'out'}", "df7", "df8", "--from", f"fixtures:{fixtures}"]) == 1
+    assert [path.name for path in (tmp_path / "out").iterdir()] == [f"{QUERIES['df7'].id}.parquet"]
+
+
+def test_copy_into_a_read_only_source(capsys):
+    with pytest.raises(SystemExit) as exit:
+        sources.main(["flipside", "df7"])
+    assert exit.value.code == 2
+    assert "read-only" in capsys.readouterr().err
@@ -0,0 +1,51 @@
+"""``dashboard.store`` snapshots on disk."""
+
+import pandas as pd
+import pytest
+
+from dashboard import store
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def result(value):
+    frame = pd.DataFrame({"CHAIN": ["Base", "Optimism"], "VALUE": [value, value + 0.5]})
+    frame.attrs.update(version=f"v{value}", etag=f'"{value}"')
+    return frame
+
+
+def test_round_trip_keeps_values_and_validators():
+    path = store.write("q1", result(1), fetched_at=1_700_000_000)
+    assert path.name == "1700000000.parquet"
+    frame, fetched_at = store.read_latest("q1")
+    assert fetched_at == 1_700_000_000
+    pd.testing.assert_frame_equal(frame, result(1))
+    assert frame.attrs["version"] == "v1"
+    assert frame.attrs["etag"] == '"1"'
+
+
+def test_keeps_the_newest_snapshots(cache_dir):
+    for value in range(store.KEEP + 2):
+        store.write("q1", result(value), fetched_at=1_000 + value)
+    kept = sorted(int(path.stem) for path in (cache_dir / "q1").glob("*.parquet"))
+    assert kept == [1_000 + value for value in range(2, store.KEEP + 2)]
+    frame, fetched_at = store.read_latest("q1")
+    assert fetched_at == 1_000 + store.KEEP + 1
+    assert frame.attrs["version"] == f"v{store.KEEP + 1}"
+
+
+def test_skips_unreadable_snapshots(cache_dir):
+    store.write("q1", result(1), fetched_at=1_000)
+    (cache_dir / "q1" / "2000.parquet").write_bytes(b"not parquet")
+    assert store.read_latest("q1")[1] == 1_000
+    assert store.read_latest("missing") is None
+
+
+def test_unpersistable_results_stay_in_memory(cache_dir):
+    mixed = pd.DataFrame({"VALUE": [1, "two"]})
+    assert store.write("q1", mixed) is None
+    assert not list((cache_dir / "q1").iterdir())
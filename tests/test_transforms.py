@@ -0,0 +1,57 @@
+"""``dashboard.transforms`` partitions and shares."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import transforms
+from dashboard.transforms import CHAINS, partition, share_of_total
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    transforms._partitions.clear()
+    yield
+    transforms._partitions.clear()
+
+
+def dataset(version=None):
+    rng = np.random.default_rng(5)
+    frame = pd.DataFrame({"CHAIN": rng.choice(CHAINS[:5], 100), "VALUE": rng.random(100)})
+    if version is not None:
+        frame.attrs["version"] = version
+    return frame
+
+
+def test_parts_match_masks():
+    frame = dataset()
+    parts = partition(frame)
+    assert list(parts) == list(pd.unique(frame["CHAIN"])) + ["Polygon"]
+    for chain in CHAINS:
+        pd.testing.assert_frame_equal(parts[chain], frame[frame["CHAIN"] == chain])
+
+
+def test_rows_without_a_key_are_left_out():
+    frame = pd.DataFrame({"CHAIN": ["Base", None, "Base"], "VALUE": [1, 2, 3]})
+    assert partition(frame)["Base"]["VALUE"].tolist() == [1, 3]
+
+
+def test_split_once_per_version():
+    parts = partition(dataset("v1"))
+    assert partition(dataset("v1")) is parts
+    assert partition(dataset("v1"), keys=CHAINS[:2]) is not parts
+    assert partition(dataset("v1").iloc[:50]) is not parts
+    assert partition(dataset("v2")) is not parts
+    assert partition(dataset()) is not partition(dataset())
+
+
+def test_keeps_a_bounded_number(monkeypatch):
+    monkeypatch.setattr(transforms, "MAX_PARTITIONS", 2)
+    for version in range(5):
+        partition(dataset(version))
+    assert len(transforms._partitions) == 2
+
+
+def test_share_of_total():
+    frame = pd.DataFrame({"CHAIN": ["Base", "Base", "BSC"], "VALUE": [1, 3, 2]})
+    assert share_of_total(frame, "VALUE", by="CHAIN").tolist() == [25, 75, 100]
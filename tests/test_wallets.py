@@ -0,0 +1,80 @@
+"""``dashboard.wallets`` ids against numbering every address seen so far from scratch."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import wallets
+
+
+def addresses(rng, n, count=5_000):
+    return np.array([f"0x{wallet:040x}" for wallet in rng.integers(0, count, n)], dtype=object)
+
+
+def test_ids_match_first_appearance_after_every_batch(tmp_path):
+    rng = np.random.default_rng(0)
+    seen = []
+    for batch in range(10):
+        batch_addresses = addresses(rng, 1_000)
+        seen.extend(batch_addresses)
+        # A fresh dictionary each time, so the ids are read back from disk.
+        ids = wallets.WalletIds(tmp_path).intern(batch_addresses)
+        expected, uniques = pd.factorize(np.array(seen, dtype=object))
+        assert (ids == expected[-len(batch_addresses):]).all()
+        loaded = wallets.WalletIds(tmp_path)
+        assert len(loaded) == len(uniques)
+        assert (loaded.lookup(uniques) == np.arange(len(uniques))).all()
+        assert (loaded.addresses(np.arange(len(uniques))) == uniques.astype(str)).all()
+
+
+def test_lookup_of_unknown_addresses(tmp_path):
+    ids = wallets.WalletIds(tmp_path)
+    assert (ids.lookup(["0xabc"]) == -1).all()
+    ids.intern(["0xabc", "0xdef"])
+    assert ids.lookup(["0xdef", "0x123", "0xabc"]).tolist() == [1, -1, 0]
+
+
+def test_sees_addresses_interned_by_another_instance(tmp_path):
+    first, second = wallets.WalletIds(tmp_path), wallets.WalletIds(tmp_path)
+    assert first.intern(["0xa", "0xb"]).tolist() == [0, 1]
+    assert second.intern(["0xb", "0xc"]).tolist() == [1, 2]
+    assert first.intern(["0xc", "0xd"]).tolist() == [2, 3]
+    assert second.addresses([3, 0]).tolist() == ["0xd", "0xa"]
+
+
+def intern_in_process(folder, seed):
+    batch_addresses = addresses(np.random.default_rng(seed), 2_000)
+    return batch_addresses, wallets.WalletIds(folder).intern(batch_addresses)
+
+
+@pytest.mark.skipif(wallets.fcntl is None, reason="needs fcntl")
+def test_processes_interning_at_once_agree(tmp_path):
+    with ProcessPoolExecutor(4) as pool:
+        results = list(pool.map(intern_in_process, [tmp_path] * 8, range(8)))
+    given = pd.Series(np.concatenate([ids for _, ids in results]),
+                      index=np.concatenate([batch_addresses for batch_addresses, _ in results]))
+    # One id per address, and the ids dense.
+    assert (given.groupby(level=0).nunique() == 1).all()
+    assert sorted(given.unique()) == list(range(given.index.nunique()))
+    assert (wallets.WalletIds(tmp_path).lookup(given.index) == given.to_numpy()).all()
+
+
+def test_colliding_hashes(tmp_path, monkeypatch):
+    # Only three distinct hashes, so nearly every address collides.
+    monkeypatch.setattr(wallets, "_hash", lambda keys: (keys.view(np.uint8).reshape(len(keys), -1)[:, -1] % 3)
+                        .astype(np.uint64))
+    rng = np.random.default_rng(1)
+    ids = wallets.WalletIds(tmp_path)
+    seen = []
+    for batch in range(5):
+        batch_addresses = addresses(rng, 40, count=100)
+        seen.extend(batch_addresses)
+        expected, _ = pd.factorize(np.array(seen, dtype=object))
+        assert (ids.intern(batch_addresses) == expected[-len(batch_addresses):]).all()
+
+
+def test_rejects_long_addresses(tmp_path):
+    with pytest.raises(ValueError):
+        wallets.WalletIds(tmp_path).intern(["0x" + "0" * 41])
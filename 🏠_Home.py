@@ -5,6 +5,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from millify import millify
 from streamlit_extras.colored_header import colored_header
+from dashboard import diagnostics
+from dashboard.figures import cached_figures
+from dashboard.registry import QUERIES, load_datasets
 
 # st.cache_data.clear()
 
@@ -20,6 +23,11 @@ st.set_page_config(
     }
 )
 
+# Hidden diagnostics view: /?diagnostics
+if "diagnostics" in st.query_params:
+    diagnostics.render()
+    st.stop()
+
 #style metric containers
 st.markdown("""
 <style>
@@ -59,100 +67,84 @@ st.markdown(text_3, unsafe_allow_html=True)
 
 ############################# cache datasets ########################################
 
-url7 = "https://flipsidecrypto.xyz/edit/queries/6349f677-143b-4774-94d2-c0704633f365"
-@st.cache_data
-def load_df7():
-    df7 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url7.split('/')[-1]}/data/latest")
-    return df7
-
-url8 = "https://flipsidecrypto.xyz/edit/queries/67409c8d-a5dd-4b4d-b611-710ef891281b"
-@st.cache_data
-def load_df8():
-    df8 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url8.split('/')[-1]}/data/latest")
-    return df8
+url7 = QUERIES["df7"].url
+url8 = QUERIES["df8"].url
+url22 = QUERIES["df22"].url
+url27 = QUERIES["df27"].url
 
-url22 = "https://flipsidecrypto.xyz/edit/queries/95beab6d-99e4-4133-ae87-f3f000c46258"
-@st.cache_data
-def load_df22():
-    df22 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url22.split('/')[-1]}/data/latest")
-    return df22
-
-########################################################################################
-url27 = "https://flipsidecrypto.xyz/edit/queries/44323a13-da6a-4c55-b15e-c6821afd8ca1"
-@st.cache_data
-def load_df27():
-    df27 = pd.read_json(f"https://api.flipsidecrypto.com/api/v2/queries/{url27.split('/')[-1]}/data/latest")
-    return df27
-
-df27 = load_df27()
+df27, df7, df8, df22 = load_datasets("df27", "df7", "df8", "df22")
 
 ###############################___________________DF24_____________________#############################
 
-df27_fig1 = px.line(df27,
-              x="WEEK",
-              y="ACTIVE_POOLS",
-              color="CHAIN",
-              title="Uniswap Weekly Active Pools")
-df27_fig1.update_layout(hovermode="x unified")
-
-df27_fig2 = px.line(df27,
-              x="WEEK",
-              y="TOTAL_VOLUME",
-              color="CHAIN",
-              title="Uniswap Weekly Swap Volume (USD)")
-df27_fig2.update_layout(hovermode="x unified")
-
-df27_fig3 = px.line(df27,
-              x="WEEK",
-              y="AVG_VOLUME",
-              color="CHAIN",
-              title="Uniswap Weekly Average Volume (USD)")
-df27_fig3.update_layout(hovermode="x unified")
-
-df27_fig4 = px.line(df27,
-              x="WEEK",
-              y="MEDIAN_VOLUME",
-              color="CHAIN",
-              title="Uniswap Weekly Median Volume (USD)")
-df27_fig4.update_layout(hovermode="x unified")
+@cached_figures
+def df27_figures(df27):
+    df27_fig1 = px.line(df27,
+                  x="WEEK",
+                  y="ACTIVE_POOLS",
+                  color="CHAIN",
+                  title="Uniswap Weekly Active Pools")
+    df27_fig1.update_layout(hovermode="x unified")
+
+    df27_fig2 = px.line(df27,
+                  x="WEEK",
+                  y="TOTAL_VOLUME",
+                  color="CHAIN",
+                  title="Uniswap Weekly Swap Volume (USD)")
+    df27_fig2.update_layout(hovermode="x unified")
+
+    df27_fig3 = px.line(df27,
+                  x="WEEK",
+                  y="AVG_VOLUME",
+                  color="CHAIN",
+                  title="Uniswap Weekly Average Volume (USD)")
+    df27_fig3.update_layout(hovermode="x unified")
+
+    df27_fig4 = px.line(df27,
+                  x="WEEK",
+                  y="MEDIAN_VOLUME",
+                  color="CHAIN",
+                  title="Uniswap Weekly Median Volume (USD)")
+    df27_fig4.update_layout(hovermode="x unified")
+    return df27_fig1, df27_fig2, df27_fig3, df27_fig4
+
+df27_fig1, df27_fig2, df27_fig3, df27_fig4 = df27_figures(df27)
 
 ########################################################################################
 
-############################### load datasets ###########################################
-
-df7 = load_df7()
-df8 = load_df8()
-df22 = load_df22()
-
 ################################   charts   ##############################################
 
 
 ###############################___________________DF7_____________________#############################
 
-df7_fig1 = px.pie(df7,
-               names='CHAIN',
-               values='UNIQUE_USERS',
-               title='Unique Users on Uniswap',
-               color='CHAIN')
-
-df7_fig2 = px.pie(df7,
-               names='CHAIN',
-               values='VOLUME',
-               title='Swap Volume (USD) on Uniswap',
-               color='CHAIN')
-df7_fig2.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
-
-# Bar chart for avg swap size by chain
-df7_fig3 = px.bar(df7, x='CHAIN', y='AVG_SWAP_SIZE_USD', color='CHAIN',
-                    title='Average Swap Size (USD) by Chain',
-                    labels={'AVG_SWAP_SIZE_USD': 'Average Swap Size'})
-df7_fig3.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
-
-# Bar chart for median swap size by chain
-df7_fig4 = px.bar(df7, x='CHAIN', y='MEDIAN_SWAP_SIZE_USD', color='CHAIN',
-                   title='Median Swap Size (USD) by Chain',
-                   labels={'MEDIAN_SWAP_SIZE_USD': 'Median Swap Size'})
-df7_fig4.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
+@cached_figures
+def df7_figures(df7):
+    df7_fig1 = px.pie(df7,
+                   names='CHAIN',
+                   values='UNIQUE_USERS',
+                   title='Unique Users on Uniswap',
+                   color='CHAIN')
+
+    df7_fig2 = px.pie(df7,
+                   names='CHAIN',
+                   values='VOLUME',
+                   title='Swap Volume (USD) on Uniswap',
+                   color='CHAIN')
+    df7_fig2.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
+
+    # Bar chart for avg swap size by chain
+    df7_fig3 = px.bar(df7, x='CHAIN', y='AVG_SWAP_SIZE_USD', color='CHAIN',
+                        title='Average Swap Size (USD) by Chain',
+                        labels={'AVG_SWAP_SIZE_USD': 'Average Swap Size'})
+    df7_fig3.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
+
+    # Bar chart for median swap size by chain
+    df7_fig4 = px.bar(df7, x='CHAIN', y='MEDIAN_SWAP_SIZE_USD', color='CHAIN',
+                       title='Median Swap Size (USD) by Chain',
+                       labels={'MEDIAN_SWAP_SIZE_USD': 'Median Swap Size'})
+    df7_fig4.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
+    return df7_fig1, df7_fig2, df7_fig3, df7_fig4
+
+df7_fig1, df7_fig2, df7_fig3, df7_fig4 = df7_figures(df7)
 
 ###############################___________________DF8_____________________#############################
 # single number
@@ -160,19 +152,24 @@ df7_fig4.update_traces(hovertemplate='%{label}: $%{value:,.0f}')
 
 ###############################___________________DF22_____________________#############################
 
-df22_fig1 = px.line(df22,
-              x="WEEK",
-              y="ACTIVE_USERS",
-              color="CHAIN",
-              title="Uniswap Weekly Active Users")
-df22_fig1.update_layout(hovermode="x unified")
-
-df22_fig2 = px.line(df22,
-              x="WEEK",
-              y="SWAP_COUNT",
-              color="CHAIN",
-              title="Uniswap Weekly Swap Count")
-df22_fig2.update_layout(hovermode="x unified")
+@cached_figures
+def df22_figures(df22):
+    df22_fig1 = px.line(df22,
+                  x="WEEK",
+                  y="ACTIVE_USERS",
+                  color="CHAIN",
+                  title="Uniswap Weekly Active Users")
+    df22_fig1.update_layout(hovermode="x unified")
+
+    df22_fig2 = px.line(df22,
+                  x="WEEK",
+                  y="SWAP_COUNT",
+                  color="CHAIN",
+                  title="Uniswap Weekly Swap Count")
+    df22_fig2.update_layout(hovermode="x unified")
+    return df22_fig1, df22_fig2
+
+df22_fig1, df22_fig2 = df22_figures(df22)
 
 #################################################### LAYOUT #############################################
 